@@ -2,21 +2,36 @@
 Analytics Agent for TrendOps.
 Responsible for data processing and theme extraction.
 """
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from app.tools.clustering_tool import clustering_tool
 from app.tools.scoring_tool import scoring_tool
+from app.tools.dedup_tool import dedup_tool
+from app.utils.config import config
 from app.utils.logging import get_logger
 from app.utils.cost_tracker import tracker, ExecutionRecord
+from app.utils.tag_index import tag_index
+from app.utils.tracing import traced, current_span
+from app.utils.stage_graph import Stage, StageGraph
 
 logger = get_logger(__name__)
 
+# Result section -> graph value that provides it
+ANALYTICS_SECTIONS = {
+    "topThemes": "theme_engagement",
+    "topKeywords": "keywords",
+    "engagementInsights": "insights",
+    "anomalies": "anomalies",
+    "metrics": "metrics"
+}
+
 class AnalyticsAgent:
     """
     MCP Agent: Analytics & Processing
     
     Responsibilities:
-    - Extract keywords and themes
+    - Collapse near-duplicate uploads
+    - Extract keywords and themes (from tag communities when enabled)
     - Calculate engagement scores
     - Rank content by engagement
     - Detect anomalies
@@ -26,13 +41,45 @@ class AnalyticsAgent:
         self.name = "AnalyticsAgent"
         self.clustering = clustering_tool
         self.scoring = scoring_tool
+        self.dedup = dedup_tool
+        self.graph = StageGraph("analytics", [
+            Stage("dedup", self._dedup, inputs=("videos",), outputs=("unique_videos", "weights")),
+            Stage("texts", self._texts, inputs=("unique_videos",), outputs=("texts",), inline=True),
+            Stage("keywords", self._keywords, inputs=("texts",), outputs=("keywords",)),
+            Stage(
+                "themes", self._themes,
+                inputs=("texts", "weights", "unique_videos", "region"),
+                outputs=("themes", "theme_source")
+            ),
+            Stage("scoring", self._score, inputs=("unique_videos",), outputs=("scored_videos",)),
+            Stage("theme_engagement", self._theme_engagement, inputs=("scored_videos", "themes"), outputs=("theme_engagement",)),
+            Stage("anomalies", self._anomalies, inputs=("scored_videos",), outputs=("anomalies",)),
+            Stage("avg_engagement", self._avg_engagement, inputs=("scored_videos",), outputs=("avg_engagement",), inline=True),
+            Stage(
+                "insights", self._insights,
+                inputs=("scored_videos", "avg_engagement", "theme_engagement", "anomalies"),
+                outputs=("insights",), inline=True
+            ),
+            Stage(
+                "metrics", self._metrics,
+                inputs=("videos", "unique_videos", "weights", "themes", "theme_source", "avg_engagement"),
+                outputs=("metrics",), inline=True
+            )
+        ])
     
-    def analyze_trending_data(self, data: Dict) -> Dict:
+    @traced("AnalyticsAgent.analyze_trending_data")
+    async def analyze_trending_data(self, data: Dict, sections: Optional[List[str]] = None) -> Dict:
         """
         Perform comprehensive analytics on trending data.
         
+        Stages run as a graph: keyword extraction, theme clustering and
+        engagement scoring are independent once duplicates are collapsed,
+        so they run concurrently on the stage worker pool.
+        
         Args:
             data: Raw video data from DataAgent
+            sections: Result sections to compute (keys of ANALYTICS_SECTIONS);
+                only the stages they depend on run. All sections when None.
         
         Returns:
             Structured analytics results
@@ -51,39 +98,14 @@ class AnalyticsAgent:
                     "anomalies": []
                 }
             
-            # Extract text corpus
-            texts = [
-                f"{v.get('title', '')} {v.get('description', '')}"
-                for v in videos
-            ]
-            
-            # 1. Extract keywords
-            keywords = self.clustering.extract_keywords(texts, top_n=15)
-            
-            # 2. Cluster themes
-            themes = self.clustering.cluster_themes(texts, n_clusters=5)
-            
-            # 3. Calculate engagement scores
-            scored_videos = self.scoring.rank_by_engagement(videos)
-            
-            # 4. Calculate theme engagement
-            theme_engagement = self.scoring.calculate_theme_engagement(
-                scored_videos,
-                themes
-            )
-            
-            # 5. Detect anomalies
-            anomalies = self.scoring.detect_anomalies(scored_videos)
+            sections = list(sections) if sections is not None else list(ANALYTICS_SECTIONS)
+            unknown = [section for section in sections if section not in ANALYTICS_SECTIONS]
+            if unknown:
+                raise ValueError(f"Unknown analytics sections: {unknown}")
             
-            # 6. Generate insights summary
-            avg_engagement = sum(v.get("engagement_score", 0) for v in scored_videos) / len(scored_videos)
-            top_video = scored_videos[0] if scored_videos else {}
-            
-            insights = self._generate_insights(
-                avg_engagement=avg_engagement,
-                top_video=top_video,
-                theme_engagement=theme_engagement,
-                anomaly_count=len(anomalies)
+            values, timings = await self.graph.run(
+                {"videos": videos, "region": data.get("metadata", {}).get("region")},
+                outputs=[ANALYTICS_SECTIONS[section] for section in sections]
             )
             
             duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
@@ -95,26 +117,20 @@ class AnalyticsAgent:
                 duration_ms=duration_ms,
                 status="success",
                 api_calls=0,
-                estimated_tokens=0
+                estimated_tokens=0,
+                metadata={"stage_timings_ms": timings}
             ))
             
             logger.info(
                 f"{self.name}: Analytics complete",
                 duration_ms=duration_ms,
-                themes_found=len(themes)
+                themes_found=len(values.get("themes", []))
             )
             
-            return {
-                "topThemes": theme_engagement,
-                "topKeywords": keywords[:10],
-                "engagementInsights": insights,
-                "anomalies": anomalies,
-                "metrics": {
-                    "avg_engagement": round(avg_engagement, 2),
-                    "total_videos": len(videos),
-                    "themes_identified": len(themes)
-                }
-            }
+            result = {section: values[ANALYTICS_SECTIONS[section]] for section in sections}
+            if "topKeywords" in result:
+                result["topKeywords"] = result["topKeywords"][:10]
+            return result
         
         except Exception as e:
             duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
@@ -130,6 +146,87 @@ class AnalyticsAgent:
             logger.error(f"{self.name}: Analytics failed", error=str(e))
             raise
     
+    # Stage functions; keyword arguments are graph value names
+    
+    def _dedup(self, videos: List[Dict]) -> Tuple[List[Dict], List[int]]:
+        """Collapse re-uploads and cross-region copies into weighted groups."""
+        if config.DEDUP_ENABLED:
+            unique_videos = self.dedup.deduplicate(videos)
+        else:
+            unique_videos = [dict(v, duplicate_count=1) for v in videos]
+        return unique_videos, [v["duplicate_count"] for v in unique_videos]
+    
+    def _texts(self, unique_videos: List[Dict]) -> List[str]:
+        return [
+            f"{v.get('title', '')} {v.get('description', '')}"
+            for v in unique_videos
+        ]
+    
+    def _keywords(self, texts: List[str]) -> List[Dict]:
+        return self.clustering.extract_keywords(texts, top_n=15)
+    
+    def _themes(
+        self,
+        texts: List[str],
+        weights: List[int],
+        unique_videos: List[Dict],
+        region: Optional[str]
+    ) -> Tuple[List[Dict], str]:
+        """Tag-community themes when enabled and they cover enough videos, else TF-IDF + K-Means."""
+        themes, source = None, "tags"
+        if config.TAG_THEMES_ENABLED and region:
+            themes = tag_index.themes(region, unique_videos, weights, n_themes=5)
+        if themes is None:
+            themes, source = self.clustering.cluster_themes(texts, n_clusters=5, weights=weights), "tfidf"
+        span = current_span()
+        if span is not None:
+            span.set_attribute("theme_source", source)
+        return themes, source
+    
+    def _score(self, unique_videos: List[Dict]) -> List[Dict]:
+        return self.scoring.rank_by_engagement(unique_videos)
+    
+    def _theme_engagement(self, scored_videos: List[Dict], themes: List[Dict]) -> List[Dict]:
+        return self.scoring.calculate_theme_engagement(scored_videos, themes)
+    
+    def _anomalies(self, scored_videos: List[Dict]) -> List[Dict]:
+        return self.scoring.detect_anomalies(scored_videos)
+    
+    def _avg_engagement(self, scored_videos: List[Dict]) -> float:
+        return sum(v.get("engagement_score", 0) for v in scored_videos) / len(scored_videos)
+    
+    def _insights(
+        self,
+        scored_videos: List[Dict],
+        avg_engagement: float,
+        theme_engagement: List[Dict],
+        anomalies: List[Dict]
+    ) -> str:
+        return self._generate_insights(
+            avg_engagement=avg_engagement,
+            top_video=scored_videos[0] if scored_videos else {},
+            theme_engagement=theme_engagement,
+            anomaly_count=len(anomalies)
+        )
+    
+    def _metrics(
+        self,
+        videos: List[Dict],
+        unique_videos: List[Dict],
+        weights: List[int],
+        themes: List[Dict],
+        theme_source: str,
+        avg_engagement: float
+    ) -> Dict:
+        return {
+            "avg_engagement": round(avg_engagement, 2),
+            "total_videos": len(videos),
+            "unique_videos": len(unique_videos),
+            "duplicate_groups": sum(1 for w in weights if w > 1),
+            "themes_identified": len(themes),
+            "theme_source": theme_source
+        }
+    
     def _generate_insights(
         self,
         avg_engagement: float,
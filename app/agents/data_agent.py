@@ -2,9 +2,15 @@
 Data Agent for TrendOps.
 Responsible for fetching YouTube trending data.
 """
+import asyncio
 from typing import Dict, Optional
+import httpx
 from app.tools.youtube_tool import youtube_tool
 from app.utils.logging import get_logger
+from app.utils.config import config
+from app.utils.deadline import current_deadline, DeadlineExceeded
+from app.utils.tracing import traced
+from app.utils.warm_state import warm_state
 
 logger = get_logger(__name__)
 
@@ -23,11 +29,13 @@ class DataAgent:
         self.name = "DataAgent"
         self.youtube = youtube_tool
     
+    @traced("DataAgent.fetch_trending_data")
     async def fetch_trending_data(
         self,
         region_code: str = "US",
         category_id: Optional[str] = None,
-        max_results: int = 25
+        max_results: int = 25,
+        refresh_mode: str = "full"
     ) -> Dict:
         """
         Fetch trending video data from YouTube.
@@ -36,9 +44,17 @@ class DataAgent:
             region_code: Country code (US, IN, GB, etc.)
             category_id: YouTube category ID (optional)
             max_results: Number of videos to fetch
+            refresh_mode: "full" or "delta" (statistics-only for cached videos)
+        
+        Under a request deadline the fetch gets whatever budget is left after
+        DEADLINE_ANALYTICS_RESERVE_MS; if that is too little, or the fetch
+        times out, the latest cached snapshot of the chart is served instead.
         
         Returns:
             Structured video data
+        
+        Raises:
+            DeadlineExceeded: If the deadline leaves no time and nothing is cached
         """
         logger.info(
             f"{self.name}: Fetching trending data",
@@ -46,12 +62,21 @@ class DataAgent:
             category=category_id
         )
         
+        deadline = current_deadline()
+        # Cold process: restore persisted snapshots first so delta refreshes and deadline fallbacks have a base
+        warm_state.ensure_loaded()
+        
         try:
-            data = await self.youtube.fetch_trending_videos(
+            fetch = self.youtube.fetch_trending_videos(
                 region_code=region_code,
                 category_id=category_id,
-                max_results=max_results
+                max_results=max_results,
+                refresh_mode=refresh_mode
             )
+            if deadline is None:
+                data = await fetch
+            else:
+                data = await self._fetch_within_deadline(fetch, deadline, region_code, category_id, max_results)
             
             logger.info(
                 f"{self.name}: Successfully fetched data",
@@ -66,5 +91,24 @@ class DataAgent:
                 error=str(e)
             )
             raise
+    
+    async def _fetch_within_deadline(self, fetch, deadline, region_code, category_id, max_results) -> Dict:
+        """Run a fetch under the deadline, falling back to the cached snapshot."""
+        budget = deadline.timeout(reserve_ms=config.DEADLINE_ANALYTICS_RESERVE_MS)
+        cached = self.youtube.cached_trending_videos(region_code, category_id, max_results)
+        
+        if cached is not None and budget * 1000 < config.DEADLINE_MIN_FETCH_MS:
+            fetch.close()
+            deadline.degrade("data", "cached_snapshot", reason="insufficient_budget", fetched_at=cached["metadata"]["fetched_at"])
+            return cached
+        
+        try:
+            return await asyncio.wait_for(fetch, timeout=budget)
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            if cached is None:
+                raise DeadlineExceeded(f"Trending data for {region_code} not fetched within the deadline and no snapshot is cached")
+            deadline.degrade("data", "cached_snapshot", reason="fetch_timeout", fetched_at=cached["metadata"]["fetched_at"])
+            logger.warning(f"{self.name}: Fetch timed out, serving cached snapshot", region=region_code)
+            return cached
 
 data_agent = DataAgent()
@@ -6,6 +6,7 @@ from typing import Dict, Optional
 from datetime import datetime
 from app.utils.config import config
 from app.utils.logging import get_logger
+from app.utils.tracing import traced
 from app.utils.cost_tracker import tracker, ExecutionRecord
 
 logger = get_logger(__name__)
@@ -25,6 +26,7 @@ class GovernanceAgent:
     def __init__(self):
         self.name = "GovernanceAgent"
     
+    @traced("GovernanceAgent.validate_request")
     def validate_request(
         self,
         region_code: str,
@@ -111,6 +113,7 @@ class GovernanceAgent:
         logger.info(f"{self.name}: Generating execution trace")
         
         return {
+            "requestId": tracker.current_request_id(),
             "executionLog": tracker.get_execution_trace(),
             "sessionStats": tracker.get_session_stats(),
             "governance": {
@@ -2,21 +2,158 @@
 Intelligence Agent for TrendOps.
 Responsible for generating executive insights using LLM.
 """
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, List, Tuple
 from datetime import datetime
+import asyncio
+import re
+import time
 import warnings
 
 # Use a more robust suppression for the deprecated library notice
 warnings.filterwarnings("ignore", message=".*google.generativeai.*")
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-import google.generativeai as genai
+from app.tools.llm_backend import get_llm_backend, LLMResponse
 from app.utils.config import config
 from app.utils.logging import get_logger
 from app.utils.cost_tracker import tracker, ExecutionRecord
+from app.utils.llm_cache import llm_cache
+from app.utils.metrics import metrics
+from app.utils.tokens import token_estimator, fit_to_budget
+from app.utils.tracing import tracer, traced
+from app.utils.deadline import current_deadline, Deadline
+from app.utils.startup import startup
 
 logger = get_logger(__name__)
 
+_batch_unparsed = metrics.counter(
+    "trendops_intelligence_batch_unparsed_total",
+    "Regions missing from a batched intelligence response (regenerated one call each)"
+)
+
+# Report headings -> (response key, is_list_section)
+REPORT_SECTIONS = {
+    "EXECUTIVE SUMMARY": ("executiveSummary", False),
+    "EMERGING PATTERNS": ("emergingPatterns", False),
+    "STRATEGIC IMPLICATIONS": ("strategicImplications", False),
+    "STARTUP OPPORTUNITIES": ("startupOpportunities", True),
+    "CONTENT IDEAS": ("contentIdeas", True),
+}
+
+# Section layout shared by single-region and batch prompts
+REPORT_TEMPLATE = """## EXECUTIVE SUMMARY
+(2-3 sentences summarizing key findings)
+
+## EMERGING PATTERNS
+(Identify 3-4 significant patterns or trends)
+
+## STRATEGIC IMPLICATIONS
+(What do these trends mean for businesses and creators?)
+
+## STARTUP OPPORTUNITIES
+(List exactly 3 specific startup ideas based on these trends)
+1. [Idea name]: [One sentence description]
+2. [Idea name]: [One sentence description]
+3. [Idea name]: [One sentence description]
+
+## CONTENT IDEAS
+(List exactly 5 content creation opportunities)
+1. [Content idea]
+2. [Content idea]
+3. [Content idea]
+4. [Content idea]
+5. [Content idea]
+
+Keep the tone professional, data-driven, and actionable. Focus on insights that would be valuable to executives, investors, and content strategists.
+"""
+
+class ReportSectionParser:
+    """
+    Single-pass, incremental parser for the sectioned intelligence report.
+    
+    Feed model output chunks as they arrive; each section is returned as
+    soon as the next heading closes it. Call close() at end of stream to
+    flush the final section and fill missing sections with defaults.
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        self._current = None
+        self._lines: List[str] = []
+        self.sections: Dict[str, Any] = {}
+    
+    def _heading(self, line: str):
+        """Return the section heading a line opens, if any."""
+        title = line.strip().lstrip("#*0123456789.) ").upper()
+        for name in REPORT_SECTIONS:
+            if title.startswith(name):
+                return name
+        return None
+    
+    def _finish_section(self) -> List[Tuple[str, Any]]:
+        if self._current is None:
+            return []
+        
+        key, is_list = REPORT_SECTIONS[self._current]
+        self._current = None
+        if key in self.sections:
+            return []
+        
+        if is_list:
+            items = []
+            for line in self._lines:
+                if line[0].isdigit() or line.startswith('-'):
+                    # Remove numbering/bullets
+                    item = line.lstrip('0123456789.-) ')
+                    if item:
+                        items.append(item)
+            value = items if items else ["Not available"]
+        else:
+            value = ' '.join(self._lines) if self._lines else "Not available"
+        
+        self.sections[key] = value
+        return [(key, value)]
+    
+    def _consume_line(self, line: str) -> List[Tuple[str, Any]]:
+        heading = self._heading(line) if line.lstrip().startswith(("#", "*")) or line.isupper() else None
+        if heading:
+            completed = self._finish_section()
+            self._current = heading
+            self._lines = []
+            return completed
+        if line.startswith('##'):
+            return self._finish_section()
+        if self._current is not None and line.strip():
+            self._lines.append(line.strip())
+        return []
+    
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of model output. Returns sections completed by it."""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        completed = []
+        for line in lines:
+            completed.extend(self._consume_line(line))
+        return completed
+    
+    def close(self) -> List[Tuple[str, Any]]:
+        """Flush buffered output. Returns the final completed sections."""
+        completed = self._consume_line(self._buffer) if self._buffer else []
+        self._buffer = ""
+        completed.extend(self._finish_section())
+        for key, is_list in REPORT_SECTIONS.values():
+            self.sections.setdefault(key, ["Not available"] if is_list else "Not available")
+        return completed
+
+async def _until_deadline(chunks: AsyncIterator[str], deadline: Deadline) -> AsyncIterator[str]:
+    """Relay stream chunks, raising asyncio.TimeoutError once the deadline passes."""
+    iterator = chunks.__aiter__()
+    while True:
+        try:
+            yield await asyncio.wait_for(iterator.__anext__(), timeout=deadline.timeout())
+        except StopAsyncIteration:
+            return
+
 class IntelligenceAgent:
     """
     MCP Agent: Intelligence & Insights
@@ -30,8 +167,20 @@ class IntelligenceAgent:
     
     def __init__(self):
         self.name = "IntelligenceAgent"
-        genai.configure(api_key=config.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel('gemini-flash-latest')
+        self._backend = None
+    
+    @property
+    def backend(self):
+        """LLM backend, created on first use so importing the agent stays cheap."""
+        if self._backend is None:
+            with startup.lazy("llm_backend"):
+                self._backend = get_llm_backend()
+        return self._backend
+    
+    @property
+    def cache_model(self) -> str:
+        """Identity of the generating model in LLM cache keys."""
+        return f"{self.backend.name}/{self.backend.model_name}"
     
     async def generate_intelligence_report(
         self,
@@ -46,106 +195,439 @@ class IntelligenceAgent:
             raw_data: Original data context
         
         Returns:
-            Structured intelligence report
+            Structured intelligence report (None if skipped to meet the request deadline)
+        """
+        report = None
+        async for event, payload in self.stream_intelligence_report(analytics_data, raw_data):
+            if event == "report":
+                report = payload
+        return report
+    
+    async def stream_intelligence_report(
+        self,
+        analytics_data: Dict,
+        raw_data: Dict
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate the intelligence report, streaming sections as they complete.
+        
+        Model output is consumed chunk by chunk and parsed in a single pass;
+        each `##` section is yielded as soon as the next heading closes it.
+        
+        Args:
+            analytics_data: Processed analytics from AnalyticsAgent
+            raw_data: Original data context
+        
+        Yields:
+            ("section", {"section": key, "content": value}) per completed section,
+            then ("report", report) with the full structured report. Under a
+            request deadline the report may be truncated (metadata.truncated)
+            or skipped (report is None).
         """
         start_time = datetime.utcnow()
+        started = time.perf_counter()
+        first_token_ms = None
+        first_section_ms = None
         
         logger.info(f"{self.name}: Generating intelligence report")
         
-        try:
-            # Build context for LLM
-            context = self._build_context(analytics_data, raw_data)
-            
-            # Generate report using Gemini
-            response = self.model.generate_content(
-                self._build_prompt(context),
-                generation_config={
-                    'temperature': 0.7,
-                    'max_output_tokens': 2000,
+        with tracer.span("IntelligenceAgent.stream_intelligence_report") as span:
+            try:
+                # Reuse a cached report when the analytics context has not materially changed
+                with tracer.span("llm_cache.get", enabled=config.LLM_CACHE_ENABLED) as lookup:
+                    # SQLite I/O (and the near-match scan) runs off the event loop
+                    cached = (
+                        await asyncio.to_thread(llm_cache.get, analytics_data, raw_data, self.cache_model)
+                        if config.LLM_CACHE_ENABLED else None
+                    )
+                    lookup.set_attribute("hit", cached is not None)
+                if config.LLM_CACHE_ENABLED:
+                    tracker.record_cache_lookup(hit=cached is not None, tokens_saved=cached[1] if cached else 0)
+                
+                if cached is not None:
+                    report, tokens_saved, match = cached
+                    span.set_attributes(cache_match=match, tokens_saved=tokens_saved)
+                    for key, _ in REPORT_SECTIONS.values():
+                        yield "section", {"section": key, "content": report.get(key)}
+                    
+                    duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
+                    tracker.record_execution(ExecutionRecord(
+                        tool_name="intelligence_generation",
+                        timestamp=start_time.isoformat(),
+                        duration_ms=duration_ms,
+                        status="cache_hit",
+                        api_calls=0,
+                        estimated_tokens=0,
+                        metadata={"cache": match, "tokens_saved": tokens_saved}
+                    ))
+                    
+                    logger.info(f"{self.name}: Report served from cache", match=match, tokens_saved=tokens_saved)
+                    
+                    yield "report", {
+                        **report,
+                        "metadata": {**report.get("metadata", {}), "cached": True, "cache_match": match}
+                    }
+                    return
+                
+                # Skip generation when the request deadline cannot fit an LLM call
+                deadline = current_deadline()
+                if deadline is not None and deadline.remaining_ms() < config.DEADLINE_MIN_INTELLIGENCE_MS:
+                    deadline.degrade("intelligence", "skipped", remaining_ms=round(deadline.remaining_ms(), 1))
+                    span.set_attribute("skipped", True)
+                    logger.info(f"{self.name}: Report skipped to meet deadline")
+                    yield "report", None
+                    return
+                
+                # Build context for LLM, compacted to the input token budget
+                with tracer.span("intelligence.build_prompt") as build:
+                    context, compaction_level = self._build_context(analytics_data, raw_data)
+                    prompt = self._build_prompt(context)
+                    build.set_attributes(compaction_level=compaction_level, prompt_chars=len(prompt))
+                
+                # Generate report with the configured backend, streaming chunks as they are produced
+                with tracer.span("llm.stream", backend=self.backend.name, model=self.backend.model_name) as generation:
+                    stream = self.backend.stream(prompt, max_output_tokens=config.LLM_MAX_OUTPUT_TOKENS)
+                    parser = ReportSectionParser()
+                    received = []
+                    truncated = False
+                    
+                    try:
+                        async for text in (stream if deadline is None else _until_deadline(stream, deadline)):
+                            received.append(text)
+                            if first_token_ms is None:
+                                first_token_ms = (time.perf_counter() - started) * 1000
+                                generation.set_attribute("time_to_first_token_ms", round(first_token_ms, 1))
+                            
+                            for key, value in parser.feed(text):
+                                if first_section_ms is None:
+                                    first_section_ms = (time.perf_counter() - started) * 1000
+                                yield "section", {"section": key, "content": value}
+                    except asyncio.TimeoutError:
+                        # Deadline hit mid-stream: keep the sections completed so far
+                        truncated = True
+                        stream.response = LLMResponse(text="".join(received))
+                        generation.set_attribute("truncated", True)
+                    
+                    for key, value in parser.close():
+                        if first_section_ms is None:
+                            first_section_ms = (time.perf_counter() - started) * 1000
+                        yield "section", {"section": key, "content": value}
+                    
+                    if truncated:
+                        deadline.degrade("intelligence", "truncated", sections=len(parser.sections))
+                    
+                    report_text = stream.response.text
+                    
+                    input_tokens, output_tokens, token_source = self._count_tokens(stream.response, prompt)
+                    estimated_tokens = input_tokens + output_tokens
+                    generation.set_attributes(
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        token_source=token_source
+                    )
+                
+                duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
+                
+                # Record execution
+                tracker.record_execution(ExecutionRecord(
+                    tool_name="intelligence_generation",
+                    timestamp=start_time.isoformat(),
+                    duration_ms=duration_ms,
+                    status="truncated" if truncated else "success",
+                    api_calls=1,
+                    estimated_tokens=estimated_tokens,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    metadata={
+                        "streamed": True,
+                        "token_source": token_source,
+                        "context_compaction_level": compaction_level,
+                        "time_to_first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+                        "time_to_first_section_ms": round(first_section_ms, 1) if first_section_ms is not None else None
+                    }
+                ))
+                
+                logger.info(
+                    f"{self.name}: Report generated",
+                    duration_ms=duration_ms,
+                    tokens_used=estimated_tokens,
+                    time_to_first_section_ms=first_section_ms
+                )
+                
+                report = {
+                    **parser.sections,
+                    "fullReport": report_text,
+                    "metadata": {
+                        "generated_at": datetime.utcnow().isoformat(),
+                        "tokens_used": estimated_tokens,
+                        "input_tokens": input_tokens,
+                        "output_tokens": output_tokens,
+                        "model": self.backend.model_name
+                    }
                 }
+                if truncated:
+                    report["metadata"]["truncated"] = True
+                
+                # Truncated reports are not cached so the next request can get the full one
+                if config.LLM_CACHE_ENABLED and not truncated:
+                    await asyncio.to_thread(llm_cache.put, analytics_data, raw_data, self.cache_model, report, estimated_tokens)
+                
+                yield "report", report
+            
+            except Exception as e:
+                duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
+                
+                tracker.record_execution(ExecutionRecord(
+                    tool_name="intelligence_generation",
+                    timestamp=start_time.isoformat(),
+                    duration_ms=duration_ms,
+                    status="error",
+                    error=str(e)
+                ))
+                
+                logger.error(f"{self.name}: Report generation failed", error=str(e))
+                raise
+    
+    @traced("IntelligenceAgent.generate_batch_intelligence_reports")
+    async def generate_batch_intelligence_reports(self, items: List[Tuple[Dict, Dict]]) -> List[Dict]:
+        """
+        Generate intelligence reports for several regions with as few LLM calls as possible.
+        
+        Cached reports are reused. Remaining contexts are packed into
+        shared prompts up to LLM_BATCH_INPUT_TOKEN_BUDGET and
+        LLM_BATCH_MAX_REGIONS, so the instruction block is sent once per
+        batch. Each response is split on its "# REPORT <n>" markers and
+        parsed per region. A region missing from the response falls back
+        to a single-region call.
+        
+        Args:
+            items: (analytics_data, raw_data) pairs, one per region
+        
+        Returns:
+            Structured intelligence reports in the same order as items
+        """
+        reports: List[Dict] = [None] * len(items)
+        pending = []
+        deadline = current_deadline()
+        
+        for i, (analytics_data, raw_data) in enumerate(items):
+            cached = (
+                await asyncio.to_thread(llm_cache.get, analytics_data, raw_data, self.cache_model)
+                if config.LLM_CACHE_ENABLED else None
             )
+            if config.LLM_CACHE_ENABLED:
+                tracker.record_cache_lookup(hit=cached is not None, tokens_saved=cached[1] if cached else 0)
+            if cached is not None:
+                report, _, match = cached
+                reports[i] = {**report, "metadata": {**report.get("metadata", {}), "cached": True, "cache_match": match}}
+            else:
+                context, _ = self._build_context(analytics_data, raw_data)
+                pending.append((i, context))
+        
+        if pending and deadline is not None and deadline.remaining_ms() < config.DEADLINE_MIN_INTELLIGENCE_MS:
+            deadline.degrade("intelligence", "skipped", regions=len(pending), remaining_ms=round(deadline.remaining_ms(), 1))
+            return reports
+        
+        # Pack contexts into batches under the input budget
+        overhead = token_estimator.count(self._build_batch_prompt([]))
+        batches, current, used = [], [], overhead
+        for i, context in pending:
+            cost = token_estimator.count(context)
+            if current and (used + cost > config.LLM_BATCH_INPUT_TOKEN_BUDGET or len(current) >= config.LLM_BATCH_MAX_REGIONS):
+                batches.append(current)
+                current, used = [], overhead
+            current.append((i, context))
+            used += cost
+        if current:
+            batches.append(current)
+        
+        results = await asyncio.gather(*(self._generate_batch(batch, items) for batch in batches))
+        for batch_reports in results:
+            for i, report in batch_reports.items():
+                reports[i] = report
+        
+        # Anything the batch response dropped gets its own call (not once the deadline has passed)
+        for i, report in enumerate(reports):
+            if report is None and (deadline is None or not deadline.expired()):
+                reports[i] = await self.generate_intelligence_report(*items[i])
+        
+        return reports
+    
+    async def _generate_batch(self, batch: List[Tuple[int, str]], items: List[Tuple[Dict, Dict]]) -> Dict[int, Dict]:
+        """Run one packed prompt and split the response into per-region reports."""
+        start_time = datetime.utcnow()
+        contexts = [context for _, context in batch]
+        prompt = self._build_batch_prompt(contexts)
+        
+        try:
+            with tracer.span("llm.generate", backend=self.backend.name, model=self.backend.model_name, regions=len(batch)) as generation:
+                generate = self.backend.generate(
+                    prompt,
+                    max_output_tokens=min(8192, config.LLM_MAX_OUTPUT_TOKENS * len(batch))
+                )
+                deadline = current_deadline()
+                if deadline is None:
+                    response = await generate
+                else:
+                    try:
+                        response = await asyncio.wait_for(generate, timeout=deadline.timeout())
+                    except asyncio.TimeoutError:
+                        deadline.degrade("intelligence", "batch_timeout", regions=len(batch))
+                        generation.set_attribute("timed_out", True)
+                        return {}
+                report_text = response.text
+                input_tokens, output_tokens, token_source = self._count_tokens(response, prompt)
+                generation.set_attributes(input_tokens=input_tokens, output_tokens=output_tokens, token_source=token_source)
+            shared_tokens = token_estimator.count(self._build_batch_prompt([])) // len(batch)
             
-            report_text = response.text
+            # Split on "# REPORT <n>" markers (any heading level); parts alternate number, body
+            parts = re.split(r'^\s*#+\s*REPORT\s+(\d+)\b.*$', report_text, flags=re.MULTILINE)
+            bodies = {int(number): body for number, body in zip(parts[1::2], parts[2::2])}
             
-            # Estimate token usage (Gemini doesn't provide exact counts in free tier)
-            estimated_tokens = len(context.split()) + len(report_text.split())
+            reports = {}
+            for position, (i, context) in enumerate(batch, start=1):
+                body = bodies.get(position)
+                if body is None:
+                    continue
+                
+                parser = ReportSectionParser()
+                parser.feed(body)
+                parser.close()
+                
+                # Attribute each region its context, its report and a share of the instructions
+                region_input = shared_tokens + token_estimator.count(context)
+                region_output = token_estimator.count(body)
+                estimated_tokens = region_input + region_output
+                report = {
+                    **parser.sections,
+                    "fullReport": body.strip(),
+                    "metadata": {
+                        "generated_at": datetime.utcnow().isoformat(),
+                        "tokens_used": estimated_tokens,
+                        "input_tokens": region_input,
+                        "output_tokens": region_output,
+                        "model": self.backend.model_name,
+                        "batch_size": len(batch)
+                    }
+                }
+                reports[i] = report
+                
+                if config.LLM_CACHE_ENABLED:
+                    await asyncio.to_thread(llm_cache.put, *items[i], self.cache_model, report, estimated_tokens)
             
             duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
             
-            # Record execution
             tracker.record_execution(ExecutionRecord(
-                tool_name="intelligence_generation",
+                tool_name="intelligence_batch_generation",
                 timestamp=start_time.isoformat(),
                 duration_ms=duration_ms,
                 status="success",
                 api_calls=1,
-                estimated_tokens=estimated_tokens
+                estimated_tokens=input_tokens + output_tokens,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                metadata={"regions": len(batch), "regions_parsed": len(reports), "token_source": token_source}
             ))
             
             logger.info(
-                f"{self.name}: Report generated",
+                f"{self.name}: Batch report generated",
                 duration_ms=duration_ms,
-                tokens_used=estimated_tokens
+                regions=len(batch),
+                regions_parsed=len(reports)
             )
             
-            return {
-                "executiveSummary": self._extract_section(report_text, "EXECUTIVE SUMMARY"),
-                "emergingPatterns": self._extract_section(report_text, "EMERGING PATTERNS"),
-                "strategicImplications": self._extract_section(report_text, "STRATEGIC IMPLICATIONS"),
-                "startupOpportunities": self._extract_list_section(report_text, "STARTUP OPPORTUNITIES"),
-                "contentIdeas": self._extract_list_section(report_text, "CONTENT IDEAS"),
-                "fullReport": report_text,
-                "metadata": {
-                    "generated_at": datetime.utcnow().isoformat(),
-                    "tokens_used": estimated_tokens,
-                    "model": "gemini-flash-latest"
-                }
-            }
+            # Unparsed regions fall back to their own calls, which quietly costs the batching saving
+            if len(reports) < len(batch):
+                _batch_unparsed.inc(len(batch) - len(reports))
+                logger.warning(
+                    f"{self.name}: Batch response missing region reports",
+                    regions=len(batch),
+                    regions_parsed=len(reports),
+                    markers_found=sorted(bodies)
+                )
+            
+            return reports
         
         except Exception as e:
             duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
             
             tracker.record_execution(ExecutionRecord(
-                tool_name="intelligence_generation",
+                tool_name="intelligence_batch_generation",
                 timestamp=start_time.isoformat(),
                 duration_ms=duration_ms,
                 status="error",
                 error=str(e)
             ))
             
-            logger.error(f"{self.name}: Report generation failed", error=str(e))
+            logger.error(f"{self.name}: Batch report generation failed", error=str(e))
             raise
     
-    def _build_context(self, analytics_data: Dict, raw_data: Dict) -> str:
-        """Build context string for LLM."""
+    def _count_tokens(self, response: LLMResponse, prompt: str) -> Tuple[int, int, str]:
+        """
+        Input and output token counts for a completed call.
+        
+        Uses the backend's reported usage when present (and calibrates the
+        estimator with it, unless the backend is the offline stub), otherwise
+        estimates from the full prompt and output.
+        
+        Returns:
+            (input_tokens, output_tokens, source) where source is the backend name or "estimate"
+        """
+        if response.input_tokens and response.output_tokens:
+            if self.backend.name != "stub":
+                token_estimator.calibrate(prompt, response.input_tokens)
+            return response.input_tokens, response.output_tokens, self.backend.name
+        return token_estimator.count(prompt), token_estimator.count(response.text), "estimate"
+    
+    def _build_context(self, analytics_data: Dict, raw_data: Dict) -> Tuple[str, int]:
+        """
+        Build context string for LLM.
+        
+        Themes, keywords and anomalies are compacted so that the full prompt
+        stays within LLM_INPUT_TOKEN_BUDGET.
+        
+        Returns:
+            (context, compaction_level) where level 0 is the most detailed
+        """
         
         region = raw_data.get("metadata", {}).get("region", "Unknown")
         video_count = analytics_data.get("metrics", {}).get("total_videos", 0)
         avg_engagement = analytics_data.get("metrics", {}).get("avg_engagement", 0)
         
-        themes = analytics_data.get("topThemes", [])
-        keywords = analytics_data.get("topKeywords", [])
-        anomalies = analytics_data.get("anomalies", [])
-        
-        context = f"""
+        def render(compact: Dict) -> str:
+            omitted = compact["omitted"]
+            context = f"""
 REGION: {region}
 VIDEOS ANALYZED: {video_count}
 AVERAGE ENGAGEMENT: {avg_engagement:.2f}/100
 
 TOP THEMES:
 """
-        for theme in themes[:5]:
-            context += f"- {theme.get('theme')}: {theme.get('video_count')} videos, "
-            context += f"engagement {theme.get('avg_engagement'):.2f}\n"
-        
-        context += "\nTOP KEYWORDS:\n"
-        for kw in keywords[:10]:
-            context += f"- {kw.get('keyword')} ({kw.get('frequency')} occurrences)\n"
-        
-        if anomalies:
-            context += f"\nANOMALIES DETECTED: {len(anomalies)} videos with unusual engagement\n"
+            for theme in compact["themes"]:
+                context += f"- {theme.get('theme')}: {theme.get('video_count')} videos, "
+                context += f"engagement {theme.get('avg_engagement'):.2f}"
+                if theme["keywords"]:
+                    context += f" (related: {', '.join(theme['keywords'])})"
+                context += "\n"
+            if omitted["themes"]:
+                context += f"- plus {omitted['themes']} smaller themes covering {omitted['theme_videos']} videos\n"
+            
+            context += "\nTOP KEYWORDS:\n"
+            for kw in compact["keywords"]:
+                context += f"- {kw.get('keyword')} ({kw.get('frequency')} occurrences)\n"
+            if omitted["keywords"]:
+                context += f"- plus {omitted['keywords']} less frequent keywords\n"
+            
+            if compact["anomaly_count"]:
+                context += f"\nANOMALIES DETECTED: {compact['anomaly_count']} videos with unusual engagement\n"
+                for anomaly in compact["anomalies"]:
+                    context += f"- [{anomaly.get('type')}] {anomaly.get('title')} (z-score {anomaly.get('z_score')})\n"
+            
+            return context
         
-        return context
+        budget = config.LLM_INPUT_TOKEN_BUDGET - token_estimator.count(self._build_prompt(""))
+        context, _, level = fit_to_budget(analytics_data, render, budget)
+        return context, level
     
     def _build_prompt(self, context: str) -> str:
         """Build LLM prompt for intelligence generation."""
@@ -159,69 +641,22 @@ DATA:
 
 Generate a structured report with the following sections:
 
-## EXECUTIVE SUMMARY
-(2-3 sentences summarizing key findings)
-
-## EMERGING PATTERNS
-(Identify 3-4 significant patterns or trends)
-
-## STRATEGIC IMPLICATIONS
-(What do these trends mean for businesses and creators?)
-
-## STARTUP OPPORTUNITIES
-(List exactly 3 specific startup ideas based on these trends)
-1. [Idea name]: [One sentence description]
-2. [Idea name]: [One sentence description]
-3. [Idea name]: [One sentence description]
-
-## CONTENT IDEAS
-(List exactly 5 content creation opportunities)
-1. [Content idea]
-2. [Content idea]
-3. [Content idea]
-4. [Content idea]
-5. [Content idea]
-
-Keep the tone professional, data-driven, and actionable. Focus on insights that would be valuable to executives, investors, and content strategists.
-"""
-    
-    def _extract_section(self, text: str, section_name: str) -> str:
-        """Extract a specific section from the report."""
-        
-        lines = text.split('\n')
-        section_lines = []
-        in_section = False
-        
-        for line in lines:
-            if section_name in line.upper():
-                in_section = True
-                continue
-            elif line.startswith('##') and in_section:
-                break
-            elif in_section and line.strip():
-                section_lines.append(line.strip())
-        
-        return ' '.join(section_lines) if section_lines else "Not available"
+{REPORT_TEMPLATE}"""
     
-    def _extract_list_section(self, text: str, section_name: str) -> list:
-        """Extract a list section from the report."""
+    def _build_batch_prompt(self, contexts: List[str]) -> str:
+        """Build one LLM prompt covering several regions, sharing the instruction block."""
         
-        lines = text.split('\n')
-        items = []
-        in_section = False
+        data = "\n".join(
+            f"### DATASET {i}\n{context.strip()}\n" for i, context in enumerate(contexts, start=1)
+        )
         
-        for line in lines:
-            if section_name in line.upper():
-                in_section = True
-                continue
-            elif line.startswith('##') and in_section:
-                break
-            elif in_section and line.strip() and (line.strip()[0].isdigit() or line.strip().startswith('-')):
-                # Remove numbering/bullets
-                item = line.strip().lstrip('0123456789.-) ')
-                if item:
-                    items.append(item)
-        
-        return items if items else ["Not available"]
+        return f"""You are a strategic intelligence analyst for TrendOps, an AI trend intelligence platform.
+
+Analyze each of the following {len(contexts)} YouTube trending datasets independently and generate a professional, investor-ready intelligence report for each one.
+
+{data}
+For EACH dataset, in order, start with a line "# REPORT <dataset number>" and then write a structured report with the following sections:
+
+{REPORT_TEMPLATE}"""
 
 intelligence_agent = IntelligenceAgent()
@@ -2,18 +2,30 @@
 TrendOps - AI Trend Intelligence Control Plane
 Main FastAPI application with multi-agent orchestration.
 """
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
-from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel, Field
-from typing import Optional
-import uvicorn
-
-from app.agents.data_agent import data_agent
-from app.agents.analytics_agent import analytics_agent
-from app.agents.intelligence_agent import intelligence_agent
+# Imported first so the startup report's import time covers the whole app
+from app.utils.startup import startup
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+
 from app.agents.governance_agent import governance_agent
+from app.agents.intelligence_agent import intelligence_agent
+from app.pipeline import run_pipeline, run_batch_pipeline, PipelineValidationError
 from app.utils.config import config
+from app.utils.entity_store import entity_store
+from app.utils.jobs import job_manager, QueueFullError
+from app.utils.admission import admission_controller, Admission, AdmissionRejected
+from app.utils.compression import CompressionMiddleware
+from app.utils.deadline import DeadlineExceeded, start_deadline
+from app.utils.tracing import tracer, to_otlp, to_chrome_trace
+from app.utils.profiling import ProfilingMiddleware, profile_store, collapsed_stacks, is_admin
+from app.utils.metrics import metrics
+from app.utils.serialization import FastJSONResponse, project_fields, LEAN_VIEW_FIELDS
+from app.utils.tag_index import tag_index
+from app.utils.warm_state import warm_state
 from app.utils.logging import get_logger
 
 # Validate configuration on startup
@@ -26,14 +38,55 @@ except ValueError as e:
 
 logger = get_logger(__name__)
 
+# The MCP SDK is a heavy import; only load it when MCP is served from this process
+if config.MCP_HTTP_ENABLED:
+    from app.mcp_server import mcp
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rehydrate persisted snapshots before the first request (serverless runtimes
+    # without lifespan events rehydrate lazily on the first fetch instead)
+    warm_state.ensure_loaded()
+    try:
+        # The MCP session manager owns the task group that serves MCP sessions
+        if config.MCP_HTTP_ENABLED:
+            async with mcp.session_manager.run():
+                yield
+        else:
+            yield
+    finally:
+        await job_manager.shutdown()
+        warm_state.flush()
+
 app = FastAPI(
     title="TrendOps",
     description="AI Trend Intelligence Control Plane - Multi-Agent MCP System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Initialize Jinja2 templates
-templates = Jinja2Templates(directory="templates")
+# MCP tools over streamable HTTP in this process, so MCP clients share the
+# YouTube connection pool, snapshot and LLM caches and governance tracker
+if config.MCP_HTTP_ENABLED:
+    app.router.routes.extend(mcp.streamable_http_app().routes)
+
+# Negotiate brotli/gzip for buffered responses (SSE and small bodies pass through)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Admin opt-in request profiling; outermost so compression and encoding are included
+if config.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+_templates = None
+
+def get_templates():
+    """Jinja2 templates, loaded on the first page render rather than at import."""
+    global _templates
+    if _templates is None:
+        with startup.lazy("templates"):
+            from fastapi.templating import Jinja2Templates
+            _templates = Jinja2Templates(directory="templates")
+    return _templates
 
 class TrendAnalysisRequest(BaseModel):
     """Request model for trend analysis."""
@@ -41,6 +94,24 @@ class TrendAnalysisRequest(BaseModel):
     category_id: Optional[str] = Field(default=None, description="YouTube category ID")
     max_results: int = Field(default=25, ge=1, le=50, description="Number of videos to analyze")
     include_intelligence: bool = Field(default=True, description="Generate LLM-based intelligence report")
+    refresh_mode: str = Field(default="full", pattern="^(full|delta)$", description="'delta' refetches only statistics for videos already cached")
+    intelligence_mode: str = Field(default="sync", pattern="^(sync|async)$", description="'async' returns analytics immediately and generates intelligence as a background job")
+    timeout_ms: Optional[int] = Field(default=None, ge=50, le=120000, description="Latency budget; stages that cannot finish in time are skipped or cut short and reported under 'degraded'")
+
+class BatchTrendAnalysisRequest(BaseModel):
+    """Request model for multi-region trend analysis."""
+    regions: List[str] = Field(min_length=1, max_length=10, description="ISO 3166-1 alpha-2 country codes")
+    category_id: Optional[str] = Field(default=None, description="YouTube category ID")
+    max_results: int = Field(default=25, ge=1, le=50, description="Number of videos to analyze per region")
+    include_intelligence: bool = Field(default=True, description="Generate LLM-based intelligence reports")
+    refresh_mode: str = Field(default="full", pattern="^(full|delta)$", description="'delta' refetches only statistics for videos already cached")
+    timeout_ms: Optional[int] = Field(default=None, ge=50, le=120000, description="Latency budget; stages that cannot finish in time are skipped or cut short and reported under 'degraded'")
+    
+    @field_validator("regions")
+    @classmethod
+    def _dedupe_regions(cls, regions: List[str]) -> List[str]:
+        # Results are keyed by region, so a repeated region would be fetched and analyzed twice for one entry
+        return list(dict.fromkeys(regions))
 
 class TrendAnalysisResponse(BaseModel):
     """Response model for trend analysis."""
@@ -48,17 +119,19 @@ class TrendAnalysisResponse(BaseModel):
     data: dict
     analytics: dict
     intelligence: Optional[dict] = None
+    intelligence_job: Optional[dict] = None
+    degraded: Optional[dict] = None
     governance: dict
 
 @app.get("/")
 async def root(request: Request):
     """Render the SaaS landing page."""
-    return templates.TemplateResponse("landing.html", {"request": request})
+    return get_templates().TemplateResponse(request, "landing.html")
 
 @app.get("/dashboard")
 async def dashboard(request: Request):
     """Render the enterprise dashboard UI."""
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return get_templates().TemplateResponse(request, "dashboard.html")
 
 @app.get("/health")
 async def health():
@@ -73,12 +146,18 @@ async def health():
         },
         "configuration": {
             "youtube_api": "configured" if config.YOUTUBE_API_KEY else "missing",
-            "google_api": "configured" if config.GOOGLE_API_KEY else "missing"
+            "google_api": "configured" if config.GOOGLE_API_KEY else "missing",
+            "llm_backend": config.LLM_BACKEND
         }
     }
 
-@app.post("/analyze", response_model=TrendAnalysisResponse)
-async def analyze_trends(request: TrendAnalysisRequest):
+@app.post("/analyze", response_model=TrendAnalysisResponse, response_class=FastJSONResponse)
+async def analyze_trends(
+    request: TrendAnalysisRequest,
+    fields: Optional[str] = Query(default=None, description="Projection, e.g. -data.videos[*].description,-governance.executionLog"),
+    view: str = Query(default="full", pattern="^(full|lean)$", description="'lean' returns the dashboard payload shape"),
+    x_priority_class: Optional[str] = Header(default=None, description="Admission priority class, e.g. dashboard, api or batch")
+):
     """
     Main orchestration endpoint for trend analysis.
     
@@ -88,6 +167,17 @@ async def analyze_trends(request: TrendAnalysisRequest):
     3. AnalyticsAgent processes data
     4. IntelligenceAgent generates insights (optional)
     5. GovernanceAgent returns execution trace
+    
+    The response is projected with `fields` / `view` and rendered directly
+    with msgspec, bypassing response_model serialization.
+    
+    With `timeout_ms`, stages that cannot finish in time are skipped or cut
+    short; `degraded` lists them and status becomes "partial". Returns 504
+    only when no data could be produced at all.
+    
+    Admission control queues the request when ADMISSION_MAX_INFLIGHT
+    pipelines are running, and sheds it with 503/429 (and Retry-After) when
+    it cannot start within its deadline; queue time counts against timeout_ms.
     """
     logger.info(
         "Received trend analysis request",
@@ -95,64 +185,131 @@ async def analyze_trends(request: TrendAnalysisRequest):
         category=request.category_id
     )
     
+    # Response keys for each pipeline stage ("governance" validation is not returned)
+    payload = {"status": "success", "data": None, "analytics": None, "intelligence": None, "degraded": None, "governance": None}
+    stage_keys = {"data": "data", "analytics": "analytics", "intelligence": "intelligence", "degradation": "degraded", "trace": "governance"}
+    
+    background_intelligence = request.include_intelligence and request.intelligence_mode == "async"
+    if background_intelligence and not job_manager.has_capacity():
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "Intelligence job queue is full"},
+            headers={"Retry-After": "5"}
+        )
+    
+    admission = await _acquire_slot(x_priority_class, "api", _timeout_ms(request))
     try:
-        # STEP 1: Governance - Validate Request
-        validation = governance_agent.validate_request(
+        async for stage, result in run_pipeline(
             region_code=request.region_code,
             category_id=request.category_id,
-            max_results=request.max_results
-        )
-        
-        if not validation["valid"]:
-            governance_agent.log_final_metrics(success=False, error="Validation failed")
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": "Validation failed",
-                    "details": validation["errors"]
-                }
-            )
+            max_results=request.max_results,
+            include_intelligence=request.include_intelligence and not background_intelligence,
+            refresh_mode=request.refresh_mode,
+            timeout_ms=_timeout_ms(request, admission)
+        ):
+            if stage in stage_keys:
+                payload[stage_keys[stage]] = result
         
-        params = validation["sanitized_params"]
+        if payload["degraded"] and payload["degraded"]["degraded"]:
+            payload["status"] = "partial"
         
-        # STEP 2: Data Agent - Fetch Trending Data
-        raw_data = await data_agent.fetch_trending_data(
-            region_code=params["region_code"],
-            category_id=params["category_id"],
-            max_results=params["max_results"]
-        )
+        if background_intelligence:
+            payload["intelligence_job"] = _submit_intelligence_job(payload["analytics"], payload["data"])
         
-        # STEP 3: Analytics Agent - Process Data
-        analytics_results = analytics_agent.analyze_trending_data(raw_data)
+        logger.info("Trend analysis completed successfully")
         
-        # STEP 4: Intelligence Agent - Generate Insights (Optional)
-        intelligence_results = None
-        if request.include_intelligence:
-            intelligence_results = await intelligence_agent.generate_intelligence_report(
-                analytics_data=analytics_results,
-                raw_data=raw_data
-            )
+        if view == "lean":
+            payload = project_fields(payload, LEAN_VIEW_FIELDS)
+        payload = project_fields(payload, fields)
         
-        # STEP 5: Governance - Get Execution Trace
-        execution_trace = governance_agent.get_execution_trace()
-        governance_agent.log_final_metrics(success=True)
+        return FastJSONResponse(payload)
+    
+    except PipelineValidationError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Validation failed",
+                "details": e.errors
+            }
+        )
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=504,
+            detail={
+                "error": "Deadline exceeded",
+                "message": str(e)
+            }
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Internal server error",
+                "message": str(e)
+            }
+        )
+    finally:
+        _release_slot(admission)
+
+@app.post("/analyze/batch", response_class=FastJSONResponse)
+async def analyze_trends_batch(
+    request: BatchTrendAnalysisRequest,
+    fields: Optional[str] = Query(default=None, description="Projection, e.g. -results.US.data.videos[*].description"),
+    x_priority_class: Optional[str] = Header(default=None, description="Admission priority class (defaults to batch)")
+):
+    """
+    Multi-region trend analysis.
+    
+    Runs the same agent chain as /analyze for each region, but packs the
+    regions' intelligence contexts into shared LLM calls (see
+    LLM_BATCH_INPUT_TOKEN_BUDGET / LLM_BATCH_MAX_REGIONS) instead of one
+    call per region.
+    """
+    logger.info(
+        "Received batch trend analysis request",
+        regions=request.regions,
+        category=request.category_id
+    )
+    
+    admission = await _acquire_slot(x_priority_class, "batch", _timeout_ms(request))
+    try:
+        result = await run_batch_pipeline(
+            regions=request.regions,
+            category_id=request.category_id,
+            max_results=request.max_results,
+            include_intelligence=request.include_intelligence,
+            refresh_mode=request.refresh_mode,
+            timeout_ms=_timeout_ms(request, admission)
+        )
         
-        logger.info("Trend analysis completed successfully")
+        logger.info("Batch trend analysis completed successfully", regions=len(result["results"]))
         
-        return TrendAnalysisResponse(
-            status="success",
-            data=raw_data,
-            analytics=analytics_results,
-            intelligence=intelligence_results,
-            governance=execution_trace
-        )
+        degraded = result["degradation"]
+        payload = {
+            "status": "partial" if degraded and degraded["degraded"] else "success",
+            "results": result["results"],
+            "degraded": degraded,
+            "governance": result["trace"]
+        }
+        return FastJSONResponse(project_fields(payload, fields))
     
-    except HTTPException:
-        raise
+    except PipelineValidationError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Validation failed",
+                "details": e.errors
+            }
+        )
+    except DeadlineExceeded as e:
+        raise HTTPException(
+            status_code=504,
+            detail={
+                "error": "Deadline exceeded",
+                "message": str(e)
+            }
+        )
     except Exception as e:
-        logger.error("Trend analysis failed", error=str(e))
-        governance_agent.log_final_metrics(success=False, error=str(e))
-        
         raise HTTPException(
             status_code=500,
             detail={
@@ -160,12 +317,277 @@ async def analyze_trends(request: TrendAnalysisRequest):
                 "message": str(e)
             }
         )
+    finally:
+        _release_slot(admission)
+
+def _timeout_ms(request, admission: Optional[Admission] = None) -> Optional[int]:
+    """Caller's latency budget (or REQUEST_DEFAULT_TIMEOUT_MS), less any time spent queued."""
+    timeout_ms = request.timeout_ms or config.REQUEST_DEFAULT_TIMEOUT_MS or None
+    return admission.remaining_timeout_ms(timeout_ms) if admission is not None else timeout_ms
+
+async def _acquire_slot(requested_priority: Optional[str], default_priority: str, timeout_ms: Optional[int]) -> Optional[Admission]:
+    """Wait for a pipeline slot; shed requests become 503/429 with Retry-After."""
+    if not config.ADMISSION_ENABLED:
+        return None
+    priority = admission_controller.resolve_priority(requested_priority, default_priority)
+    try:
+        return await admission_controller.acquire(priority, timeout_ms)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={"error": "Request shed by admission control", "reason": e.reason, "message": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def _release_slot(admission: Optional[Admission]):
+    if admission is not None:
+        admission_controller.release(admission)
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse that holds an admission slot until sending ends, however it ends."""
+    
+    def __init__(self, *args, admission: Optional[Admission] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.admission = admission
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _release_slot(self.admission)
+
+async def _run_intelligence_job(analytics_results: dict, raw_data: dict):
+    # The job inherits the request's context but outlives it; the request deadline must not cut the report short
+    start_deadline(None)
+    return await intelligence_agent.generate_intelligence_report(
+        analytics_data=analytics_results,
+        raw_data=raw_data
+    )
+
+def _submit_intelligence_job(analytics_results: dict, raw_data: dict) -> dict:
+    """Queue intelligence generation and describe the job for the response."""
+    try:
+        job = job_manager.submit(
+            "intelligence",
+            lambda: _run_intelligence_job(analytics_results, raw_data)
+        )
+    except QueueFullError as e:
+        return {"job_id": None, "status": "rejected", "error": str(e)}
+    
+    return {"job_id": job.job_id, "status": job.status, "poll_url": f"/jobs/{job.job_id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status and result of a background job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail={"error": "Job not found or expired"})
+    return FastJSONResponse(job.to_dict())
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running background job (a running job reports "cancelling" until it stops)."""
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=404, detail={"error": "Job not found or already finished"})
+    return job_manager.get(job_id).to_dict()
+
+@app.get("/governance/jobs")
+async def get_job_stats():
+    """Get background job queue statistics."""
+    return job_manager.stats()
+
+@app.get("/governance/admission")
+async def get_admission_stats():
+    """Get admission control slot and queue statistics."""
+    return admission_controller.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics (admission queue depth, wait time, shed requests)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def _sse_event(event: str, data) -> bytes:
+    """Format a single Server-Sent Event frame."""
+    return b"event: " + event.encode() + b"\ndata: " + FastJSONResponse.encode(data) + b"\n\n"
+
+@app.post("/analyze/stream")
+async def analyze_trends_stream(
+    request: TrendAnalysisRequest,
+    fields: Optional[str] = Query(default=None, description="Projection applied to each stage payload"),
+    view: str = Query(default="full", pattern="^(full|lean)$", description="'lean' returns the dashboard payload shape"),
+    x_priority_class: Optional[str] = Header(default=None, description="Admission priority class, e.g. dashboard, api or batch")
+):
+    """
+    Streaming variant of /analyze using Server-Sent Events.
+    
+    Emits one event per completed stage: `governance`, `data`, `analytics`,
+    `intelligence` (if requested), `degraded` (if the request has a
+    deadline), then `complete` carrying the execution trace. While the LLM is generating, each report section is pushed as an
+    `intelligence_section` event as soon as its heading closes. Failures are reported as an `error` event. Stage payloads use the
+    same projection paths as /analyze (e.g. `-data.videos[*].description`).
+    The admission slot is held until the stream ends; shed requests get
+    503/429 before any event is sent.
+    """
+    logger.info(
+        "Received streaming trend analysis request",
+        region=request.region_code,
+        category=request.category_id
+    )
+    
+    def project(key: str, result):
+        wrapped = {key: result}
+        if view == "lean":
+            wrapped = project_fields(wrapped, LEAN_VIEW_FIELDS)
+        return project_fields(wrapped, fields).get(key)
+    
+    async def event_stream():
+        status = "success"
+        try:
+            async for stage, result in run_pipeline(
+                region_code=request.region_code,
+                category_id=request.category_id,
+                max_results=request.max_results,
+                include_intelligence=request.include_intelligence,
+                refresh_mode=request.refresh_mode,
+                stream_sections=True,
+                timeout_ms=_timeout_ms(request, admission)
+            ):
+                if stage in ("governance", "intelligence_section"):
+                    yield _sse_event(stage, result)
+                elif stage == "degradation":
+                    status = "partial" if result["degraded"] else "success"
+                    yield _sse_event("degraded", result)
+                elif stage == "trace":
+                    yield _sse_event("complete", {"status": status, "governance": project("governance", result)})
+                else:
+                    yield _sse_event(stage, project(stage, result))
+        except PipelineValidationError as e:
+            yield _sse_event("error", {"error": "Validation failed", "details": e.errors})
+        except DeadlineExceeded as e:
+            yield _sse_event("error", {"error": "Deadline exceeded", "message": str(e)})
+        except Exception as e:
+            yield _sse_event("error", {"error": "Internal server error", "message": str(e)})
+    
+    admission = await _acquire_slot(x_priority_class, "api", _timeout_ms(request))
+    return AdmittedStreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        admission=admission
+    )
 
 @app.get("/governance/trace")
 async def get_execution_trace():
     """Get current execution trace for observability."""
     return governance_agent.get_execution_trace()
 
+@app.get("/governance/trace/export")
+async def export_trace(
+    request_id: Optional[str] = Query(None, description="Trace to export (the trace's requestId); all retained traces if omitted"),
+    format: str = Query("otlp", pattern="^(otlp|chrome)$")
+):
+    """
+    Export spans as an OTLP/JSON file or a Chrome trace (chrome://tracing, Perfetto).
+    """
+    spans = tracer.get_spans(request_id)
+    if request_id and not spans:
+        raise HTTPException(status_code=404, detail={"error": "Trace not found or evicted"})
+    body = to_otlp(spans) if format == "otlp" else to_chrome_trace(spans)
+    filename = f"trendops-{request_id or 'traces'}.{format}.json"
+    return FastJSONResponse(body, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+def _require_admin(request: Request):
+    if not is_admin(request.headers):
+        raise HTTPException(status_code=403, detail={"error": "Admin token required"})
+
+@app.get("/governance/profiles")
+async def list_profiles(request: Request):
+    """List stored request profiles (admin only)."""
+    _require_admin(request)
+    return {"enabled": config.PROFILING_ENABLED, "profiles": profile_store.list()}
+
+@app.get("/governance/profiles/{request_id}")
+async def get_profile(
+    request_id: str,
+    request: Request,
+    format: str = Query("table", pattern="^(table|collapsed)$")
+):
+    """
+    Get a stored request profile (admin only).
+    
+    format=table returns the per-function summary as JSON; format=collapsed
+    returns sampled stacks as text for flamegraph.pl or speedscope.
+    """
+    _require_admin(request)
+    profile = profile_store.get(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail={"error": "Profile not found or evicted"})
+    if format == "collapsed":
+        if "stacks" not in profile:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "Collapsed stacks are only recorded in sample mode"}
+            )
+        return PlainTextResponse(collapsed_stacks(profile))
+    return {key: value for key, value in profile.items() if key != "stacks"}
+
+@app.get("/governance/entity-store")
+async def get_entity_store_stats():
+    """Get memory statistics for the global video entity store."""
+    return entity_store.memory_stats()
+
+@app.get("/governance/startup")
+async def get_startup_report():
+    """Get cold-start timings (import, rehydration, lazy initialization) and warm-state status."""
+    return {
+        **startup.report(config.IMPORT_TIME_BUDGET_MS),
+        "warm_state": warm_state.stats()
+    }
+
+@app.get("/governance/tag-index")
+async def get_tag_index_stats():
+    """Get size and compaction statistics for the per-region tag co-occurrence index."""
+    return tag_index.stats()
+
+def _require_region(region_code: str) -> str:
+    region_code = region_code.upper()
+    if region_code not in config.VALID_REGIONS:
+        raise HTTPException(status_code=400, detail={"error": f"Invalid region code: {region_code}"})
+    return region_code
+
+# Tag queries are plain functions so compaction runs on the threadpool, not the event loop
+
+@app.get("/tags/{region_code}/related")
+def get_related_tags(
+    region_code: str,
+    tag: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Tags that most often appear on the same trending videos as `tag`."""
+    region_code = _require_region(region_code)
+    return {"region": region_code, "tag": tag, "related": tag_index.related(region_code, tag, limit)}
+
+@app.get("/tags/{region_code}/communities")
+def get_tag_communities(
+    region_code: str,
+    limit: int = Query(10, ge=1, le=100),
+    min_jaccard: float = Query(0.2, ge=0, le=1, description="Minimum tag overlap for two tags to link")
+):
+    """Groups of tags that travel together on trending videos."""
+    region_code = _require_region(region_code)
+    return {"region": region_code, "communities": tag_index.communities(region_code, limit, min_jaccard=min_jaccard)}
+
+@app.get("/tags/{region_code}/emerging")
+def get_emerging_tag_pairs(
+    region_code: str,
+    limit: int = Query(10, ge=1, le=100),
+    min_recent: float = Query(2.0, ge=0, description="Minimum recent (decayed) video count for a pair"),
+    min_lift: float = Query(1.5, ge=1, description="Minimum ratio of recent to expected weight")
+):
+    """Tag pairs whose recent frequency is well above their history."""
+    region_code = _require_region(region_code)
+    return {"region": region_code, "emerging": tag_index.emerging(region_code, limit, min_recent, min_lift)}
+
 @app.get("/config/regions")
 async def get_valid_regions():
     """Get list of valid region codes."""
@@ -180,7 +602,11 @@ async def get_valid_categories():
         "valid_categories": config.VALID_CATEGORIES
     }
 
+startup.finish_import(config.IMPORT_TIME_BUDGET_MS)
+
 if __name__ == "__main__":
+    import uvicorn
+    
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
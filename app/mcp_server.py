@@ -2,17 +2,163 @@
 Archestra MCP Server Entry Point
 
 This module exposes TrendOps agents as standardized MCP Tools.
-Archestra (or any MCP Client) can connect to this server via stdio/SSE to orchestrate the swarm.
+Archestra (or any MCP Client) can connect to this server via stdio, or over
+streamable HTTP at MCP_HTTP_PATH on the FastAPI app, where it shares caches,
+connection pools and the governance tracker with /analyze.
+
+run_pipeline runs the whole agent chain in one call, reporting progress as
+each stage completes. Large intermediate results (trending data, analytics,
+reports) stay in the server-side artifact store; tools return a compact
+handle plus a summary, and downstream tools take handles instead of the
+data itself.
 """
-from typing import Optional, List
-from mcp.server.fastmcp import FastMCP
+import json
+from typing import Any, Dict, Optional, List
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.transport_security import TransportSecuritySettings
 from app.agents.governance_agent import governance_agent
 from app.agents.data_agent import data_agent
 from app.agents.analytics_agent import analytics_agent
 from app.agents.intelligence_agent import intelligence_agent
+from app.pipeline import run_pipeline as run_agent_pipeline, PipelineValidationError
+from app.utils.artifact_store import artifact_store, Artifact
+from app.utils.config import config
+from app.utils.serialization import FastJSONResponse, project_fields
 
 # Initialize standard MCP Server
-mcp = FastMCP("TrendOps-Intelligence-Swarm")
+_LOCAL_HOSTS = ["127.0.0.1:*", "localhost:*", "[::1]:*"]
+mcp = FastMCP(
+    "TrendOps-Intelligence-Swarm",
+    streamable_http_path=config.MCP_HTTP_PATH,
+    stateless_http=config.MCP_STATELESS_HTTP,
+    transport_security=TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=_LOCAL_HOSTS + config.MCP_ALLOWED_HOSTS,
+        allowed_origins=[f"http://{host}" for host in _LOCAL_HOSTS + config.MCP_ALLOWED_HOSTS]
+    )
+)
+
+def _json(value: Any) -> str:
+    return FastJSONResponse.encode(value).decode()
+
+def _summarize_data(data: Dict) -> Dict:
+    videos = data.get("videos", [])
+    return {
+        **data.get("metadata", {}),
+        "top_videos": [
+            {"videoId": v.get("videoId"), "title": v.get("title"), "viewCount": v.get("viewCount")}
+            for v in videos[:5]
+        ]
+    }
+
+def _summarize_analytics(analytics: Dict) -> Dict:
+    return {
+        "topThemes": [
+            {key: theme.get(key) for key in ("theme", "video_count", "avg_engagement")}
+            for theme in analytics.get("topThemes", [])
+        ],
+        "topKeywords": [k.get("keyword") for k in analytics.get("topKeywords", [])],
+        "anomaly_count": len(analytics.get("anomalies", [])),
+        "engagementInsights": analytics.get("engagementInsights"),
+        "metrics": analytics.get("metrics", {})
+    }
+
+def _handle_response(artifact: Artifact, summary: Dict) -> str:
+    return _json({**artifact.describe(), "summary": summary})
+
+def _resolve(handle: Optional[str], data_json: Optional[str], kind: str, name: str) -> Dict:
+    """Resolve a handle from the artifact store, falling back to an inline JSON payload."""
+    if handle:
+        return artifact_store.get(handle, kind=kind).value
+    if data_json:
+        return json.loads(data_json)
+    raise ValueError(f"Provide {name}_handle (preferred) or {name}_json")
+
+async def _report_progress(ctx: Context, progress: float, total: float, message: str):
+    try:
+        await ctx.report_progress(progress, total, message)
+    except ValueError:
+        # Called outside an MCP request (e.g. in-process); nobody to notify
+        pass
+
+# Stages run_pipeline can return in full; the rest are summarized
+PIPELINE_OUTPUTS = ("data", "analytics", "intelligence", "trace")
+
+@mcp.tool()
+async def run_pipeline(
+    region_code: str,
+    ctx: Context,
+    category_id: Optional[str] = None,
+    max_results: int = 25,
+    refresh_mode: str = "full",
+    include_intelligence: bool = True,
+    include: str = "analytics,intelligence,trace",
+    timeout_ms: Optional[int] = None
+) -> str:
+    """
+    PIPELINE: Run governance -> data -> analytics -> intelligence in one call.
+    Sends a progress notification as each stage completes.
+    include_intelligence=false skips the LLM report. include lists the
+    stage outputs to return in full (any of data, analytics, intelligence,
+    trace); other stages are summarized. Every stage output is also stored
+    as an artifact, and the handles are returned for get_artifact.
+    timeout_ms sets a latency budget; stages cut short to meet it are listed
+    under "degraded" and status becomes "partial".
+    """
+    outputs = {stage.strip() for stage in include.split(",") if stage.strip()}
+    unknown = outputs - set(PIPELINE_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown include stages: {sorted(unknown)}; valid: {list(PIPELINE_OUTPUTS)}")
+
+    total = 5 if include_intelligence else 4
+    results: Dict[str, Any] = {}
+    handles: Dict[str, str] = {}
+    step = 0
+    try:
+        async for stage, result in run_agent_pipeline(
+            region_code=region_code,
+            category_id=category_id,
+            max_results=max_results,
+            include_intelligence=include_intelligence,
+            refresh_mode=refresh_mode,
+            timeout_ms=timeout_ms
+        ):
+            results[stage] = result
+            if stage == "degradation":
+                continue
+            step += 1
+            if stage == "data":
+                handles["data"] = artifact_store.put("trending_data", result).handle
+            elif stage == "analytics":
+                handles["analytics"] = artifact_store.put(
+                    "analytics", result, parents={"trending_data": handles["data"]}
+                ).handle
+            elif stage == "intelligence" and result is not None:
+                handles["intelligence"] = artifact_store.put(
+                    "report", result, parents={"analytics": handles["analytics"], "trending_data": handles["data"]}
+                ).handle
+            await _report_progress(ctx, step, total, f"{stage} complete")
+    except PipelineValidationError as e:
+        raise ValueError(f"Validation failed: {'; '.join(e.errors)}")
+
+    degraded = results.get("degradation")
+    response = {
+        "status": "partial" if degraded and degraded["degraded"] else "success",
+        "requestId": results["trace"].get("requestId"),
+        "handles": handles
+    }
+    if degraded:
+        response["degraded"] = degraded
+    summaries = {
+        "data": _summarize_data,
+        "analytics": _summarize_analytics,
+        "intelligence": lambda report: report and {key: value for key, value in report.items() if key != "fullReport"},
+        "trace": lambda trace: {"requestId": trace.get("requestId"), "sessionStats": trace.get("sessionStats")}
+    }
+    for stage in PIPELINE_OUTPUTS:
+        if stage in results:
+            response[stage] = results[stage] if stage in outputs else summaries[stage](results[stage])
+    return _json(response)
 
 @mcp.tool()
 async def validate_request(region_code: str, category_id: Optional[str] = None, max_results: int = 25) -> str:
@@ -21,39 +167,73 @@ async def validate_request(region_code: str, category_id: Optional[str] = None,
     Returns JSON string with validation status.
     """
     result = governance_agent.validate_request(region_code, category_id, max_results)
-    return str(result)
+    return _json(result)
 
 @mcp.tool()
-async def fetch_trending_data(region_code: str, category_id: Optional[str] = None, max_results: int = 25) -> str:
+async def fetch_trending_data(region_code: str, category_id: Optional[str] = None, max_results: int = 25, refresh_mode: str = "full") -> str:
     """
     DATA: Fetch raw trending video data from YouTube API.
-    Returns JSON string with video metadata.
+    Use refresh_mode="delta" to refetch only statistics for already-cached videos.
+    Returns a JSON handle ("trending_data:...") with a summary; pass the handle
+    to analyze_trends or read the full data with get_artifact.
     """
-    result = await data_agent.fetch_trending_data(region_code, category_id, max_results)
-    return str(result)
+    result = await data_agent.fetch_trending_data(region_code, category_id, max_results, refresh_mode)
+    artifact = artifact_store.put("trending_data", result)
+    return _handle_response(artifact, _summarize_data(result))
 
 @mcp.tool()
-def analyze_trends(data_json: str) -> str:
+async def analyze_trends(data_handle: Optional[str] = None, data_json: Optional[str] = None) -> str:
     """
     ANALYTICS: Perform clustering and engagement scoring on raw data.
-    Takes JSON string of video data. Returns analysis results.
+    Takes a trending_data handle from fetch_trending_data (or, for
+    compatibility, the data as a JSON string). Returns a JSON "analytics:..."
+    handle with a summary of themes, keywords and anomalies.
     """
-    import json
-    data = json.loads(data_json)
-    result = analytics_agent.analyze_trending_data(data)
-    return str(result)
+    data = _resolve(data_handle, data_json, "trending_data", "data")
+    result = await analytics_agent.analyze_trending_data(data)
+    parents = {"trending_data": data_handle} if data_handle else None
+    artifact = artifact_store.put("analytics", result, parents=parents)
+    return _handle_response(artifact, _summarize_analytics(result))
 
 @mcp.tool()
-async def generate_intelligence(analytics_json: str, raw_data_json: str) -> str:
+async def generate_intelligence(
+    analytics_handle: Optional[str] = None,
+    raw_data_handle: Optional[str] = None,
+    analytics_json: Optional[str] = None,
+    raw_data_json: Optional[str] = None
+) -> str:
     """
     INTELLIGENCE: Generate executive strategy report using LLM.
-    Takes JSON strings of analytics and raw data. Returns intelligence report.
+    Takes an analytics handle from analyze_trends; the trending data it was
+    derived from is found automatically unless raw_data_handle is given.
+    JSON strings are still accepted for compatibility. Returns the report
+    sections (without the full text) and a "report:..." handle.
     """
-    import json
-    analytics = json.loads(analytics_json)
-    raw = json.loads(raw_data_json)
+    analytics = _resolve(analytics_handle, analytics_json, "analytics", "analytics")
+    if not raw_data_handle and not raw_data_json and analytics_handle:
+        raw_data_handle = artifact_store.get(analytics_handle).parents.get("trending_data")
+    raw = _resolve(raw_data_handle, raw_data_json, "trending_data", "raw_data")
     result = await intelligence_agent.generate_intelligence_report(analytics, raw)
-    return str(result)
+    parents = {role: handle for role, handle in (("analytics", analytics_handle), ("trending_data", raw_data_handle)) if handle}
+    artifact = artifact_store.put("report", result, parents=parents)
+    return _handle_response(artifact, {key: value for key, value in result.items() if key != "fullReport"})
+
+@mcp.tool()
+def get_artifact(handle: str, fields: Optional[str] = None) -> str:
+    """
+    ARTIFACTS: Read a stored artifact as JSON.
+    fields is an optional projection, e.g. "videos[*].title,videos[*].viewCount"
+    or "-videos[*].description", to fetch only what is needed.
+    """
+    artifact = artifact_store.get(handle)
+    return _json({**artifact.describe(), "value": project_fields(artifact.value, fields)})
+
+@mcp.tool()
+def release_artifact(handle: str) -> str:
+    """
+    ARTIFACTS: Drop a stored artifact before its TTL expires.
+    """
+    return _json({"handle": handle, "released": artifact_store.delete(handle)})
 
 if __name__ == "__main__":
     # Start the MCP server for Archestra orchestration
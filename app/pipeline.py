@@ -0,0 +1,223 @@
+"""
+TrendOps pipeline orchestration.
+Runs the governance -> data -> analytics -> intelligence agent chain and yields each stage as it completes.
+Multi-region requests share batched intelligence calls via run_batch_pipeline.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.agents.data_agent import data_agent
+from app.agents.analytics_agent import analytics_agent
+from app.agents.intelligence_agent import intelligence_agent
+from app.agents.governance_agent import governance_agent
+from app.utils.cost_tracker import tracker
+from app.utils.tracing import tracer
+from app.utils.stage_graph import Stage, StageGraph
+from app.utils.deadline import start_deadline
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class PipelineValidationError(Exception):
+    """Raised when GovernanceAgent rejects the request parameters."""
+
+    def __init__(self, errors: list):
+        super().__init__("Validation failed")
+        self.errors = errors
+
+async def _fetch_stage(params: Dict, refresh_mode: str) -> Dict:
+    return await data_agent.fetch_trending_data(
+        region_code=params["region_code"],
+        category_id=params["category_id"],
+        max_results=params["max_results"],
+        refresh_mode=refresh_mode
+    )
+
+async def _analytics_stage(data: Dict) -> Dict:
+    return await analytics_agent.analyze_trending_data(data)
+
+async def _intelligence_stage(analytics: Dict, data: Dict, emit) -> Dict:
+    report = None
+    async for event, payload in intelligence_agent.stream_intelligence_report(
+        analytics_data=analytics,
+        raw_data=data
+    ):
+        if event == "report":
+            report = payload
+        else:
+            emit("intelligence_section", payload)
+    return report
+
+# Stages after validation; outputs are named after the stages yielded by run_pipeline
+PIPELINE_GRAPH = StageGraph("pipeline", [
+    Stage("data", _fetch_stage, inputs=("params", "refresh_mode"), outputs=("data",)),
+    Stage("analytics", _analytics_stage, inputs=("data",), outputs=("analytics",)),
+    Stage("intelligence", _intelligence_stage, inputs=("analytics", "data"), outputs=("intelligence",), emits=True)
+])
+
+async def run_pipeline(
+    region_code: str = "US",
+    category_id: Optional[str] = None,
+    max_results: int = 25,
+    include_intelligence: bool = True,
+    refresh_mode: str = "full",
+    stream_sections: bool = False,
+    timeout_ms: Optional[int] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run the agent chain, yielding (stage, result) as each stage completes.
+
+    Stages, in order:
+    - "governance": validation result with sanitized params
+    - "data": raw video data from DataAgent
+    - "analytics": results from AnalyticsAgent
+    - "intelligence_section": one per report section as the LLM produces it
+      (only if stream_sections is set)
+    - "intelligence": report from IntelligenceAgent (only if requested;
+      None if skipped to meet the deadline)
+    - "degradation": deadline summary listing degraded stages (only if
+      timeout_ms is set)
+    - "trace": execution trace from GovernanceAgent
+
+    timeout_ms is a latency budget shared by all agents: the fetch may fall
+    back to a cached snapshot, clustering may stop early and the
+    intelligence report may be truncated or skipped.
+
+    Raises:
+        PipelineValidationError: If validation fails
+        DeadlineExceeded: If data could not be fetched in time and nothing is cached
+    """
+    tracker.begin_request()
+    deadline = start_deadline(timeout_ms)
+    try:
+        with tracer.span("pipeline", region=region_code, include_intelligence=include_intelligence, refresh_mode=refresh_mode):
+            # STEP 1: Governance - Validate Request
+            validation = governance_agent.validate_request(
+                region_code=region_code,
+                category_id=category_id,
+                max_results=max_results
+            )
+
+            if not validation["valid"]:
+                raise PipelineValidationError(validation["errors"])
+
+            yield "governance", validation
+            params = validation["sanitized_params"]
+
+            # STEPS 2-4: Data -> Analytics -> Intelligence (optional) as a stage graph
+            outputs = ["analytics", "intelligence"] if include_intelligence else ["analytics"]
+            async for event, payload in PIPELINE_GRAPH.iterate(
+                {"params": params, "refresh_mode": refresh_mode},
+                outputs=outputs
+            ):
+                if event == "stage":
+                    stage, produced, _ = payload
+                    yield stage, produced[stage]
+                elif stream_sections:
+                    yield event, payload
+
+            if deadline is not None:
+                yield "degradation", deadline.summary()
+
+            # STEP 5: Governance - Get Execution Trace
+            execution_trace = governance_agent.get_execution_trace()
+            governance_agent.log_final_metrics(success=True)
+            yield "trace", execution_trace
+
+    except PipelineValidationError:
+        governance_agent.log_final_metrics(success=False, error="Validation failed")
+        raise
+    except Exception as e:
+        logger.error("Trend analysis failed", error=str(e))
+        governance_agent.log_final_metrics(success=False, error=str(e))
+        raise
+
+async def run_batch_pipeline(
+    regions: List[str],
+    category_id: Optional[str] = None,
+    max_results: int = 25,
+    include_intelligence: bool = True,
+    refresh_mode: str = "full",
+    timeout_ms: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run the agent chain for several regions, sharing LLM calls.
+
+    Every region is validated up front, data is fetched concurrently and
+    intelligence reports are generated with
+    IntelligenceAgent.generate_batch_intelligence_reports, which packs
+    several regions into each prompt.
+
+    timeout_ms applies a shared deadline as in run_pipeline.
+
+    Returns:
+        {"results": {region: {"data", "analytics", "intelligence"}}, "trace": execution trace,
+         "degradation": deadline summary or None}
+
+    Raises:
+        PipelineValidationError: If any region fails validation
+        DeadlineExceeded: If a region could not be fetched in time and nothing is cached
+    """
+    tracker.begin_request()
+    deadline = start_deadline(timeout_ms)
+    try:
+        with tracer.span("pipeline.batch", regions=list(regions), include_intelligence=include_intelligence, refresh_mode=refresh_mode):
+            # STEP 1: Governance - Validate every region before spending quota
+            params_list, errors = [], []
+            for region_code in regions:
+                validation = governance_agent.validate_request(
+                    region_code=region_code,
+                    category_id=category_id,
+                    max_results=max_results
+                )
+                if validation["valid"]:
+                    params_list.append(validation["sanitized_params"])
+                else:
+                    errors.extend(f"{region_code}: {error}" for error in validation["errors"])
+
+            if errors:
+                raise PipelineValidationError(errors)
+
+            # STEP 2: Data Agent - Fetch all regions concurrently
+            raw_results = await asyncio.gather(*(
+                data_agent.fetch_trending_data(
+                    region_code=params["region_code"],
+                    category_id=params["category_id"],
+                    max_results=params["max_results"],
+                    refresh_mode=refresh_mode
+                )
+                for params in params_list
+            ))
+
+            # STEP 3: Analytics Agent - Process all regions concurrently
+            analytics_results = await asyncio.gather(*(
+                analytics_agent.analyze_trending_data(raw_data) for raw_data in raw_results
+            ))
+
+            # STEP 4: Intelligence Agent - One batched pass over all regions (Optional)
+            reports = [None] * len(params_list)
+            if include_intelligence:
+                reports = await intelligence_agent.generate_batch_intelligence_reports(
+                    list(zip(analytics_results, raw_results))
+                )
+
+            results = {
+                params["region_code"]: {"data": raw_data, "analytics": analytics, "intelligence": report}
+                for params, raw_data, analytics, report in zip(params_list, raw_results, analytics_results, reports)
+            }
+
+            # STEP 5: Governance - Get Execution Trace
+            execution_trace = governance_agent.get_execution_trace()
+            governance_agent.log_final_metrics(success=True)
+            return {
+                "results": results,
+                "trace": execution_trace,
+                "degradation": deadline.summary() if deadline is not None else None
+            }
+
+    except PipelineValidationError:
+        governance_agent.log_final_metrics(success=False, error="Validation failed")
+        raise
+    except Exception as e:
+        logger.error("Batch trend analysis failed", error=str(e), regions=regions)
+        governance_agent.log_final_metrics(success=False, error=str(e))
+        raise
@@ -3,10 +3,17 @@ Clustering and theme extraction tool for TrendOps.
 Uses NLP techniques to identify trending themes.
 Architected for high-performance with zero heavy-weight dependencies like scikit-learn.
 """
-from typing import List, Dict
-from collections import Counter
+from typing import List, Dict, Optional, Tuple
+from collections import Counter, OrderedDict
+import copy
+import hashlib
 import re
 import math
+import threading
+from app.utils.config import config
+from app.utils.deadline import current_deadline
+from app.utils.tracing import traced, current_span
+from app.utils.warm_state import warm_state
 
 class ClusteringTool:
     """
@@ -23,7 +30,11 @@ class ClusteringTool:
             'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
             'video', 'official', 'music', 'new', 'latest', 'shorts', 'youtube'
         }
+        # Themes by input hash; K-Means is deterministic, and charts often repeat between fetches
+        self._theme_cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
+    @traced("clustering.extract_keywords")
     def extract_keywords(self, texts: List[str], top_n: int = 20) -> List[Dict]:
         """Extract top keywords from text corpus using frequency."""
         all_words = []
@@ -39,14 +50,69 @@ class ClusteringTool:
         words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
         return [w for w in words if w not in self.stop_words]
 
-    def cluster_themes(self, texts: List[str], n_clusters: int = 5) -> List[Dict]:
+    @traced("clustering.cluster_themes")
+    def cluster_themes(
+        self,
+        texts: List[str],
+        n_clusters: int = 5,
+        weights: Optional[List[float]] = None
+    ) -> List[Dict]:
         """
         Cluster texts into themes using a custom TF-IDF + K-Means implementation.
         Preserves the project's analytical power while staying lightweight.
+
+        When texts are deduplicated groups, `weights` carries each group's size:
+        centroids become weighted means and themes report `weighted_count`.
+
+        Under a request deadline, K-Means stops after the current iteration
+        once the deadline has passed (at least one iteration always runs).
+
+        Completed results are memoized by input (CLUSTER_CACHE_MAX_ENTRIES)
+        and persisted with the warm state.
         """
         if not texts:
             return []
         
+        key = self._cache_key(texts, n_clusters, weights)
+        with self._cache_lock:
+            cached = self._theme_cache.get(key)
+            if cached is not None:
+                self._theme_cache.move_to_end(key)
+        span = current_span()
+        if span is not None:
+            span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        themes, complete = self._cluster(texts, n_clusters, weights)
+        if complete and config.CLUSTER_CACHE_MAX_ENTRIES > 0:
+            with self._cache_lock:
+                self._theme_cache[key] = copy.deepcopy(themes)
+                while len(self._theme_cache) > config.CLUSTER_CACHE_MAX_ENTRIES:
+                    self._theme_cache.popitem(last=False)
+            warm_state.mark_dirty()
+        return themes
+    
+    @staticmethod
+    def _cache_key(texts: List[str], n_clusters: int, weights: Optional[List[float]]) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{n_clusters}|{weights}|".encode("utf-8"))
+        for text in texts:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+    
+    def _cluster(
+        self,
+        texts: List[str],
+        n_clusters: int,
+        weights: Optional[List[float]]
+    ) -> Tuple[List[Dict], bool]:
+        """TF-IDF + K-Means; returns (themes, complete) where complete is False if cut short by the deadline."""
+        complete = True
+        if weights is None:
+            weights = [1] * len(texts)
+        
         if len(texts) < n_clusters:
             n_clusters = max(1, len(texts))
 
@@ -54,7 +120,7 @@ class ClusteringTool:
         tokens_list = [self._tokenize(t) for t in texts]
         vocabulary = list(set([word for tokens in tokens_list for word in tokens]))
         if not vocabulary:
-            return [{"theme_id": 0, "keywords": ["general"], "video_count": len(texts), "representative_term": "general"}]
+            return [{"theme_id": 0, "keywords": ["general"], "video_count": len(texts), "weighted_count": sum(weights), "representative_term": "general"}], complete
 
         word_to_idx = {word: i for i, word in enumerate(vocabulary)}
         idf = {}
@@ -77,8 +143,13 @@ class ClusteringTool:
         # Initialize centroids randomly (first n_clusters docs)
         centroids = vectors[:n_clusters]
         labels = [0] * n_docs
+        deadline = current_deadline()
         
-        for _ in range(5): # 5 iterations is enough for small YouTube sets
+        for iteration in range(5): # 5 iterations is enough for small YouTube sets
+            if iteration and deadline is not None and deadline.expired():
+                deadline.degrade("analytics", "kmeans_cut_short", iterations=iteration)
+                complete = False
+                break
             # Assignment
             new_labels = []
             for v in vectors:
@@ -95,9 +166,11 @@ class ClusteringTool:
 
             # Update centroids
             for i in range(n_clusters):
-                cluster_points = [vectors[j] for j, l in enumerate(labels) if l == i]
-                if cluster_points:
-                    new_centroid = [sum(dim) / len(cluster_points) for dim in zip(*cluster_points)]
+                members = [j for j, l in enumerate(labels) if l == i]
+                if members:
+                    total_weight = sum(weights[j] for j in members)
+                    cluster_points = [[x * weights[j] for x in vectors[j]] for j in members]
+                    new_centroid = [sum(dim) / total_weight for dim in zip(*cluster_points)]
                     centroids[i] = new_centroid
 
         # 3. Extract Themes
@@ -118,10 +191,31 @@ class ClusteringTool:
                 "theme_id": i,
                 "keywords": top_terms,
                 "video_count": len(cluster_indices),
+                "weighted_count": sum(weights[idx] for idx in cluster_indices),
                 "representative_term": top_terms[0]
             })
 
         themes.sort(key=lambda x: x["video_count"], reverse=True)
-        return themes
+        return themes, complete
+    
+    def export_state(self) -> List:
+        """Memoized themes for warm-state persistence, least recently used first."""
+        with self._cache_lock:
+            return [[key, themes] for key, themes in self._theme_cache.items()]
+    
+    def import_state(self, entries: List) -> int:
+        """Restore memoized themes saved by export_state. Returns the number restored."""
+        restored = 0
+        with self._cache_lock:
+            # Newest first, each placed ahead of the last, so restored entries stay less recent than live ones
+            for key, themes in reversed(entries):
+                if len(self._theme_cache) >= config.CLUSTER_CACHE_MAX_ENTRIES:
+                    break
+                if key not in self._theme_cache:
+                    self._theme_cache[key] = themes
+                    self._theme_cache.move_to_end(key, last=False)
+                    restored += 1
+        return restored
 
 clustering_tool = ClusteringTool()
+warm_state.register("clustering", clustering_tool.export_state, clustering_tool.import_state)
@@ -0,0 +1,214 @@
+"""
+Near-duplicate detection tool for TrendOps.
+Groups re-uploads and cross-region copies of the same clip using MinHash + LSH.
+"""
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+from functools import lru_cache
+import hashlib
+import re
+from app.utils.config import config
+from app.utils.tracing import traced
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Mersenne prime used for the universal hash family (a * x + b) mod p
+_MERSENNE_PRIME = (1 << 31) - 1
+
+# Banding trades missed pairs against extra candidates; candidates are re-checked
+# on the full signature, so a missed near-duplicate costs far more than a false candidate
+_FALSE_POSITIVE_WEIGHT = 0.1
+_FALSE_NEGATIVE_WEIGHT = 0.9
+_INTEGRATION_STEPS = 100
+
+def _integrate(f, lower: float, upper: float) -> float:
+    """Midpoint-rule integral of f over [lower, upper]."""
+    step = (upper - lower) / _INTEGRATION_STEPS
+    return sum(f(lower + (i + 0.5) * step) for i in range(_INTEGRATION_STEPS)) * step
+
+@lru_cache(maxsize=32)
+def _band_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) for LSH over num_perm-value signatures.
+
+    A pair with Jaccard similarity s becomes a candidate with probability
+    1 - (1 - s^rows)^bands. The choice minimizes the weighted area of
+    false positives (candidates below the threshold) plus false negatives
+    (missed pairs above it), with misses weighted heavily.
+    """
+    best, best_error = (num_perm, 1), float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        false_positive = _integrate(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+        false_negative = _integrate(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+        error = _FALSE_POSITIVE_WEIGHT * false_positive + _FALSE_NEGATIVE_WEIGHT * false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+class UnionFind:
+    """Disjoint-set forest used to merge LSH candidate pairs into groups."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+class DedupTool:
+    """
+    MCP tool for near-duplicate grouping of trending videos.
+
+    Each video gets a MinHash signature over its title, description and tags.
+    Signatures are split into LSH bands so candidate pairs are found by bucket
+    collisions instead of comparing every pair of videos.
+    """
+
+    def __init__(self, num_perm: int = None, threshold: float = None, seed: int = 42):
+        self.num_perm = num_perm or config.DEDUP_NUM_PERM
+        self.threshold = threshold if threshold is not None else config.DEDUP_SIMILARITY_THRESHOLD
+
+        self.seed = seed
+        self._a = None
+        self._b = None
+
+    def _permutations(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Hash family coefficients, drawn on first use so NumPy is only imported when needed."""
+        if self._a is None:
+            import numpy as np
+
+            # Fixed seed keeps signatures comparable across processes and restarts
+            rng = np.random.default_rng(self.seed)
+            self._a = rng.integers(1, _MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+            self._b = rng.integers(0, _MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+        return self._a, self._b
+
+    def _shingles(self, video: Dict) -> set:
+        """Build the feature set for a video: words, title bigrams and tags."""
+        title_words = re.findall(r'\w+', (video.get("title") or "").lower())
+        description_words = re.findall(r'\w+', (video.get("description") or "").lower())
+
+        shingles = set(title_words)
+        shingles.update(f"{a} {b}" for a, b in zip(title_words, title_words[1:]))
+        shingles.update(w for w in description_words if len(w) > 2)
+        shingles.update(f"#{tag.lower()}" for tag in video.get("tags") or [])
+        return shingles
+
+    def signature(self, video: Dict) -> "np.ndarray":
+        """
+        Compute the MinHash signature of a video.
+
+        Args:
+            video: Video dict with title, description and tags
+
+        Returns:
+            Array of num_perm minimum hash values
+        """
+        import numpy as np
+
+        shingles = self._shingles(video)
+        if not shingles:
+            return np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+
+        # Stable 32-bit hashes (Python's hash() is salted per process)
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                for s in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles)
+        ) % _MERSENNE_PRIME
+
+        a, b = self._permutations()
+        permuted = (np.outer(a, hashes) + b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def group_near_duplicates(
+        self,
+        videos: List[Dict],
+        threshold: Optional[float] = None
+    ) -> List[List[int]]:
+        """
+        Group near-duplicate videos.
+
+        Args:
+            videos: List of video dicts
+            threshold: Estimated Jaccard similarity required to merge two videos
+
+        Returns:
+            List of groups, each a list of indices into videos (singletons included)
+        """
+        threshold = self.threshold if threshold is None else threshold
+        n = len(videos)
+        if n < 2:
+            return [[i] for i in range(n)]
+
+        import numpy as np
+
+        signatures = np.vstack([self.signature(v) for v in videos])
+        bands, rows = _band_params(self.num_perm, threshold)
+
+        # LSH: videos sharing any band bucket become candidate pairs
+        groups = UnionFind(n)
+        for band in range(bands):
+            buckets: Dict[bytes, List[int]] = {}
+            band_slice = signatures[:, band * rows:(band + 1) * rows]
+            for idx in range(n):
+                buckets.setdefault(band_slice[idx].tobytes(), []).append(idx)
+
+            for members in buckets.values():
+                first = members[0]
+                for other in members[1:]:
+                    if groups.find(first) == groups.find(other):
+                        continue
+                    # Verify candidates against the full signature to drop band collisions
+                    similarity = float(np.mean(signatures[first] == signatures[other]))
+                    if similarity >= threshold:
+                        groups.union(first, other)
+
+        grouped: Dict[int, List[int]] = {}
+        for idx in range(n):
+            grouped.setdefault(groups.find(idx), []).append(idx)
+        return list(grouped.values())
+
+    @traced("dedup.deduplicate")
+    def deduplicate(self, videos: List[Dict], threshold: Optional[float] = None) -> List[Dict]:
+        """
+        Collapse near-duplicate groups to one representative video each.
+
+        The representative is the most-viewed member. It carries
+        `duplicate_count` (group size, used as a weight downstream) and
+        `duplicate_ids` (videoIds of the other members).
+
+        Args:
+            videos: List of video dicts
+            threshold: Optional override for the similarity threshold
+
+        Returns:
+            Representative videos in original order
+        """
+        representatives = []
+        for members in self.group_near_duplicates(videos, threshold):
+            best = max(members, key=lambda i: videos[i].get("viewCount", 0))
+            representative = videos[best].copy()
+            representative["duplicate_count"] = len(members)
+            representative["duplicate_ids"] = [
+                videos[i].get("videoId") for i in members if i != best
+            ]
+            representatives.append((min(members), representative))
+
+        representatives.sort(key=lambda item: item[0])
+        return [video for _, video in representatives]
+
+dedup_tool = DedupTool()
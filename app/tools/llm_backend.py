@@ -0,0 +1,269 @@
+"""
+LLM backends for TrendOps.
+A small generation interface with a Gemini implementation and a local deterministic stub.
+"""
+import asyncio
+import hashlib
+import math
+import random
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Optional
+from app.utils.config import config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+@dataclass
+class LLMResponse:
+    """Completed generation. Token counts are None when the backend does not report them."""
+    text: str
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+class LLMStream:
+    """
+    Async iterator over generated text chunks.
+
+    After iteration finishes, `response` holds the full text and any token
+    usage the backend reported.
+    """
+
+    def __init__(self, produce: Callable[["LLMStream"], AsyncIterator[str]]):
+        self.response = LLMResponse(text="")
+        self._produce = produce
+
+    async def __aiter__(self):
+        chunks = []
+        async for text in self._produce(self):
+            chunks.append(text)
+            yield text
+        self.response.text = "".join(chunks)
+
+class LLMBackend:
+    """Interface every LLM backend implements."""
+
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    async def generate(self, prompt: str, max_output_tokens: int, temperature: float = 0.7) -> LLMResponse:
+        """Generate a complete response."""
+        raise NotImplementedError
+
+    def stream(self, prompt: str, max_output_tokens: int, temperature: float = 0.7) -> LLMStream:
+        """Generate a response as a stream of text chunks."""
+        raise NotImplementedError
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via google-generativeai. The SDK is configured on first use."""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = None, api_key: str = None):
+        super().__init__(model_name or config.LLM_MODEL)
+        self.api_key = api_key or config.GOOGLE_API_KEY
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    @staticmethod
+    def _usage(response, result: LLMResponse):
+        """Copy usage metadata (when Gemini reports it) onto the result."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            result.input_tokens = getattr(usage, "prompt_token_count", None) or None
+            result.output_tokens = getattr(usage, "candidates_token_count", None) or None
+
+    async def generate(self, prompt: str, max_output_tokens: int, temperature: float = 0.7) -> LLMResponse:
+        response = await self._get_model().generate_content_async(
+            prompt,
+            generation_config={
+                'temperature': temperature,
+                'max_output_tokens': max_output_tokens,
+            }
+        )
+        result = LLMResponse(text=response.text)
+        self._usage(response, result)
+        return result
+
+    def stream(self, prompt: str, max_output_tokens: int, temperature: float = 0.7) -> LLMStream:
+        async def produce(stream: LLMStream):
+            response = await self._get_model().generate_content_async(
+                prompt,
+                generation_config={
+                    'temperature': temperature,
+                    'max_output_tokens': max_output_tokens,
+                },
+                stream=True
+            )
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. safety metadata only)
+                    continue
+                yield text
+            self._usage(response, stream.response)
+
+        return LLMStream(produce)
+
+class StubBackend(LLMBackend):
+    """
+    Offline stand-in that writes section-structured reports without network access.
+
+    Report text is a deterministic function of the prompt: section headings
+    and list lengths are read from the prompt's own template, and the
+    themes and keywords in its data block are woven into the prose. Batch
+    prompts ("### DATASET n") get one "# REPORT n" block per dataset.
+    Latency follows a configurable distribution drawn from a seeded RNG,
+    with LLM_STUB_FIRST_TOKEN_FRACTION of it spent before the first chunk.
+    """
+
+    name = "stub"
+
+    _HEADING = re.compile(r"^##\s+(.+?)\s*$", re.MULTILINE)
+    _DATASET = re.compile(r"^### DATASET (\d+)\s*$", re.MULTILINE)
+    _THEME = re.compile(r"^- (.+?): (\d+) videos, engagement ([\d.]+)", re.MULTILINE)
+    _KEYWORD = re.compile(r"^- (\S+) \((\d+) occurrences\)", re.MULTILINE)
+    _REGION = re.compile(r"^REGION: (\S+)", re.MULTILINE)
+    _PROSE = [
+        "Trending content in {region} is led by {lead}, with {rest} close behind. "
+        "Interest in {keyword} is rising and engagement remains concentrated in a few themes.",
+        "Audiences in {region} are clustering around {lead} while {keyword} spreads across {rest}. "
+        "Short, repeatable formats are outperforming one-off uploads.",
+        "Brands and creators in {region} should treat {lead} as an established demand signal. "
+        "Early positioning around {keyword} offers the clearest upside before the theme saturates.",
+    ]
+
+    def __init__(
+        self,
+        model_name: str = "trendops-stub",
+        latency_ms: float = None,
+        jitter_ms: float = None,
+        distribution: str = None,
+        seed: int = None
+    ):
+        super().__init__(model_name)
+        self.latency_ms = config.LLM_STUB_LATENCY_MS if latency_ms is None else latency_ms
+        self.jitter_ms = config.LLM_STUB_JITTER_MS if jitter_ms is None else jitter_ms
+        self.distribution = distribution or config.LLM_STUB_LATENCY_DISTRIBUTION
+        self._rng = random.Random(config.LLM_STUB_SEED if seed is None else seed)
+
+    def sample_latency_ms(self) -> float:
+        """Draw one call latency from the configured distribution."""
+        mean, jitter = self.latency_ms, self.jitter_ms
+        if self.distribution == "fixed" or jitter <= 0:
+            value = mean
+        elif self.distribution == "uniform":
+            value = self._rng.uniform(mean - jitter, mean + jitter)
+        elif self.distribution == "normal":
+            value = self._rng.gauss(mean, jitter)
+        elif self.distribution == "lognormal":
+            # Parameterized so the distribution's mean and std match latency/jitter
+            variance = jitter ** 2
+            sigma2 = math.log(1 + variance / (mean ** 2)) if mean > 0 else 0.0
+            mu = math.log(mean) - sigma2 / 2 if mean > 0 else 0.0
+            value = self._rng.lognormvariate(mu, math.sqrt(sigma2))
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+        return max(0.0, value)
+
+    def _report(self, context: str, headings: List[str], list_lengths: List[int], rng: random.Random) -> str:
+        region = (self._REGION.search(context) or [None, "the region"])[1]
+        themes = [name for name, _, _ in self._THEME.findall(context)] or ["creator content"]
+        keywords = [kw for kw, _ in self._KEYWORD.findall(context)] or ["trending"]
+
+        lines = []
+        for index, (heading, list_length) in enumerate(zip(headings, list_lengths)):
+            lines.append(f"## {heading}")
+            if list_length:
+                for n in range(1, list_length + 1):
+                    theme = themes[(n - 1) % len(themes)]
+                    keyword = keywords[rng.randrange(len(keywords))]
+                    lines.append(f"{n}. {theme.title()} {keyword.title()}: A {keyword}-focused offering built around {theme} audiences in {region}.")
+            else:
+                template = self._PROSE[index % len(self._PROSE)]
+                lines.append(template.format(
+                    region=region,
+                    lead=themes[0],
+                    rest=", ".join(themes[1:3]) or themes[0],
+                    keyword=keywords[rng.randrange(len(keywords))]
+                ))
+            lines.append("")
+        return "\n".join(lines)
+
+    def _render(self, prompt: str) -> str:
+        rng = random.Random(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest())
+
+        # Headings and list lengths come from the template that follows the data
+        template_start = prompt.rfind("structured report")
+        template = prompt[template_start:] if template_start >= 0 else prompt
+        matches = list(self._HEADING.finditer(template))
+        headings, list_lengths = [], []
+        for match, next_match in zip(matches, matches[1:] + [None]):
+            body = template[match.end():next_match.start() if next_match else len(template)]
+            headings.append(match.group(1))
+            list_lengths.append(len(re.findall(r"^\d+\.", body, re.MULTILINE)))
+
+        datasets = list(self._DATASET.finditer(prompt))
+        if not datasets:
+            return self._report(prompt, headings, list_lengths, rng)
+
+        reports = []
+        for match, next_match in zip(datasets, datasets[1:] + [None]):
+            end = next_match.start() if next_match else template_start
+            reports.append(f"# REPORT {match.group(1)}\n" + self._report(prompt[match.end():end], headings, list_lengths, rng))
+        return "\n".join(reports)
+
+    def _usage(self, prompt: str, text: str, result: LLMResponse):
+        from app.utils.tokens import token_estimator
+        result.input_tokens = token_estimator.count(prompt)
+        result.output_tokens = token_estimator.count(text)
+
+    async def generate(self, prompt: str, max_output_tokens: int, temperature: float = 0.7) -> LLMResponse:
+        await asyncio.sleep(self.sample_latency_ms() / 1000)
+        result = LLMResponse(text=self._render(prompt))
+        self._usage(prompt, result.text, result)
+        return result
+
+    def stream(self, prompt: str, max_output_tokens: int, temperature: float = 0.7) -> LLMStream:
+        async def produce(stream: LLMStream):
+            latency = self.sample_latency_ms() / 1000
+            text = self._render(prompt)
+            # Emit roughly one chunk per paragraph, like Gemini's streaming granularity
+            chunks = [part + "\n\n" for part in text.split("\n\n") if part]
+
+            await asyncio.sleep(latency * config.LLM_STUB_FIRST_TOKEN_FRACTION)
+            per_chunk = latency * (1 - config.LLM_STUB_FIRST_TOKEN_FRACTION) / max(1, len(chunks) - 1)
+            for i, chunk in enumerate(chunks):
+                if i:
+                    await asyncio.sleep(per_chunk)
+                yield chunk
+            self._usage(prompt, text, stream.response)
+
+        return LLMStream(produce)
+
+_BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    StubBackend.name: StubBackend,
+}
+
+def get_llm_backend(name: str = None) -> LLMBackend:
+    """
+    Create the LLM backend selected by name (defaults to config.LLM_BACKEND).
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    name = (name or config.LLM_BACKEND).lower()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'. Choose from: {', '.join(sorted(_BACKENDS))}")
+    logger.info("LLM backend selected", backend=name)
+    return _BACKENDS[name]()
@@ -3,7 +3,7 @@ Engagement scoring tool for TrendOps.
 Calculates engagement metrics and detects anomalies.
 """
 from typing import List, Dict
-import numpy as np
+from app.utils.tracing import traced
 
 class ScoringTool:
     """MCP tool for engagement scoring and anomaly detection."""
@@ -38,6 +38,7 @@ class ScoringTool:
         
         return round(normalized, 2)
     
+    @traced("scoring.rank_by_engagement")
     def rank_by_engagement(self, videos: List[Dict]) -> List[Dict]:
         """
         Rank videos by engagement score.
@@ -61,6 +62,7 @@ class ScoringTool:
         
         return scored_videos
     
+    @traced("scoring.detect_anomalies")
     def detect_anomalies(self, videos: List[Dict], threshold: float = 2.0) -> List[Dict]:
         """
         Detect engagement anomalies using statistical methods.
@@ -75,6 +77,8 @@ class ScoringTool:
         if len(videos) < 3:
             return []
         
+        import numpy as np
+        
         scores = [v.get("engagement_score", 0) for v in videos]
         mean_score = np.mean(scores)
         std_score = np.std(scores)
@@ -98,6 +102,7 @@ class ScoringTool:
         
         return anomalies
     
+    @traced("scoring.calculate_theme_engagement")
     def calculate_theme_engagement(
         self,
         videos: List[Dict],
@@ -106,6 +111,13 @@ class ScoringTool:
         """
         Calculate average engagement per theme.
         
+        Videos that represent a near-duplicate group are weighted by their
+        `duplicate_count` so a clip trending in several places counts once
+        per theme but still contributes proportionally to its engagement.
+        
+        Themes that list their member `video_ids` (tag-community themes)
+        match by membership; others match their keywords in titles.
+        
         Args:
             videos: List of videos with engagement scores
             themes: List of theme clusters
@@ -113,28 +125,38 @@ class ScoringTool:
         Returns:
             Themes with engagement metrics
         """
+        import numpy as np
+        
         # Simple approach: match keywords in titles
         theme_scores = []
         
         for theme in themes:
             matching_videos = []
             keywords = theme.get("keywords", [])
+            member_ids = set(theme["video_ids"]) if "video_ids" in theme else None
             
             for video in videos:
+                if member_ids is not None:
+                    if video.get("videoId") in member_ids:
+                        matching_videos.append(video)
+                    continue
                 title_lower = video.get("title", "").lower()
                 if any(keyword.lower() in title_lower for keyword in keywords):
                     matching_videos.append(video)
             
             if matching_videos:
-                avg_engagement = np.mean([
-                    v.get("engagement_score", 0) for v in matching_videos
-                ])
+                weights = [v.get("duplicate_count", 1) for v in matching_videos]
+                avg_engagement = np.average(
+                    [v.get("engagement_score", 0) for v in matching_videos],
+                    weights=weights
+                )
                 
                 theme_scores.append({
                     "theme": theme.get("representative_term"),
                     "keywords": keywords,
                     "video_count": len(matching_videos),
-                    "avg_engagement": round(avg_engagement, 2)
+                    "weighted_count": int(sum(weights)),
+                    "avg_engagement": round(float(avg_engagement), 2)
                 })
         
         # Sort by engagement
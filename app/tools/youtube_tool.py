@@ -2,27 +2,219 @@
 YouTube Data API tool for TrendOps.
 Fetches trending video data with proper error handling.
 """
+import asyncio
+import time
 import httpx
-from typing import Dict, Optional
+import msgspec
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from app.utils.config import config
 from app.utils.logging import get_logger
 from app.utils.cost_tracker import tracker, ExecutionRecord
+from app.utils.tracing import tracer, traced
+from app.utils.entity_store import entity_store
+from app.utils.tag_index import tag_index
 
 logger = get_logger(__name__)
 
+# videos.list accepts at most 50 IDs per call
+_MAX_IDS_PER_CALL = 50
+
+# Partial-response projections: only the fields _to_record reads are sent over the wire
+_STATISTICS_FIELDS = "statistics(viewCount,likeCount,commentCount)"
+_SNIPPET_FIELDS = "snippet(title,description,tags,publishedAt,channelTitle)"
+_FIELDS = {
+    "statistics": f"items(id,{_STATISTICS_FIELDS})",
+    "snippet": f"items(id,{_SNIPPET_FIELDS})",
+    "snippet,statistics": f"items(id,{_SNIPPET_FIELDS},{_STATISTICS_FIELDS})"
+}
+
+class _Snippet(msgspec.Struct):
+    title: Optional[str] = None
+    description: str = ""
+    tags: List[str] = msgspec.field(default_factory=list)
+    publishedAt: Optional[str] = None
+    channelTitle: Optional[str] = None
+
+class _Statistics(msgspec.Struct):
+    viewCount: int = 0
+    likeCount: int = 0
+    commentCount: int = 0
+
+class _Item(msgspec.Struct):
+    id: str
+    snippet: Optional[_Snippet] = None
+    statistics: Optional[_Statistics] = None
+
+class _VideoListResponse(msgspec.Struct):
+    items: List[_Item] = msgspec.field(default_factory=list)
+
+_EMPTY_SNIPPET = _Snippet()
+_EMPTY_STATISTICS = _Statistics()
+
+# strict=False lets the API's string-encoded counts decode straight into ints
+_decoder = msgspec.json.Decoder(_VideoListResponse, strict=False)
+
 class YouTubeTool:
     """MCP tool for fetching YouTube trending data."""
     
     def __init__(self):
         self.base_url = config.YOUTUBE_API_BASE_URL
         self.api_key = config.YOUTUBE_API_KEY
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared connection-pooled client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            # Google only compresses responses for user agents that mention gzip
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                headers={"User-Agent": "TrendOps/1.0 (gzip)", "Accept-Encoding": "gzip"}
+            )
+        return self._client
+    
+    async def _get_videos(self, params: Dict, io_stats: Dict) -> List[_Item]:
+        """
+        Issue a single videos.list call with a partial-response projection.
+        
+        Args:
+            params: Query parameters; "part" selects the field projection
+            io_stats: Accumulator for bytes on the wire and decode time
+        
+        Returns:
+            Decoded items
+        """
+        with tracer.span("youtube.videos_list", part=params["part"]) as span:
+            response = await self._get_client().get(
+                f"{self.base_url}/videos",
+                params={**params, "fields": _FIELDS[params["part"]], "key": self.api_key}
+            )
+            span.set_attribute("http.status_code", response.status_code)
+            response.raise_for_status()
+            
+            decode_start = time.perf_counter()
+            items = _decoder.decode(response.content).items
+            decode_ms = (time.perf_counter() - decode_start) * 1000
+            io_stats["decode_ms"] += decode_ms
+            io_stats["bytes_on_wire"] += response.num_bytes_downloaded
+            io_stats["bytes_decoded"] += len(response.content)
+            span.set_attributes(
+                items=len(items),
+                bytes_on_wire=response.num_bytes_downloaded,
+                decode_ms=round(decode_ms, 3)
+            )
+            return items
+    
+    def _to_record(self, item: _Item) -> Dict:
+        """Transform a videos.list item with snippet and statistics into a video record."""
+        snippet = item.snippet or _EMPTY_SNIPPET
+        stats = item.statistics or _EMPTY_STATISTICS
+        
+        return {
+            "videoId": item.id,
+            "title": snippet.title,
+            "description": snippet.description,
+            "tags": snippet.tags,
+            "viewCount": stats.viewCount,
+            "likeCount": stats.likeCount,
+            "commentCount": stats.commentCount,
+            "publishedAt": snippet.publishedAt,
+            "channelTitle": snippet.channelTitle
+        }
+    
+    async def _fetch_full(self, chart_params: Dict, io_stats: Dict) -> Tuple[List[Dict], int]:
+        """Fetch the full chart with snippets and statistics."""
+        items = await self._get_videos({**chart_params, "part": "snippet,statistics"}, io_stats)
+        return [self._to_record(item) for item in items], 1
+    
+    async def _fetch_delta(self, chart_params: Dict, snapshot, io_stats: Dict) -> Tuple[List[Dict], int]:
+        """
+        Refresh a chart that is already cached.
+        
+        One chart call returns membership and statistics together; snippets
+        are fetched by ID only for videos that are new on the chart, so a
+        refresh with no newcomers costs the same single call as "full".
+        """
+        chart = await self._get_videos({**chart_params, "part": "statistics"}, io_stats)
+        api_calls = 1
+        
+        known = {entity.video_id: entity for entity in snapshot.entities}
+        new_ids = [item.id for item in chart if item.id not in known]
+        
+        snippets: Dict[str, _Snippet] = {}
+        for i in range(0, len(new_ids), _MAX_IDS_PER_CALL):
+            batch = new_ids[i:i + _MAX_IDS_PER_CALL]
+            items = await self._get_videos({"part": "snippet", "id": ",".join(batch)}, io_stats)
+            api_calls += 1
+            for item in items:
+                snippets[item.id] = item.snippet or _EMPTY_SNIPPET
+        
+        records = []
+        for item in chart:
+            entity = known.get(item.id)
+            if entity is None:
+                snippet = snippets.get(item.id)
+                if snippet is None:
+                    # Dropped between the chart and snippet calls
+                    continue
+                records.append(self._to_record(_Item(id=item.id, snippet=snippet, statistics=item.statistics)))
+                continue
+            stats = item.statistics or _EMPTY_STATISTICS
+            records.append({
+                "videoId": entity.video_id,
+                "title": entity.title,
+                "description": entity.description,
+                "tags": list(entity.tags),
+                "viewCount": stats.viewCount,
+                "likeCount": stats.likeCount,
+                "commentCount": stats.commentCount,
+                "publishedAt": entity.published_at,
+                "channelTitle": entity.channel_title
+            })
+        
+        logger.info(
+            "Delta refresh merged",
+            known_videos=len(chart) - len(new_ids),
+            new_videos=len(new_ids)
+        )
+        
+        return records, api_calls
+    
+    def cached_trending_videos(
+        self,
+        region_code: str,
+        category_id: Optional[str] = None,
+        max_results: int = 25
+    ) -> Optional[Dict]:
+        """
+        Latest cached snapshot of a chart in fetch_trending_videos' shape, without calling the API.
+        
+        Returns:
+            Structured JSON with video data (refresh_mode "cached"), or None if the chart was never fetched
+        """
+        snapshot = entity_store.latest_snapshot(region_code, category_id)
+        if snapshot is None:
+            return None
+        
+        videos = snapshot.to_records()[:max_results]
+        return {
+            "videos": videos,
+            "metadata": {
+                "region": region_code,
+                "category": category_id,
+                "fetched_at": snapshot.fetched_at,
+                "count": len(videos),
+                "refresh_mode": "cached"
+            }
+        }
     
+    @traced("youtube.fetch_trending_videos")
     async def fetch_trending_videos(
         self,
         region_code: str = "US",
         category_id: Optional[str] = None,
-        max_results: int = 25
+        max_results: int = 25,
+        refresh_mode: str = "full"
     ) -> Dict:
         """
         Fetch trending videos from YouTube Data API.
@@ -31,11 +223,16 @@ class YouTubeTool:
             region_code: ISO 3166-1 alpha-2 country code
             category_id: YouTube category ID (optional)
             max_results: Maximum number of results (1-50)
+            refresh_mode: "full" refetches snippets for the whole chart;
+                "delta" refetches only statistics for videos already in the
+                snapshot cache (falls back to "full" when nothing is cached)
         
         Returns:
             Structured JSON with video data
         """
         start_time = datetime.utcnow()
+        api_calls = 0
+        io_stats = {"bytes_on_wire": 0, "bytes_decoded": 0, "decode_ms": 0.0}
         
         try:
             # Validate inputs
@@ -45,55 +242,48 @@ class YouTubeTool:
             if category_id and category_id not in config.VALID_CATEGORIES:
                 raise ValueError(f"Invalid category ID: {category_id}")
             
+            if refresh_mode not in ("full", "delta"):
+                raise ValueError(f"Invalid refresh mode: {refresh_mode}")
+            
             if max_results > config.MAX_RESULTS_PER_REQUEST:
                 max_results = config.MAX_RESULTS_PER_REQUEST
             
             # Build request
-            params = {
-                "part": "snippet,statistics",
+            chart_params = {
                 "chart": "mostPopular",
                 "regionCode": region_code,
-                "maxResults": max_results,
-                "key": self.api_key
+                "maxResults": max_results
             }
             
             if category_id:
-                params["videoCategoryId"] = category_id
+                chart_params["videoCategoryId"] = category_id
+            
+            snapshot = entity_store.latest_snapshot(region_code, category_id)
+            if refresh_mode == "delta" and snapshot is None:
+                refresh_mode = "full"
             
             logger.info(
                 "Fetching YouTube trending videos",
                 region=region_code,
                 category=category_id,
-                max_results=max_results
+                max_results=max_results,
+                refresh_mode=refresh_mode
             )
             
-            # Make API call
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/videos",
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
-            
-            # Transform to structured format
-            videos = []
-            for item in data.get("items", []):
-                snippet = item.get("snippet", {})
-                stats = item.get("statistics", {})
-                
-                videos.append({
-                    "videoId": item.get("id"),
-                    "title": snippet.get("title"),
-                    "description": snippet.get("description", ""),
-                    "tags": snippet.get("tags", []),
-                    "viewCount": int(stats.get("viewCount", 0)),
-                    "likeCount": int(stats.get("likeCount", 0)),
-                    "commentCount": int(stats.get("commentCount", 0)),
-                    "publishedAt": snippet.get("publishedAt"),
-                    "channelTitle": snippet.get("channelTitle")
-                })
+            # Make API calls
+            if refresh_mode == "delta":
+                videos, api_calls = await self._fetch_delta(chart_params, snapshot, io_stats)
+            else:
+                videos, api_calls = await self._fetch_full(chart_params, io_stats)
+            
+            # Intern snippets in the global entity store; the snapshot keeps only stats + references
+            with tracer.span("entity_store.add_snapshot", videos=len(videos)):
+                snapshot = entity_store.add_snapshot(region_code, category_id, videos)
+                videos = snapshot.to_records()
+            
+            # Only videos new to the region add tag pairs; runs off the event loop since it may compact
+            with tracer.span("tag_index.ingest", videos=len(videos)):
+                await asyncio.to_thread(tag_index.ingest, region_code, videos)
             
             duration_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
             
@@ -103,14 +293,16 @@ class YouTubeTool:
                 timestamp=start_time.isoformat(),
                 duration_ms=duration_ms,
                 status="success",
-                api_calls=1,
-                estimated_tokens=0
+                api_calls=api_calls,
+                estimated_tokens=0,
+                metadata={**io_stats, "decode_ms": round(io_stats["decode_ms"], 3), "refresh_mode": refresh_mode}
             ))
             
             logger.info(
                 "Successfully fetched trending videos",
                 video_count=len(videos),
-                duration_ms=duration_ms
+                duration_ms=duration_ms,
+                bytes_on_wire=io_stats["bytes_on_wire"]
             )
             
             return {
@@ -118,8 +310,9 @@ class YouTubeTool:
                 "metadata": {
                     "region": region_code,
                     "category": category_id,
-                    "fetched_at": datetime.utcnow().isoformat(),
-                    "count": len(videos)
+                    "fetched_at": snapshot.fetched_at,
+                    "count": len(videos),
+                    "refresh_mode": refresh_mode
                 }
             }
         
@@ -132,7 +325,7 @@ class YouTubeTool:
                 timestamp=start_time.isoformat(),
                 duration_ms=duration_ms,
                 status="error",
-                api_calls=1,
+                api_calls=api_calls or 1,
                 error=error_msg
             ))
             
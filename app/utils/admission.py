@@ -0,0 +1,230 @@
+"""
+Admission control for TrendOps.
+Caps in-flight pipelines and queues the rest by priority class, shedding requests that cannot start in time.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+from app.utils.config import config
+from app.utils.logging import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+_WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is shed instead of queued.
+
+    status_code is 503 when the service as a whole is saturated (queue
+    full, displaced by a higher priority request, or the expected wait
+    exceeds the request's deadline) and 429 when the request's priority
+    class has used up its own share of the queue.
+    """
+
+    def __init__(self, reason: str, status_code: int, retry_after: int, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    seq: int
+    priority: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+@dataclass
+class Admission:
+    """A granted pipeline slot."""
+    priority: str
+    waited_ms: float
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def remaining_timeout_ms(self, timeout_ms: Optional[int]) -> Optional[int]:
+        """The caller's deadline less the time spent queued (at least 1 ms)."""
+        if not timeout_ms:
+            return timeout_ms
+        return max(1, int(timeout_ms - self.waited_ms))
+
+def parse_priority_classes(spec: str) -> Dict[str, int]:
+    """Parse "dashboard:32,api:24,batch:8" into {class: max queued}, highest priority first."""
+    classes: Dict[str, int] = {}
+    for entry in spec.split(","):
+        name, _, limit = entry.strip().partition(":")
+        if name:
+            classes[name.strip()] = int(limit) if limit.strip() else config.ADMISSION_MAX_QUEUE
+    if not classes:
+        raise ValueError("ADMISSION_PRIORITY_CLASSES must name at least one class")
+    return classes
+
+class AdmissionController:
+    """
+    Bounded in-flight pipelines with a priority wait queue.
+
+    At most max_inflight pipelines run at once. Further requests wait in a
+    queue ordered by priority class, then arrival; a full queue displaces
+    its lowest priority waiter when a higher priority request arrives.
+    Requests are shed up front when the expected wait (from an EWMA of
+    pipeline service time) exceeds their deadline, and while queued once
+    the deadline passes.
+    """
+
+    def __init__(self, max_inflight: int = None, max_queue: int = None, classes: Dict[str, int] = None):
+        self.max_inflight = max_inflight or config.ADMISSION_MAX_INFLIGHT
+        self.max_queue = max_queue or config.ADMISSION_MAX_QUEUE
+        self.classes = classes or parse_priority_classes(config.ADMISSION_PRIORITY_CLASSES)
+        self._ranks = {name: rank for rank, name in enumerate(self.classes)}
+        self._inflight = 0
+        self._waiters: List[_Waiter] = []
+        self._queued: Dict[str, int] = {name: 0 for name in self.classes}
+        self._seq = itertools.count()
+        self._service_seconds: Optional[float] = None
+
+        self._wait_histogram = metrics.histogram(
+            "trendops_admission_wait_seconds", "Time requests spent queued before admission",
+            labels=("priority",), buckets=_WAIT_BUCKETS
+        )
+        self._admitted = metrics.counter(
+            "trendops_admission_admitted_total", "Requests admitted to the pipeline", labels=("priority",)
+        )
+        self._rejected = metrics.counter(
+            "trendops_admission_rejected_total", "Requests shed by admission control", labels=("priority", "reason")
+        )
+        metrics.gauge(
+            "trendops_admission_queue_depth", "Requests waiting for a pipeline slot",
+            labels=("priority",), callback=lambda: {(name,): count for name, count in self._queued.items()}
+        )
+        metrics.gauge(
+            "trendops_admission_inflight", "Pipelines currently running", callback=lambda: {(): self._inflight}
+        )
+        metrics.gauge(
+            "trendops_admission_service_seconds", "EWMA of pipeline service time used to estimate queue wait",
+            callback=lambda: {(): self._service_seconds} if self._service_seconds is not None else {}
+        )
+
+    def resolve_priority(self, requested: Optional[str], default: str) -> str:
+        """A known priority class: the requested one, else the endpoint default."""
+        if requested and requested in self._ranks:
+            return requested
+        return default if default in self._ranks else next(reversed(self.classes))
+
+    def estimated_wait_seconds(self, priority: str) -> float:
+        """Expected queue wait for a new request of this class, from the current backlog."""
+        if self._inflight < self.max_inflight and not self._waiters:
+            return 0.0
+        if self._service_seconds is None:
+            return 0.0
+        rank = self._ranks[priority]
+        ahead = sum(1 for waiter in self._waiters if waiter.rank <= rank)
+        return (ahead + 1) * self._service_seconds / self.max_inflight
+
+    def _retry_after(self) -> int:
+        backlog = len(self._waiters) + self._inflight
+        return max(1, math.ceil(backlog * (self._service_seconds or 1.0) / self.max_inflight))
+
+    def _reject(self, priority: str, reason: str, status_code: int, message: str) -> AdmissionRejected:
+        self._rejected.inc(priority=priority, reason=reason)
+        logger.warning("Request shed by admission control", priority=priority, reason=reason, queue_depth=len(self._waiters))
+        return AdmissionRejected(reason, status_code, self._retry_after(), message)
+
+    async def acquire(self, priority: str, timeout_ms: Optional[int] = None) -> Admission:
+        """
+        Wait for a pipeline slot.
+
+        Args:
+            priority: Priority class name
+            timeout_ms: The request's deadline; ADMISSION_MAX_WAIT_MS caps the wait when unset
+
+        Raises:
+            AdmissionRejected: If the request is shed
+        """
+        budget = (timeout_ms or config.ADMISSION_MAX_WAIT_MS) / 1000
+        if self._inflight < self.max_inflight and not self._waiters:
+            return self._grant(priority, 0.0)
+
+        rank = self._ranks[priority]
+        if self._queued[priority] >= self.classes[priority]:
+            raise self._reject(priority, "class_queue_full", 429, f"Too many queued {priority} requests")
+        if self.estimated_wait_seconds(priority) > budget:
+            raise self._reject(priority, "deadline", 503, "Expected queue wait exceeds the request deadline")
+        if len(self._waiters) >= self.max_queue:
+            lowest = max(self._waiters)
+            if lowest.rank <= rank:
+                raise self._reject(priority, "queue_full", 503, "Request queue is full")
+            self._remove(lowest)
+            lowest.future.set_exception(self._reject(lowest.priority, "displaced", 503, "Displaced by a higher priority request"))
+
+        waiter = _Waiter(rank, next(self._seq), priority, asyncio.get_running_loop().create_future(), time.perf_counter())
+        heapq.heappush(self._waiters, waiter)
+        self._queued[priority] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout=budget)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.exception():
+                return waiter.future.result()
+            self._remove(waiter)
+            raise self._reject(priority, "wait_timeout", 503, "Request deadline passed while queued")
+        except asyncio.CancelledError:
+            # Client went away while queued; hand on a slot it may have just been granted
+            if waiter.future.done() and not waiter.future.exception():
+                self.release(waiter.future.result())
+            else:
+                self._remove(waiter)
+            raise
+
+    def _remove(self, waiter: _Waiter):
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            self._queued[waiter.priority] -= 1
+
+    def _grant(self, priority: str, waited: float) -> Admission:
+        self._inflight += 1
+        self._admitted.inc(priority=priority)
+        self._wait_histogram.observe(waited, priority=priority)
+        return Admission(priority=priority, waited_ms=waited * 1000)
+
+    def release(self, admission: Admission):
+        """Return a slot and hand it to the highest priority waiter."""
+        service = time.perf_counter() - admission.started_at
+        self._service_seconds = service if self._service_seconds is None else 0.8 * self._service_seconds + 0.2 * service
+        self._inflight -= 1
+        while self._waiters and self._inflight < self.max_inflight:
+            waiter = heapq.heappop(self._waiters)
+            self._queued[waiter.priority] -= 1
+            if waiter.future.done():
+                continue
+            waiter.future.set_result(self._grant(waiter.priority, time.perf_counter() - waiter.enqueued_at))
+
+    @asynccontextmanager
+    async def admit(self, priority: str, timeout_ms: Optional[int] = None) -> AsyncIterator[Admission]:
+        """Hold a pipeline slot for the duration of the block."""
+        admission = await self.acquire(priority, timeout_ms)
+        try:
+            yield admission
+        finally:
+            self.release(admission)
+
+    def stats(self) -> Dict:
+        """Queue and slot usage for observability."""
+        return {
+            "max_inflight": self.max_inflight,
+            "inflight": self._inflight,
+            "max_queue": self.max_queue,
+            "queue_depth": len(self._waiters),
+            "queued_by_priority": dict(self._queued),
+            "priority_classes": dict(self.classes),
+            "service_ms_ewma": round(self._service_seconds * 1000, 1) if self._service_seconds is not None else None
+        }
+
+# Global admission controller instance
+admission_controller = AdmissionController()
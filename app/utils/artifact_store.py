@@ -0,0 +1,152 @@
+"""
+Artifact store for TrendOps MCP tools.
+Keeps large intermediate results server-side so tools can pass compact handles instead of data blobs.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from app.utils.config import config
+from app.utils.logging import get_logger
+from app.utils.serialization import FastJSONResponse
+
+logger = get_logger(__name__)
+
+class ArtifactNotFoundError(KeyError):
+    """Raised when a handle is unknown, expired or evicted."""
+
+    def __init__(self, handle: str):
+        super().__init__(handle)
+        self.handle = handle
+
+    def __str__(self) -> str:
+        return f"Unknown or expired artifact handle: {self.handle}"
+
+@dataclass
+class Artifact:
+    """A stored intermediate result."""
+    handle: str
+    kind: str
+    value: Any
+    size_bytes: int
+    created_at: float
+    expires_at: float
+    parents: Dict[str, str] = field(default_factory=dict)
+
+    def describe(self) -> Dict:
+        """Handle metadata returned to clients in place of the value."""
+        return {
+            "handle": self.handle,
+            "kind": self.kind,
+            "size_bytes": self.size_bytes,
+            "expires_in_seconds": max(0, round(self.expires_at - time.time())),
+            "parents": self.parents
+        }
+
+class ArtifactStore:
+    """
+    In-memory artifact store with TTL, LRU and size-cap eviction.
+
+    Values are kept as Python objects, so resolving a handle costs a dict
+    lookup. Sizes are measured as encoded JSON bytes when stored. Entries
+    expire ttl_seconds after their last access; past max_entries or
+    max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, ttl_seconds: int = None, max_entries: int = None, max_bytes: int = None):
+        self.ttl_seconds = ttl_seconds or config.ARTIFACT_TTL_SECONDS
+        self.max_entries = max_entries or config.ARTIFACT_MAX_ENTRIES
+        self.max_bytes = max_bytes or config.ARTIFACT_MAX_BYTES
+        self._artifacts: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._total_bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def put(self, kind: str, value: Any, parents: Optional[Dict[str, str]] = None) -> Artifact:
+        """
+        Store a value and return its artifact.
+
+        Args:
+            kind: Artifact type, e.g. "trending_data" or "analytics"
+            value: JSON-serializable value
+            parents: Handles this artifact was derived from, by role
+
+        Raises:
+            ValueError: If the value alone exceeds max_bytes
+        """
+        size = len(FastJSONResponse.encode(value))
+        if size > self.max_bytes:
+            raise ValueError(f"Artifact of {size} bytes exceeds ARTIFACT_MAX_BYTES ({self.max_bytes})")
+
+        now = time.time()
+        artifact = Artifact(
+            handle=f"{kind}:{secrets.token_hex(8)}",
+            kind=kind,
+            value=value,
+            size_bytes=size,
+            created_at=now,
+            expires_at=now + self.ttl_seconds,
+            parents=dict(parents or {})
+        )
+        with self._lock:
+            self._purge_expired(now)
+            self._artifacts[artifact.handle] = artifact
+            self._total_bytes += size
+            while len(self._artifacts) > self.max_entries or self._total_bytes > self.max_bytes:
+                self._drop(next(iter(self._artifacts)))
+                self._evictions += 1
+        return artifact
+
+    def get(self, handle: str, kind: Optional[str] = None) -> Artifact:
+        """
+        Resolve a handle, refreshing its TTL and LRU position.
+
+        Raises:
+            ArtifactNotFoundError: If the handle is unknown or expired
+            ValueError: If the artifact is not of the expected kind
+        """
+        now = time.time()
+        with self._lock:
+            artifact = self._artifacts.get(handle)
+            if artifact is None or artifact.expires_at <= now:
+                if artifact is not None:
+                    self._drop(handle)
+                raise ArtifactNotFoundError(handle)
+            artifact.expires_at = now + self.ttl_seconds
+            self._artifacts.move_to_end(handle)
+        if kind is not None and artifact.kind != kind:
+            raise ValueError(f"Artifact {handle} is {artifact.kind}, expected {kind}")
+        return artifact
+
+    def delete(self, handle: str) -> bool:
+        with self._lock:
+            if handle not in self._artifacts:
+                return False
+            self._drop(handle)
+            return True
+
+    def _drop(self, handle: str):
+        artifact = self._artifacts.pop(handle)
+        self._total_bytes -= artifact.size_bytes
+
+    def _purge_expired(self, now: float):
+        expired = [handle for handle, artifact in self._artifacts.items() if artifact.expires_at <= now]
+        for handle in expired:
+            self._drop(handle)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._purge_expired(time.time())
+            return {
+                "artifacts": len(self._artifacts),
+                "total_bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self._evictions
+            }
+
+# Global artifact store instance
+artifact_store = ArtifactStore()
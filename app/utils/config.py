@@ -3,6 +3,7 @@ Configuration management for TrendOps.
 Loads environment variables and validates required settings.
 """
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,12 +16,132 @@ class Config:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     
     # YouTube API Configuration
-    YOUTUBE_API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+    # Point at a local stand-in for offline benchmarks (see bench/youtube_standin.py)
+    YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
     
     # Governance Limits
-    MAX_REQUESTS_PER_SESSION = 100
+    MAX_REQUESTS_PER_SESSION = int(os.getenv("MAX_REQUESTS_PER_SESSION", "100"))
     MAX_RESULTS_PER_REQUEST = 50
     DEFAULT_MAX_RESULTS = 25
+    # Session execution log is bounded; each response carries its own request's records
+    EXECUTION_LOG_MAX_RECORDS = int(os.getenv("EXECUTION_LOG_MAX_RECORDS", "1000"))
+    # Worker threads for blocking stage-graph stages (analytics)
+    STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", "4"))
+    
+    # Request deadlines (timeout_ms): default applies when the caller sends none (0 = no deadline)
+    REQUEST_DEFAULT_TIMEOUT_MS = int(os.getenv("REQUEST_DEFAULT_TIMEOUT_MS", "0"))
+    # Budget held back from the fetch so analytics can still run on its result
+    DEADLINE_ANALYTICS_RESERVE_MS = int(os.getenv("DEADLINE_ANALYTICS_RESERVE_MS", "100"))
+    # Below these remaining budgets the cached snapshot is served / the LLM report is skipped
+    DEADLINE_MIN_FETCH_MS = int(os.getenv("DEADLINE_MIN_FETCH_MS", "150"))
+    DEADLINE_MIN_INTELLIGENCE_MS = int(os.getenv("DEADLINE_MIN_INTELLIGENCE_MS", "1500"))
+    
+    # Admission control for /analyze*: in-flight pipeline cap and a bounded priority queue
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "8"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+    # Priority classes, highest first, each with its own cap on queued requests (X-Priority-Class header)
+    ADMISSION_PRIORITY_CLASSES = os.getenv("ADMISSION_PRIORITY_CLASSES", "dashboard:32,api:24,batch:8")
+    # Longest a request without timeout_ms may wait for a slot
+    ADMISSION_MAX_WAIT_MS = int(os.getenv("ADMISSION_MAX_WAIT_MS", "10000"))
+    
+    # Span tracing: most recent traces kept in memory for export
+    TRACE_MAX_TRACES = int(os.getenv("TRACE_MAX_TRACES", "50"))
+    TRACE_MAX_SPANS_PER_TRACE = int(os.getenv("TRACE_MAX_SPANS_PER_TRACE", "2000"))
+    # Admin callers authenticate with X-Admin-Token; admin features are off while unset
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    
+    # Request Profiling (admin opt-in per request; middleware not installed unless enabled)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+    PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "20"))
+    PROFILE_TABLE_ROWS = int(os.getenv("PROFILE_TABLE_ROWS", "50"))
+    
+    # Snapshot History (entity store)
+    SNAPSHOT_HISTORY_SIZE = int(os.getenv("SNAPSHOT_HISTORY_SIZE", "10"))
+    
+    # Near-Duplicate Detection (MinHash + LSH)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    
+    # Intelligence Report Cache (on-disk, keyed by normalized analytics context)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv(
+        "LLM_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "trendops", "llm_cache.sqlite3")
+    )
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+    LLM_CACHE_ENGAGEMENT_STEP = float(os.getenv("LLM_CACHE_ENGAGEMENT_STEP", "5"))
+    # Jaccard overlap of theme/keyword terms for near-match reuse (0 disables)
+    LLM_CACHE_NEAR_MATCH_THRESHOLD = float(os.getenv("LLM_CACHE_NEAR_MATCH_THRESHOLD", "0"))
+    
+    # LLM Backend ("gemini" or the offline "stub" for load testing)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+    LLM_MODEL = os.getenv("LLM_MODEL", "gemini-flash-latest")
+    LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "800"))
+    LLM_STUB_JITTER_MS = float(os.getenv("LLM_STUB_JITTER_MS", "200"))
+    # fixed | uniform | normal | lognormal
+    LLM_STUB_LATENCY_DISTRIBUTION = os.getenv("LLM_STUB_LATENCY_DISTRIBUTION", "lognormal").lower()
+    LLM_STUB_FIRST_TOKEN_FRACTION = float(os.getenv("LLM_STUB_FIRST_TOKEN_FRACTION", "0.3"))
+    LLM_STUB_SEED = int(os.getenv("LLM_STUB_SEED", "42"))
+    
+    # Token Accounting
+    LLM_INPUT_TOKEN_BUDGET = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", "1500"))
+    LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "2000"))
+    TOKEN_CHARS_PER_TOKEN = float(os.getenv("TOKEN_CHARS_PER_TOKEN", "4.0"))
+    LLM_INPUT_COST_PER_1K_TOKENS = float(os.getenv("LLM_INPUT_COST_PER_1K_TOKENS", "0.005"))
+    LLM_OUTPUT_COST_PER_1K_TOKENS = float(os.getenv("LLM_OUTPUT_COST_PER_1K_TOKENS", "0.005"))
+    
+    # Batched Multi-Region Intelligence
+    LLM_BATCH_INPUT_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_INPUT_TOKEN_BUDGET", "6000"))
+    LLM_BATCH_MAX_REGIONS = int(os.getenv("LLM_BATCH_MAX_REGIONS", "4"))
+    
+    # Background Jobs (async intelligence generation)
+    JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "2"))
+    JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "50"))
+    JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "900"))
+    
+    # MCP over streamable HTTP, served by the API process (stdio via `python app/mcp_server.py` still works).
+    # Off by default: importing the MCP SDK adds roughly 0.4s to every cold start, and on Vercel
+    # the session manager cannot outlive a request. Set MCP_HTTP_ENABLED=true on long-running hosts.
+    MCP_HTTP_ENABLED = os.getenv("MCP_HTTP_ENABLED", "false").lower() == "true"
+    MCP_HTTP_PATH = os.getenv("MCP_HTTP_PATH", "/mcp")
+    MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "false").lower() == "true"
+    # Extra Host header values accepted besides localhost (DNS rebinding protection), comma-separated
+    MCP_ALLOWED_HOSTS = [h.strip() for h in os.getenv("MCP_ALLOWED_HOSTS", "").split(",") if h.strip()]
+    
+    # MCP Artifact Store (handles passed between tools instead of data blobs)
+    ARTIFACT_TTL_SECONDS = int(os.getenv("ARTIFACT_TTL_SECONDS", "900"))
+    ARTIFACT_MAX_ENTRIES = int(os.getenv("ARTIFACT_MAX_ENTRIES", "200"))
+    ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(64 * 1024 * 1024)))
+    
+    # Cold start: import budget for app.main (warning logged when exceeded; 0 disables)
+    IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+    # Warm state (entity store snapshots, clustering results, tag index) persisted for cold containers to rehydrate
+    WARM_STATE_ENABLED = os.getenv("WARM_STATE_ENABLED", "true").lower() == "true"
+    WARM_STATE_DIR = os.getenv("WARM_STATE_DIR", os.path.join(tempfile.gettempdir(), "trendops", "warm"))
+    WARM_STATE_SAVE_INTERVAL_SECONDS = float(os.getenv("WARM_STATE_SAVE_INTERVAL_SECONDS", "10"))
+    # Older state files are ignored on rehydration
+    WARM_STATE_MAX_AGE_SECONDS = int(os.getenv("WARM_STATE_MAX_AGE_SECONDS", "3600"))
+    # Memoized theme clusterings (part of the warm state; 0 disables)
+    CLUSTER_CACHE_MAX_ENTRIES = int(os.getenv("CLUSTER_CACHE_MAX_ENTRIES", "128"))
+    
+    # Tag co-occurrence index, per region, fed by every fetch (part of the warm state)
+    TAG_INDEX_ENABLED = os.getenv("TAG_INDEX_ENABLED", "true").lower() == "true"
+    # Only a video's first tags count; pairs per video grow quadratically with this
+    TAG_INDEX_MAX_TAGS_PER_VIDEO = int(os.getenv("TAG_INDEX_MAX_TAGS_PER_VIDEO", "20"))
+    # Pending pairs that trigger a compaction (queries also compact first)
+    TAG_INDEX_COMPACT_THRESHOLD = int(os.getenv("TAG_INDEX_COMPACT_THRESHOLD", "20000"))
+    # Half-life of the recency weight behind emerging tag pairs
+    TAG_INDEX_HALF_LIFE_SECONDS = float(os.getenv("TAG_INDEX_HALF_LIFE_SECONDS", "21600"))
+    # Video IDs remembered so repeat fetches do not recount them (also aged out with the pairs)
+    TAG_INDEX_MAX_SEEN_VIDEOS = int(os.getenv("TAG_INDEX_MAX_SEEN_VIDEOS", "50000"))
+    # Analytics themes from tag communities instead of TF-IDF + K-Means (falls back when
+    # the tag themes cover less than TAG_THEMES_MIN_COVERAGE of the videos)
+    TAG_THEMES_ENABLED = os.getenv("TAG_THEMES_ENABLED", "false").lower() == "true"
+    TAG_THEMES_MIN_COVERAGE = float(os.getenv("TAG_THEMES_MIN_COVERAGE", "0.6"))
     
     # Valid YouTube Region Codes (subset for validation)
     VALID_REGIONS = {
@@ -51,7 +172,7 @@ class Config:
         """Validate required configuration."""
         if not cls.YOUTUBE_API_KEY:
             raise ValueError("YOUTUBE_API_KEY environment variable is required")
-        if not cls.GOOGLE_API_KEY:
+        if cls.LLM_BACKEND == "gemini" and not cls.GOOGLE_API_KEY:
             raise ValueError("GOOGLE_API_KEY environment variable is required")
 
 config = Config()
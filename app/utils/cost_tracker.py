@@ -2,9 +2,19 @@
 Cost tracking and governance for TrendOps.
 Monitors API usage, token consumption, and enforces limits.
 """
+import uuid
+from collections import deque
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
+from app.utils.config import config
+from app.utils.tokens import estimate_cost
+from app.utils.tracing import tracer, current_span
+
+# (request_id, records) for the request being handled by the current task
+_request_scope: ContextVar[Optional[Tuple[str, List]]] = ContextVar("request_scope", default=None)
+_bound_request_id: ContextVar[Optional[str]] = ContextVar("bound_request_id", default=None)
 
 @dataclass
 class ExecutionRecord:
@@ -15,34 +25,110 @@ class ExecutionRecord:
     status: str
     api_calls: int = 0
     estimated_tokens: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
     error: str = None
+    metadata: Optional[Dict] = None
+    request_id: Optional[str] = None
+    span_id: Optional[str] = None
 
 class CostTracker:
-    """In-memory cost and execution tracker for governance."""
+    """
+    In-memory cost and execution tracker for governance.
+    
+    The session log keeps the last EXECUTION_LOG_MAX_RECORDS records. Each
+    pipeline run opens a request scope (see begin_request) so its own
+    records can be returned even while other requests run concurrently.
+    """
     
-    def __init__(self):
-        self.execution_log: List[ExecutionRecord] = []
+    def __init__(self, max_records: int = None):
+        self.execution_log = deque(maxlen=max_records or config.EXECUTION_LOG_MAX_RECORDS)
         self.session_stats = {
             "total_api_calls": 0,
             "total_estimated_tokens": 0,
+            "total_input_tokens": 0,
+            "total_output_tokens": 0,
             "total_executions": 0,
+            "llm_cache_hits": 0,
+            "llm_cache_misses": 0,
+            "tokens_saved": 0,
             "session_start": datetime.utcnow().isoformat()
         }
     
+    def begin_request(self, request_id: str = None) -> str:
+        """
+        Start a request scope for the current task.
+        
+        Records made from this task (and tasks it spawns afterwards) are
+        tagged with the request ID and collected for get_execution_trace.
+        
+        Returns:
+            The request ID
+        """
+        request_id = request_id or _bound_request_id.get() or uuid.uuid4().hex
+        _request_scope.set((request_id, []))
+        tracer.start_trace(request_id)
+        return request_id
+    
+    def bind_request_id(self, request_id: str):
+        """
+        Fix the ID the next begin_request in this context will use.
+        
+        Lets middleware that runs before the pipeline (e.g. profiling)
+        key its own output by the same request ID as the trace.
+        """
+        _bound_request_id.set(request_id)
+    
+    def current_request_id(self) -> Optional[str]:
+        """ID of the active request scope, if any."""
+        scope = _request_scope.get()
+        return scope[0] if scope else None
+    
     def record_execution(self, record: ExecutionRecord):
         """Record a tool execution."""
+        scope = _request_scope.get()
+        if scope is not None:
+            record.request_id = scope[0]
+            scope[1].append(record)
+        span = current_span()
+        if span is not None:
+            record.span_id = span.span_id
         self.execution_log.append(record)
         self.session_stats["total_executions"] += 1
         self.session_stats["total_api_calls"] += record.api_calls
         self.session_stats["total_estimated_tokens"] += record.estimated_tokens
+        self.session_stats["total_input_tokens"] += record.input_tokens
+        self.session_stats["total_output_tokens"] += record.output_tokens
+    
+    def record_cache_lookup(self, hit: bool, tokens_saved: int = 0):
+        """Record an LLM cache lookup and the tokens a hit avoided."""
+        if hit:
+            self.session_stats["llm_cache_hits"] += 1
+            self.session_stats["tokens_saved"] += tokens_saved
+        else:
+            self.session_stats["llm_cache_misses"] += 1
     
-    def get_execution_trace(self) -> List[Dict]:
-        """Get full execution trace."""
-        return [asdict(record) for record in self.execution_log]
+    def get_execution_trace(self, scoped: bool = True) -> List[Dict]:
+        """
+        Get the execution trace.
+        
+        Args:
+            scoped: Return only the current request's records when a request
+                scope is active; otherwise the session log
+        """
+        scope = _request_scope.get() if scoped else None
+        records = scope[1] if scope is not None else self.execution_log
+        return [asdict(record) for record in records]
     
     def get_session_stats(self) -> Dict:
         """Get aggregated session statistics."""
-        return self.session_stats.copy()
+        stats = self.session_stats.copy()
+        lookups = stats["llm_cache_hits"] + stats["llm_cache_misses"]
+        stats["llm_cache_hit_rate"] = round(stats["llm_cache_hits"] / lookups, 3) if lookups else 0.0
+        stats["estimated_cost_usd"] = round(
+            estimate_cost(stats["total_input_tokens"], stats["total_output_tokens"]), 6
+        )
+        return stats
     
     def check_limits(self, max_requests: int) -> bool:
         """Check if session limits are exceeded."""
@@ -0,0 +1,74 @@
+"""
+Request deadlines for TrendOps.
+Carries a per-request latency budget to every agent and records where results were degraded to meet it.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+_deadline: ContextVar[Optional["Deadline"]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage cannot produce even a degraded result in time."""
+
+class Deadline:
+    """
+    A latency budget for one request.
+
+    Agents read the remaining budget to size their own timeouts, and call
+    degrade() when they skip or cut short work so the response can say
+    which parts are partial.
+    """
+
+    def __init__(self, timeout_ms: float):
+        self.timeout_ms = timeout_ms
+        self.started = time.perf_counter()
+        self.expires_at = self.started + timeout_ms / 1000
+        self.degradations: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.expires_at - time.perf_counter()) * 1000)
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.expires_at
+
+    def timeout(self, reserve_ms: float = 0, cap_seconds: Optional[float] = None) -> float:
+        """Seconds a stage may spend while leaving reserve_ms for later stages."""
+        seconds = max(0.0, (self.remaining_ms() - reserve_ms) / 1000)
+        return min(seconds, cap_seconds) if cap_seconds is not None else seconds
+
+    def degrade(self, stage: str, action: str, **detail):
+        """Record that a stage returned a reduced result to meet the deadline."""
+        with self._lock:
+            self.degradations.append({
+                "stage": stage,
+                "action": action,
+                "at_ms": round(self.elapsed_ms(), 1),
+                **detail
+            })
+
+    def summary(self) -> Dict:
+        with self._lock:
+            degradations = list(self.degradations)
+        return {
+            "timeout_ms": self.timeout_ms,
+            "elapsed_ms": round(self.elapsed_ms(), 1),
+            "degraded": bool(degradations),
+            "stages": sorted({d["stage"] for d in degradations}),
+            "details": degradations
+        }
+
+def start_deadline(timeout_ms: Optional[float]) -> Optional[Deadline]:
+    """Set (or clear, when timeout_ms is falsy) the deadline for the current task."""
+    deadline = Deadline(timeout_ms) if timeout_ms else None
+    _deadline.set(deadline)
+    return deadline
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the request being handled, if it has one."""
+    return _deadline.get()
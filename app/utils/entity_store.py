@@ -0,0 +1,281 @@
+"""
+Global video entity store for TrendOps.
+Holds immutable snippet data once per videoId and keeps compact per-snapshot statistics.
+"""
+import sys
+import threading
+import weakref
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.utils.config import config
+from app.utils.warm_state import warm_state
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class VideoEntity:
+    """Immutable snippet data for a single video, shared by every snapshot that references it."""
+    video_id: str
+    title: str
+    description: str
+    tags: Tuple[str, ...]
+    published_at: Optional[str]
+    channel_title: Optional[str]
+
+    def text_bytes(self) -> int:
+        """Approximate size of the text payload held by this entity."""
+        return (
+            len(self.title or "") + len(self.description or "")
+            + sum(len(tag) for tag in self.tags) + len(self.channel_title or "")
+        )
+
+class Snapshot:
+    """
+    One fetch of a trending chart.
+    Stores entity references plus parallel statistics arrays instead of per-video dicts.
+    """
+    __slots__ = (
+        "region", "category", "fetched_at", "entities",
+        "view_counts", "like_counts", "comment_counts"
+    )
+
+    def __init__(
+        self,
+        region: str,
+        category: Optional[str],
+        entities: Tuple[VideoEntity, ...],
+        view_counts: array,
+        like_counts: array,
+        comment_counts: array,
+        fetched_at: Optional[str] = None
+    ):
+        self.region = region
+        self.category = category
+        self.entities = entities
+        self.view_counts = view_counts
+        self.like_counts = like_counts
+        self.comment_counts = comment_counts
+        self.fetched_at = fetched_at or datetime.utcnow().isoformat()
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def video_ids(self) -> List[str]:
+        """VideoIds in chart order."""
+        return [entity.video_id for entity in self.entities]
+
+    def nbytes(self) -> int:
+        """Bytes used by the statistics arrays and the reference tuple."""
+        arrays = (self.view_counts, self.like_counts, self.comment_counts)
+        return sum(a.itemsize * len(a) for a in arrays) + sys.getsizeof(self.entities)
+
+    def to_records(self) -> List[Dict]:
+        """Materialize the video dicts consumed by the agents. Text fields are shared, not copied."""
+        return [
+            {
+                "videoId": entity.video_id,
+                "title": entity.title,
+                "description": entity.description,
+                "tags": list(entity.tags),
+                "viewCount": self.view_counts[i],
+                "likeCount": self.like_counts[i],
+                "commentCount": self.comment_counts[i],
+                "publishedAt": entity.published_at,
+                "channelTitle": entity.channel_title
+            }
+            for i, entity in enumerate(self.entities)
+        ]
+
+class EntityStore:
+    """
+    Process-wide, interned store of video entities keyed by videoId.
+
+    Entities are held weakly: once no retained snapshot references a video,
+    its snippet data is released. Snapshot history is bounded per
+    (region, category) chart.
+    """
+
+    def __init__(self, history_size: int = None):
+        self.history_size = history_size or config.SNAPSHOT_HISTORY_SIZE
+        self._entities: "weakref.WeakValueDictionary[str, VideoEntity]" = weakref.WeakValueDictionary()
+        self._snapshots: Dict[Tuple[str, Optional[str]], deque] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "intern_hits": 0,
+            "intern_misses": 0,
+            "bytes_deduplicated": 0
+        }
+
+    def intern(self, record: Dict) -> VideoEntity:
+        """
+        Return the shared entity for a video record, creating or replacing it if the snippet changed.
+
+        Args:
+            record: Video dict with videoId, title, description, tags, publishedAt, channelTitle
+
+        Returns:
+            Canonical VideoEntity for the record
+        """
+        video_id = record.get("videoId")
+        tags = tuple(sys.intern(tag) for tag in record.get("tags") or [])
+        channel_title = record.get("channelTitle")
+
+        with self._lock:
+            existing = self._entities.get(video_id)
+            if (
+                existing is not None
+                and existing.title == record.get("title")
+                and existing.description == (record.get("description") or "")
+                and existing.tags == tags
+            ):
+                self.stats["intern_hits"] += 1
+                self.stats["bytes_deduplicated"] += existing.text_bytes()
+                return existing
+
+            entity = VideoEntity(
+                video_id=sys.intern(video_id) if video_id else video_id,
+                title=record.get("title"),
+                description=record.get("description") or "",
+                tags=tags,
+                published_at=record.get("publishedAt"),
+                channel_title=sys.intern(channel_title) if channel_title else channel_title
+            )
+            self._entities[video_id] = entity
+            self.stats["intern_misses"] += 1
+            return entity
+
+    def add_snapshot(self, region: str, category: Optional[str], records: List[Dict]) -> Snapshot:
+        """
+        Intern a batch of fetched records and retain them as the latest snapshot for the chart.
+
+        Args:
+            region: Region code of the chart
+            category: Category ID of the chart (optional)
+            records: Video dicts as produced by YouTubeTool
+
+        Returns:
+            The stored Snapshot
+        """
+        snapshot = Snapshot(
+            region=region,
+            category=category,
+            entities=tuple(self.intern(r) for r in records),
+            view_counts=array("q", (r.get("viewCount", 0) for r in records)),
+            like_counts=array("q", (r.get("likeCount", 0) for r in records)),
+            comment_counts=array("q", (r.get("commentCount", 0) for r in records))
+        )
+
+        with self._lock:
+            history = self._snapshots.setdefault(
+                (region, category), deque(maxlen=self.history_size)
+            )
+            history.append(snapshot)
+
+        warm_state.mark_dirty()
+        return snapshot
+
+    def latest_snapshot(self, region: str, category: Optional[str] = None) -> Optional[Snapshot]:
+        """Most recent snapshot for a chart, if any."""
+        with self._lock:
+            history = self._snapshots.get((region, category))
+            return history[-1] if history else None
+
+    def get_history(self, region: str, category: Optional[str] = None) -> List[Snapshot]:
+        """Retained snapshots for a chart, oldest first."""
+        with self._lock:
+            return list(self._snapshots.get((region, category), ()))
+
+    def export_state(self) -> Dict:
+        """Retained snapshots for warm-state persistence: each entity once, snapshots as IDs plus statistics."""
+        with self._lock:
+            charts = [(key, list(history)) for key, history in self._snapshots.items()]
+
+        entities: Dict[str, list] = {}
+        snapshots = []
+        for (region, category), history in charts:
+            for snapshot in history:
+                for entity in snapshot.entities:
+                    if entity.video_id not in entities:
+                        entities[entity.video_id] = [
+                            entity.title, entity.description, list(entity.tags),
+                            entity.published_at, entity.channel_title
+                        ]
+                snapshots.append({
+                    "region": region,
+                    "category": category,
+                    "fetched_at": snapshot.fetched_at,
+                    "video_ids": snapshot.video_ids(),
+                    "view_counts": snapshot.view_counts.tolist(),
+                    "like_counts": snapshot.like_counts.tolist(),
+                    "comment_counts": snapshot.comment_counts.tolist()
+                })
+        return {"entities": entities, "snapshots": snapshots}
+
+    def import_state(self, state: Dict) -> int:
+        """
+        Restore snapshots saved by export_state, oldest first.
+
+        Charts that already have snapshots in this process are left alone.
+
+        Returns:
+            Number of snapshots restored
+        """
+        with self._lock:
+            existing = set(self._snapshots)
+
+        interned: Dict[str, VideoEntity] = {}
+        restored = 0
+        for item in state.get("snapshots", []):
+            key = (item["region"], item["category"])
+            if key in existing:
+                continue
+            entities = []
+            for video_id in item["video_ids"]:
+                entity = interned.get(video_id)
+                if entity is None:
+                    title, description, tags, published_at, channel_title = state["entities"][video_id]
+                    entity = interned[video_id] = self.intern({
+                        "videoId": video_id,
+                        "title": title,
+                        "description": description,
+                        "tags": tags,
+                        "publishedAt": published_at,
+                        "channelTitle": channel_title
+                    })
+                entities.append(entity)
+            snapshot = Snapshot(
+                region=item["region"],
+                category=item["category"],
+                entities=tuple(entities),
+                view_counts=array("q", item["view_counts"]),
+                like_counts=array("q", item["like_counts"]),
+                comment_counts=array("q", item["comment_counts"]),
+                fetched_at=item["fetched_at"]
+            )
+            with self._lock:
+                self._snapshots.setdefault(key, deque(maxlen=self.history_size)).append(snapshot)
+            restored += 1
+        return restored
+
+    def memory_stats(self) -> Dict:
+        """Entity and snapshot memory usage for observability."""
+        with self._lock:
+            entities = list(self._entities.values())
+            snapshots = [s for history in self._snapshots.values() for s in history]
+            stats = self.stats.copy()
+
+        references = sum(len(s) for s in snapshots)
+        return {
+            "entities": len(entities),
+            "entity_text_bytes": sum(e.text_bytes() for e in entities),
+            "snapshots": len(snapshots),
+            "snapshot_bytes": sum(s.nbytes() for s in snapshots),
+            "entity_references": references,
+            "sharing_ratio": round(references / len(entities), 2) if entities else 0.0,
+            **stats
+        }
+
+# Global entity store instance
+entity_store = EntityStore()
+warm_state.register("snapshots", entity_store.export_state, entity_store.import_state)
@@ -0,0 +1,206 @@
+"""
+Background job execution for TrendOps.
+Runs long LLM work off the request path with a bounded worker pool and queue.
+"""
+import asyncio
+import contextvars
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.utils.config import config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+@dataclass
+class Job:
+    """A unit of background work and its result."""
+    job_id: str
+    kind: str
+    status: str = "queued"
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    expires_at: Optional[float] = None
+    context: Optional[contextvars.Context] = field(default=None, repr=False)
+    factory: Optional[Callable[[], Awaitable[Any]]] = field(default=None, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+class JobManager:
+    """
+    Bounded asyncio worker pool with an in-memory result store.
+
+    At most max_workers jobs run concurrently and at most max_queue wait;
+    further submissions raise QueueFullError so callers can apply
+    backpressure. Finished jobs are kept for result_ttl seconds.
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None, result_ttl: int = None):
+        self.max_workers = max_workers or config.JOB_MAX_WORKERS
+        self.max_queue = max_queue or config.JOB_MAX_QUEUE
+        self.result_ttl = result_ttl or config.JOB_RESULT_TTL_SECONDS
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._loop = None
+
+    def _ensure_workers(self):
+        """Start workers on the running loop the first time a job is submitted."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        # Workers get a clean context so they don't inherit the first submitter's request scope
+        self._workers = [
+            loop.create_task(self._worker(i), context=contextvars.Context()) for i in range(self.max_workers)
+        ]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status != "queued":
+                    continue  # cancelled while waiting
+
+                job.status = "running"
+                job.started_at = datetime.utcnow().isoformat()
+                # Run in the submitter's context so records keep its request ID
+                job.task = asyncio.get_running_loop().create_task(job.factory(), context=job.context)
+
+                try:
+                    job.result = await job.task
+                    job.status = "succeeded"
+                except asyncio.CancelledError:
+                    if job.task.cancelled():
+                        job.status = "cancelled"
+                    # The worker itself is being cancelled (shutdown cancels the job with it)
+                    if not job.task.cancelled() or asyncio.current_task().cancelling():
+                        raise
+                except Exception as e:
+                    job.status = "failed"
+                    job.error = str(e)
+                    logger.error("Background job failed", job_id=job.job_id, kind=job.kind, error=str(e))
+            finally:
+                if job.done:
+                    job.finished_at = job.finished_at or datetime.utcnow().isoformat()
+                    job.expires_at = time.time() + self.result_ttl
+                    job.factory = None
+                    job.context = None
+                    job.task = None
+                self._queue.task_done()
+
+    async def shutdown(self):
+        """Cancel the workers and the jobs they are running (called when the app shuts down)."""
+        workers, self._workers = self._workers, []
+        if not workers or self._loop is not asyncio.get_running_loop():
+            return
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._loop = None
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [jid for jid, job in self._jobs.items() if job.expires_at and job.expires_at < now]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def has_capacity(self) -> bool:
+        """Whether a submission would currently be accepted."""
+        return self._queue is None or not self._queue.full()
+
+    def submit(self, kind: str, factory: Callable[[], Awaitable[Any]]) -> Job:
+        """
+        Queue a coroutine factory for background execution.
+
+        Args:
+            kind: Job type label (e.g. "intelligence")
+            factory: Zero-argument callable returning the coroutine to run
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self._ensure_workers()
+        self._purge_expired()
+
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, factory=factory, context=contextvars.copy_context())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_queue} pending)")
+
+        self._jobs[job.job_id] = job
+        logger.info("Background job queued", job_id=job.job_id, kind=kind, queue_depth=self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job that has not yet expired."""
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        A queued job is cancelled immediately. A running job is marked
+        "cancelling" until its task unwinds, then "cancelled".
+
+        Returns:
+            True if cancellation was requested, False if unknown or already finished
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow().isoformat()
+            job.expires_at = time.time() + self.result_ttl
+            job.factory = None
+            job.context = None
+        elif job.task is not None:
+            job.status = "cancelling"
+            job.task.cancel()
+        return True
+
+    def stats(self) -> Dict:
+        """Queue and job counts for observability."""
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "jobs": counts
+        }
+
+# Global job manager instance
+job_manager = JobManager()
@@ -0,0 +1,181 @@
+"""
+Persistent LLM result cache for TrendOps.
+Stores intelligence reports on disk keyed by a normalized hash of the analytics context.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from app.utils.config import config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class LLMCache:
+    """
+    SQLite-backed cache for intelligence reports.
+
+    Keys hash the generating model and the normalized context the LLM
+    sees: region, category, theme terms, keywords and engagement rounded to
+    LLM_CACHE_ENGAGEMENT_STEP. Reports are only reused for the model that
+    wrote them, so stub output from offline runs never stands in for a real
+    model's (or the reverse).
+    Entries expire after ttl_seconds and the least recently used entries
+    are evicted past max_entries. When near_match_threshold is set, a miss
+    can reuse a report whose theme/keyword set overlaps the request's by at
+    least that Jaccard similarity.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        ttl_seconds: int = None,
+        max_entries: int = None,
+        near_match_threshold: Optional[float] = None
+    ):
+        self.path = path or config.LLM_CACHE_PATH
+        self.ttl_seconds = ttl_seconds or config.LLM_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or config.LLM_CACHE_MAX_ENTRIES
+        self.near_match_threshold = (
+            near_match_threshold if near_match_threshold is not None
+            else config.LLM_CACHE_NEAR_MATCH_THRESHOLD
+        )
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the cache database on first use."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reports (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    terms TEXT NOT NULL,
+                    report TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS reports_scope ON reports (scope)")
+            self._conn.commit()
+        return self._conn
+
+    def normalize(self, analytics_data: Dict, raw_data: Dict, model: str) -> Tuple[str, str, frozenset]:
+        """
+        Reduce the analytics context to its cache identity.
+
+        Args:
+            analytics_data: Analytics results the report is generated from
+            raw_data: Trending data (its metadata gives region and category)
+            model: Backend and model generating the report, e.g. "gemini/gemini-1.5-flash"
+
+        Returns:
+            (key, scope, terms): content hash, model/region/category scope, and
+            the theme/keyword term set used for near-match comparison
+        """
+        metadata = raw_data.get("metadata", {})
+        scope = f"{model}|{metadata.get('region', 'Unknown')}:{metadata.get('category') or '*'}"
+
+        step = config.LLM_CACHE_ENGAGEMENT_STEP
+        themes = sorted(
+            (
+                theme.get("theme") or "",
+                round((theme.get("avg_engagement") or 0) / step) * step
+            )
+            for theme in analytics_data.get("topThemes", [])[:5]
+        )
+        keywords = sorted(kw.get("keyword") for kw in analytics_data.get("topKeywords", [])[:10])
+        avg_engagement = analytics_data.get("metrics", {}).get("avg_engagement", 0) or 0
+
+        normalized = {
+            "scope": scope,
+            "themes": themes,
+            "keywords": keywords,
+            "avg_engagement": round(avg_engagement / step) * step,
+            "has_anomalies": bool(analytics_data.get("anomalies"))
+        }
+        key = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+        terms = frozenset(name for name, _ in themes) | frozenset(keywords)
+        return key, scope, terms
+
+    def get(self, analytics_data: Dict, raw_data: Dict, model: str) -> Optional[Tuple[Dict, int, str]]:
+        """
+        Look up a cached report.
+
+        Returns:
+            (report, tokens, match) where match is "exact" or "near", or None on a miss
+        """
+        key, scope, terms = self.normalize(analytics_data, raw_data, model)
+        now = time.time()
+        cutoff = now - self.ttl_seconds
+
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT key, report, tokens FROM reports WHERE key = ? AND created_at >= ?",
+                (key, cutoff)
+            ).fetchone()
+            match = "exact"
+
+            if row is None and self.near_match_threshold:
+                best, best_similarity = None, 0.0
+                for candidate_key, candidate_terms, report, tokens in conn.execute(
+                    "SELECT key, terms, report, tokens FROM reports WHERE scope = ? AND created_at >= ?",
+                    (scope, cutoff)
+                ):
+                    candidate = frozenset(json.loads(candidate_terms))
+                    union = terms | candidate
+                    similarity = len(terms & candidate) / len(union) if union else 0.0
+                    if similarity > best_similarity:
+                        best, best_similarity = (candidate_key, report, tokens), similarity
+
+                if best is not None and best_similarity >= self.near_match_threshold:
+                    row, match = best, "near"
+
+            if row is None:
+                return None
+
+            conn.execute("UPDATE reports SET last_access = ? WHERE key = ?", (now, row[0]))
+            conn.commit()
+
+        return json.loads(row[1]), row[2], match
+
+    def put(self, analytics_data: Dict, raw_data: Dict, model: str, report: Dict, tokens: int):
+        """Store a report, then drop expired entries and evict LRU entries past the cap."""
+        key, scope, terms = self.normalize(analytics_data, raw_data, model)
+        now = time.time()
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, json.dumps(sorted(terms)), json.dumps(report), tokens, now, now)
+            )
+            conn.execute("DELETE FROM reports WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """
+                DELETE FROM reports WHERE key IN (
+                    SELECT key FROM reports ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def clear(self):
+        """Remove every cached report."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM reports")
+            conn.commit()
+
+# Global LLM cache instance
+llm_cache = LLMCache()
@@ -0,0 +1,248 @@
+"""
+On-demand request profiling for TrendOps.
+Runs admin-flagged requests under a sampling or deterministic profiler and keeps the profiles by request ID.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from app.utils.config import config
+from app.utils.cost_tracker import tracker
+from app.utils.logging import get_logger
+from app.utils.stage_graph import STAGE_THREAD_PREFIX
+
+logger = get_logger(__name__)
+
+PROFILE_MODES = ("sample", "cprofile")
+
+def is_admin(headers: Headers) -> bool:
+    """Whether the caller presented the configured admin token."""
+    token = headers.get("x-admin-token")
+    return bool(config.ADMIN_TOKEN and token and hmac.compare_digest(token, config.ADMIN_TOKEN))
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _is_idle_worker(frame) -> bool:
+    """Whether a pool thread is blocked waiting for work rather than running a stage."""
+    code = frame.f_code
+    return code.co_name == "_worker" and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py"))
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler for one thread plus the stage worker pool.
+
+    A background thread snapshots the target thread's stack, and those of
+    any busy threads named with thread_prefix, every interval_ms and counts
+    identical stacks. Each stack is rooted at its thread's name, so stage
+    work shows up under "trendops-stage_<n>" rather than being invisible
+    behind run_in_executor. Time spent waiting on upstreams shows up as
+    samples in the event loop's selector. The pool is shared, so stage work
+    from concurrent requests is sampled too.
+    """
+
+    def __init__(self, thread_id: int, interval_ms: float, thread_prefix: Optional[str] = STAGE_THREAD_PREFIX):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.thread_prefix = thread_prefix
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trendops-profiler", daemon=True)
+
+    def _thread_names(self) -> Dict[int, str]:
+        """Threads to sample this tick, by ident."""
+        names = {}
+        for thread in threading.enumerate():
+            if thread.ident == self.thread_id:
+                names[thread.ident] = thread.name
+            elif self.thread_prefix and thread.name.startswith(self.thread_prefix):
+                names[thread.ident] = thread.name
+        return names
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, name in self._thread_names().items():
+                frame = frames.get(thread_id)
+                # Idle pool workers sit in ThreadPoolExecutor's _worker loop; skip them
+                if frame is None or (thread_id != self.thread_id and _is_idle_worker(frame)):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(name)
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def _sample_table(stacks: Counter, limit: int) -> List[Dict]:
+    """Per-function self/total sample counts from collapsed stacks."""
+    total = sum(stacks.values()) or 1
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    return [
+        {
+            "function": function,
+            "self_samples": self_counts[function],
+            "total_samples": samples,
+            "self_pct": round(self_counts[function] * 100 / total, 1),
+            "total_pct": round(samples * 100 / total, 1)
+        }
+        for function, samples in total_counts.most_common(limit)
+    ]
+
+def _cprofile_table(profiler: cProfile.Profile, limit: int) -> List[Dict]:
+    """Top functions by cumulative time from a cProfile run."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (primitive, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "ncalls": calls,
+            "primitive_calls": primitive,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3)
+        })
+    rows.sort(key=lambda row: row["cumtime_ms"], reverse=True)
+    return rows[:limit]
+
+class ProfileStore:
+    """Most recent profiles, keyed by request ID."""
+
+    def __init__(self, max_profiles: int = None):
+        self.max_profiles = max_profiles or config.PROFILE_MAX_STORED
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, profile: Dict):
+        with self._lock:
+            self._profiles[profile["request_id"]] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._profiles.get(request_id)
+
+    def list(self) -> List[Dict]:
+        """Profile summaries, newest first."""
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key not in ("stacks", "table")}
+                for profile in reversed(self._profiles.values())
+            ]
+
+def collapsed_stacks(profile: Dict) -> str:
+    """Render a sampled profile in collapsed-stack format (flamegraph.pl, speedscope)."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(profile.get("stacks", {}).items()))
+
+class ProfilingMiddleware:
+    """
+    Profile requests flagged with `X-Profile: <mode>` or `?profile=<mode>`.
+
+    Only callers presenting X-Admin-Token are profiled; everyone else gets
+    the plain request. Mode is "sample" (default, wall-clock stack
+    sampling) or "cprofile" (deterministic). One request is profiled at a
+    time; other flagged requests run unprofiled with X-Profile-Status: busy.
+    Profiled responses carry X-Request-ID, under which the profile is stored.
+
+    The middleware is only installed when PROFILING_ENABLED is set, so
+    there is no per-request cost otherwise.
+    """
+
+    def __init__(self, app, store: ProfileStore = None):
+        self.app = app
+        self.store = store or profile_store
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        mode = headers.get("x-profile") or QueryParams(scope.get("query_string", b"")).get("profile")
+        if not mode or not is_admin(headers):
+            await self.app(scope, receive, send)
+            return
+
+        mode = mode.lower()
+        if mode in ("1", "true", "yes"):
+            mode = "sample"
+        if mode not in PROFILE_MODES or not self._busy.acquire(blocking=False):
+            status = "busy" if mode in PROFILE_MODES else "invalid-mode"
+            await self.app(scope, receive, self._with_headers(send, {"X-Profile-Status": status}))
+            return
+
+        request_id = uuid.uuid4().hex
+        tracker.bind_request_id(request_id)
+        sampler = profiler = None
+        started = time.perf_counter()
+        try:
+            if mode == "sample":
+                sampler = StackSampler(threading.get_ident(), config.PROFILE_SAMPLE_INTERVAL_MS)
+                sampler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+
+            await self.app(scope, receive, self._with_headers(send, {"X-Request-ID": request_id, "X-Profile-Status": mode}))
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            if profiler is not None:
+                profiler.disable()
+            duration_ms = (time.perf_counter() - started) * 1000
+            self._busy.release()
+
+        profile = {
+            "request_id": request_id,
+            "path": scope.get("path"),
+            "mode": mode,
+            "created_at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 3)
+        }
+        if sampler is not None:
+            profile["samples"] = sum(sampler.stacks.values())
+            profile["interval_ms"] = config.PROFILE_SAMPLE_INTERVAL_MS
+            profile["stacks"] = dict(sampler.stacks)
+            profile["table"] = _sample_table(sampler.stacks, config.PROFILE_TABLE_ROWS)
+        else:
+            profile["table"] = _cprofile_table(profiler, config.PROFILE_TABLE_ROWS)
+        self.store.put(profile)
+
+        logger.info("Request profiled", request_id=request_id, mode=mode, path=profile["path"], duration_ms=profile["duration_ms"])
+
+    @staticmethod
+    def _with_headers(send, extra: Dict[str, str]):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                for key, value in extra.items():
+                    headers[key] = value
+            await send(message)
+        return send_wrapper
+
+# Global profile store
+profile_store = ProfileStore()
@@ -0,0 +1,127 @@
+"""
+Response serialization for TrendOps.
+Field projection for large payloads and a fast JSON response class.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import msgspec
+from fastapi.responses import JSONResponse
+
+# Preset for the dashboard: keeps what renderResults reads and drops bulk text
+LEAN_VIEW_FIELDS = (
+    "status,"
+    "data.metadata,"
+    "data.videos[*].videoId,data.videos[*].title,data.videos[*].viewCount,"
+    "analytics,intelligence,intelligence_job,degraded,"
+    "governance.executionLog,governance.sessionStats,"
+    "-intelligence.fullReport"
+)
+
+def _enc_hook(obj: Any) -> Any:
+    """Encode NumPy scalars and arrays produced by the scoring tool."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise NotImplementedError(f"Cannot serialize {type(obj).__name__}")
+
+_encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with msgspec instead of the stdlib encoder."""
+
+    @staticmethod
+    def encode(content: Any) -> bytes:
+        """Encode content to JSON bytes without building a response."""
+        return _encoder.encode(content)
+
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
+
+def _parse_path(path: str) -> List[Tuple[str, bool]]:
+    """Split 'data.videos[*].title' into [('data', False), ('videos', True), ('title', False)]."""
+    segments = []
+    for segment in path.split("."):
+        if segment.endswith("[*]"):
+            segments.append((segment[:-3], True))
+        else:
+            segments.append((segment, False))
+    return segments
+
+def _exclude(obj: Any, segments: List[Tuple[str, bool]]) -> Any:
+    """Return a copy of obj with the path removed. Shared inputs are never mutated."""
+    if not isinstance(obj, dict) or not segments:
+        return obj
+
+    (key, each), rest = segments[0], segments[1:]
+    if key not in obj:
+        return obj
+
+    if not rest:
+        return {k: v for k, v in obj.items() if k != key}
+
+    child = obj[key]
+    if each and isinstance(child, list):
+        child = [_exclude(item, rest) for item in child]
+    else:
+        child = _exclude(child, rest)
+    return {**obj, key: child}
+
+def _add_include(tree: Dict, segments: List[Tuple[str, bool]]):
+    """Merge an include path into the include tree."""
+    for i, (key, each) in enumerate(segments):
+        node = tree.setdefault(key, {"each": each, "children": {}, "leaf": False})
+        if i == len(segments) - 1:
+            node["leaf"] = True
+        tree = node["children"]
+
+def _include(obj: Any, tree: Dict) -> Any:
+    """Keep only the paths present in the include tree."""
+    if not isinstance(obj, dict):
+        return obj
+
+    result = {}
+    for key, node in tree.items():
+        if key not in obj:
+            continue
+        child = obj[key]
+        if node["leaf"]:
+            result[key] = child
+        elif node["each"] and isinstance(child, list):
+            result[key] = [_include(item, node["children"]) for item in child]
+        else:
+            result[key] = _include(child, node["children"])
+    return result
+
+def project_fields(payload: Dict, fields: Optional[str]) -> Dict:
+    """
+    Apply a fields= projection to a response payload.
+
+    Paths are comma-separated and dot-delimited; `[*]` maps over a list.
+    Plain paths are included (everything else is dropped); paths prefixed
+    with `-` are excluded. Includes are applied before excludes.
+
+    Example: "-data.videos[*].description,-governance.executionLog"
+
+    Args:
+        payload: Response payload
+        fields: Projection expression (None or empty keeps everything)
+
+    Returns:
+        Projected payload
+    """
+    if not fields:
+        return payload
+
+    include_tree: Dict = {}
+    excludes = []
+    for path in (p.strip() for p in fields.split(",")):
+        if not path:
+            continue
+        if path.startswith("-"):
+            excludes.append(_parse_path(path[1:]))
+        else:
+            _add_include(include_tree, _parse_path(path))
+
+    if include_tree:
+        payload = _include(payload, include_tree)
+    for segments in excludes:
+        payload = _exclude(payload, segments)
+    return payload
@@ -0,0 +1,209 @@
+"""
+Stage-graph executor for TrendOps.
+Runs stages with declared inputs and outputs as a DAG, concurrently where dependencies allow.
+"""
+import asyncio
+import contextvars
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.utils.config import config
+from app.utils.tracing import tracer
+
+# Worker threads are named "<prefix>_<n>"; the request profiler samples them by this prefix
+STAGE_THREAD_PREFIX = "trendops-stage"
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for blocking stages, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config.STAGE_WORKERS, thread_name_prefix=STAGE_THREAD_PREFIX)
+    return _executor
+
+@dataclass
+class Stage:
+    """
+    A node in a stage graph.
+
+    func receives the stage's inputs as keyword arguments and returns its
+    single output, or a tuple matching outputs when there are several.
+    Coroutine functions are awaited on the event loop; plain functions run
+    on the worker pool unless inline is set (for trivial glue code).
+    A stage with emits=True also receives an `emit(event, payload)`
+    callback for intermediate events, surfaced by StageGraph.iterate.
+    """
+    name: str
+    func: Callable
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    inline: bool = False
+    emits: bool = False
+
+class StageGraph:
+    """
+    A DAG of stages, wired by matching output names to input names.
+
+    Values not produced by any stage must be supplied when the graph runs.
+    Requesting a subset of outputs runs only the stages they depend on.
+    """
+
+    def __init__(self, name: str, stages: List[Stage]):
+        self.name = name
+        self.stages = {stage.name: stage for stage in stages}
+        self.producers: Dict[str, Stage] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"{name}: output {output!r} produced by both {self.producers[output].name} and {stage.name}")
+                self.producers[output] = stage
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"{self.name}: cycle through stage {stage.name!r}")
+            visiting.add(stage.name)
+            for value in stage.inputs:
+                if value in self.producers:
+                    visit(self.producers[value])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+
+        for stage in self.stages.values():
+            visit(stage)
+
+    def plan(self, outputs: Optional[Iterable[str]] = None, provided: Iterable[str] = ()) -> List[Stage]:
+        """
+        Stages needed for the requested outputs (all outputs when None), in dependency order.
+
+        Raises:
+            ValueError: If an output is unknown or a required input is neither produced nor provided
+        """
+        provided = set(provided)
+        wanted = list(outputs) if outputs is not None else list(self.producers)
+        ordered: List[Stage] = []
+        seen: Set[str] = set()
+
+        def require(value: str):
+            if value in provided:
+                return
+            stage = self.producers.get(value)
+            if stage is None:
+                raise ValueError(f"{self.name}: no stage produces {value!r} and it was not provided")
+            if stage.name in seen:
+                return
+            seen.add(stage.name)
+            for dependency in stage.inputs:
+                require(dependency)
+            ordered.append(stage)
+
+        for value in wanted:
+            require(value)
+        return ordered
+
+    async def iterate(
+        self,
+        inputs: Dict[str, Any],
+        outputs: Optional[Iterable[str]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run the graph, yielding events as stages complete.
+
+        Yields ("stage", (name, {output: value}, duration_ms)) when a stage
+        finishes and (event, payload) for anything a stage emits. A failing
+        stage cancels the rest and its exception propagates.
+        """
+        stages = self.plan(outputs, inputs)
+        values = dict(inputs)
+        events: asyncio.Queue = asyncio.Queue()
+        pending = {stage.name: stage for stage in stages}
+        running: Dict[asyncio.Task, Stage] = {}
+        loop = asyncio.get_running_loop()
+
+        def emit(event: str, payload: Any):
+            events.put_nowait((event, payload))
+
+        async def run_stage(stage: Stage) -> Tuple[Dict[str, Any], float]:
+            kwargs = {name: values[name] for name in stage.inputs}
+            if stage.emits:
+                kwargs["emit"] = emit
+            started = time.perf_counter()
+            with tracer.span(f"{self.name}.{stage.name}"):
+                if inspect.iscoroutinefunction(stage.func):
+                    result = await stage.func(**kwargs)
+                elif stage.inline:
+                    result = stage.func(**kwargs)
+                else:
+                    # Copy the context so request scope and span parent follow the stage into the pool
+                    ctx = contextvars.copy_context()
+                    result = await loop.run_in_executor(get_stage_executor(), lambda: ctx.run(stage.func, **kwargs))
+            duration_ms = (time.perf_counter() - started) * 1000
+            if len(stage.outputs) == 1:
+                result = (result,)
+            return dict(zip(stage.outputs, result)), duration_ms
+
+        def launch_ready():
+            for name, stage in list(pending.items()):
+                if all(value in values for value in stage.inputs):
+                    del pending[name]
+                    running[asyncio.ensure_future(run_stage(stage))] = stage
+
+        done, getter = set(), None
+        try:
+            launch_ready()
+            while running:
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait([*running, getter], return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                else:
+                    getter.cancel()
+                # Everything a stage emitted goes out before its own completion event
+                while not events.empty():
+                    yield events.get_nowait()
+                for task in done:
+                    if task is getter:
+                        continue
+                    stage = running.pop(task)
+                    produced, duration_ms = task.result()
+                    values.update(produced)
+                    yield "stage", (stage.name, produced, duration_ms)
+                launch_ready()
+            while not events.empty():
+                yield events.get_nowait()
+        finally:
+            for task in running:
+                task.cancel()
+            if getter is not None:
+                getter.cancel()
+            for task in done:
+                # Retrieve sibling failures so they are not reported as unhandled
+                if task.done() and not task.cancelled():
+                    task.exception()
+
+    async def run(
+        self,
+        inputs: Dict[str, Any],
+        outputs: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Run the graph to completion.
+
+        Returns:
+            (values, timings): every input and produced value, and per-stage duration in ms
+        """
+        values, timings = dict(inputs), {}
+        async for event, payload in self.iterate(inputs, outputs):
+            if event == "stage":
+                name, produced, duration_ms = payload
+                values.update(produced)
+                timings[name] = round(duration_ms, 3)
+        return values, timings
@@ -0,0 +1,89 @@
+"""
+Startup timing for TrendOps.
+Measures import and startup phases against a cold-start budget and records when lazy components are first initialized.
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Taken when app.main starts importing (this module is imported first)
+_IMPORT_STARTED = time.perf_counter()
+
+# Heavy optional dependencies that should only load on first use
+HEAVY_MODULES = ("numpy", "mcp", "jinja2", "google.generativeai")
+
+class StartupTimer:
+    """
+    Cold-start timings for one process.
+
+    import_ms covers importing app.main; phases are startup steps (e.g.
+    warm-state rehydration); lazy_init records how long each lazily
+    initialized component took on its first use.
+    """
+
+    def __init__(self):
+        self.import_ms: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+        self.lazy_init: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def finish_import(self, budget_ms: float) -> float:
+        """
+        Record the import time of app.main and check it against the budget.
+
+        Returns:
+            Import time in ms
+        """
+        from app.utils.logging import get_logger
+
+        self.import_ms = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+        logger = get_logger(__name__)
+        if budget_ms and self.import_ms > budget_ms:
+            logger.warning(
+                "Import time over budget",
+                import_ms=self.import_ms,
+                budget_ms=budget_ms,
+                heavy_modules_loaded=[m for m in HEAVY_MODULES if m in sys.modules]
+            )
+        else:
+            logger.info("Application imported", import_ms=self.import_ms, budget_ms=budget_ms)
+        return self.import_ms
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a startup step."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    @contextmanager
+    def lazy(self, name: str):
+        """Time the first-use initialization of a lazily created component."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.lazy_init.setdefault(name, round((time.perf_counter() - started) * 1000, 1))
+
+    def report(self, budget_ms: float) -> Dict:
+        """Startup timing report for observability."""
+        with self._lock:
+            phases, lazy_init = dict(self.phases), dict(self.lazy_init)
+        return {
+            "import_ms": self.import_ms,
+            "import_budget_ms": budget_ms,
+            "within_budget": self.import_ms is not None and (not budget_ms or self.import_ms <= budget_ms),
+            "phases_ms": phases,
+            "lazy_init_ms": lazy_init,
+            "heavy_modules_loaded": {m: m in sys.modules for m in HEAVY_MODULES},
+            "uptime_seconds": round(time.perf_counter() - _IMPORT_STARTED, 1)
+        }
+
+# Global startup timer instance
+startup = StartupTimer()
@@ -0,0 +1,514 @@
+"""
+Tag co-occurrence index for TrendOps.
+Per-region sparse counts of tag pairs on trending videos, maintained incrementally from every fetch and queried for related tags, tag communities and emerging pairs.
+"""
+import re
+import threading
+import time
+import math
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from app.utils.config import config
+from app.utils.logging import get_logger
+from app.utils.metrics import metrics
+from app.utils.warm_state import warm_state
+
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Pairs seen on a single video are dropped at compaction once their recent weight decays below this
+_PRUNE_RECENT_WEIGHT = 0.01
+_COMMUNITY_ITERATIONS = 20
+
+@lru_cache(maxsize=None)
+def _upper_pairs(n: int):
+    """Index pairs (i < j) of an n-tag video, shared by every video with n tags."""
+    import numpy as np
+
+    return np.triu_indices(n, 1)
+
+def normalize_tag(tag: str) -> str:
+    """Case- and spacing-insensitive form of a tag ("#Minecraft  Mods" -> "minecraft mods")."""
+    return _WHITESPACE.sub(" ", tag.strip().lstrip("#")).strip().lower()
+
+class RegionTagIndex:
+    """
+    Tag pair counts for one region, held as COO arrays.
+
+    Each video contributes once, when first seen: every pair of its first
+    TAG_INDEX_MAX_TAGS_PER_VIDEO (normalized) tags is appended to a pending
+    buffer. Compaction merges the buffer into sorted, deduplicated
+    (row < col) arrays with two weights per pair: `counts` (videos carrying
+    both tags) and `recent`, the same count decayed with a half-life of
+    TAG_INDEX_HALF_LIFE_SECONDS. It runs once the buffer holds
+    TAG_INDEX_COMPACT_THRESHOLD pairs and before queries, and rebuilds a
+    symmetric CSR adjacency so per-tag lookups only touch that tag's row.
+
+    Seen video IDs are remembered by last sighting and forgotten once
+    unseen for as long as a single-video pair takes to decay below the
+    prune weight, or beyond TAG_INDEX_MAX_SEEN_VIDEOS.
+
+    Not thread-safe on its own; TagIndex serializes access per region.
+    """
+
+    def __init__(self, region: str):
+        import numpy as np
+
+        self.region = region
+        self.lock = threading.Lock()
+        self.vocab: Dict[str, int] = {}
+        self.tags: List[str] = []
+        self.tag_counts: List[int] = []
+        # videoId -> last time it was on the chart, least recently seen first
+        self.seen_videos: "OrderedDict[str, float]" = OrderedDict()
+        self.rows = np.empty(0, dtype=np.int32)
+        self.cols = np.empty(0, dtype=np.int32)
+        self.counts = np.empty(0, dtype=np.int32)
+        self.recent = np.empty(0, dtype=np.float64)
+        # Time at which `recent` was last decayed
+        self.recent_at = time.time()
+        self._pending: List[Tuple["np.ndarray", "np.ndarray", float]] = []
+        self.pending_pairs = 0
+        self.compactions = 0
+        # Set when videos were added since the last compaction (tag counts and vocabulary change even without pairs)
+        self._stale = True
+        self._df = np.empty(0, dtype=np.int64)
+        self._csr = None
+        self._labels: Dict[Tuple[int, float], "np.ndarray"] = {}
+
+    def _decay(self, age_seconds: float) -> float:
+        return 0.5 ** (max(0.0, age_seconds) / config.TAG_INDEX_HALF_LIFE_SECONDS)
+
+    def tag_ids(self, tags: List[str], create: bool = False) -> List[int]:
+        """Vocabulary ids of a video's distinct tags, in upload order; unknown tags are added only when create is set."""
+        ids, seen = [], set()
+        for tag in tags[:config.TAG_INDEX_MAX_TAGS_PER_VIDEO]:
+            tag = normalize_tag(tag)
+            if not tag or tag in seen:
+                continue
+            seen.add(tag)
+            tag_id = self.vocab.get(tag)
+            if tag_id is None:
+                if not create:
+                    continue
+                tag_id = self.vocab[tag] = len(self.tags)
+                self.tags.append(tag)
+                self.tag_counts.append(0)
+            ids.append(tag_id)
+        return ids
+
+    def add_videos(self, videos: List[Dict], now: float) -> int:
+        """
+        Append the tag pairs of videos not seen before.
+
+        Returns:
+            Number of new videos
+        """
+        import numpy as np
+
+        rows, cols, added = [], [], 0
+        for video in videos:
+            video_id = video.get("videoId")
+            if not video_id:
+                continue
+            if video_id in self.seen_videos:
+                self.seen_videos[video_id] = now
+                self.seen_videos.move_to_end(video_id)
+                continue
+            self.seen_videos[video_id] = now
+            added += 1
+            ids = self.tag_ids(video.get("tags") or [], create=True)
+            for tag_id in ids:
+                self.tag_counts[tag_id] += 1
+            if len(ids) < 2:
+                continue
+            ids = np.array(sorted(ids), dtype=np.int32)
+            upper_i, upper_j = _upper_pairs(len(ids))
+            rows.append(ids[upper_i])
+            cols.append(ids[upper_j])
+
+        self._forget_videos(now)
+        if added:
+            self._stale = True
+        if rows:
+            chunk = (np.concatenate(rows), np.concatenate(cols), now)
+            self._pending.append(chunk)
+            self.pending_pairs += len(chunk[0])
+        if self.pending_pairs >= config.TAG_INDEX_COMPACT_THRESHOLD:
+            self.compact(now)
+        return added
+
+    def _forget_videos(self, now: float):
+        """Drop seen IDs whose pairs would have decayed away, and the least recently seen past the cap."""
+        retention = config.TAG_INDEX_HALF_LIFE_SECONDS * math.log2(1 / _PRUNE_RECENT_WEIGHT)
+        while self.seen_videos:
+            video_id, last_seen = next(iter(self.seen_videos.items()))
+            if now - last_seen <= retention and len(self.seen_videos) <= config.TAG_INDEX_MAX_SEEN_VIDEOS:
+                break
+            del self.seen_videos[video_id]
+
+    def compact(self, now: float):
+        """Merge pending pairs into the COO arrays, decay recent weights and rebuild the adjacency."""
+        import numpy as np
+
+        n = len(self.tags)
+        recent = self.recent * self._decay(now - self.recent_at)
+        if self._pending:
+            rows = np.concatenate([self.rows] + [chunk[0] for chunk in self._pending])
+            cols = np.concatenate([self.cols] + [chunk[1] for chunk in self._pending])
+            counts = np.concatenate([self.counts, np.ones(self.pending_pairs, dtype=np.int32)])
+            recent = np.concatenate([recent] + [
+                np.full(len(chunk[0]), self._decay(now - chunk[2])) for chunk in self._pending
+            ])
+
+            keys = rows.astype(np.int64) * n + cols
+            unique, inverse = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int32)
+            recent = np.bincount(inverse, weights=recent, minlength=len(unique))
+            rows, cols = (unique // n).astype(np.int32), (unique % n).astype(np.int32)
+
+            keep = (counts > 1) | (recent >= _PRUNE_RECENT_WEIGHT)
+            self.rows, self.cols, self.counts, recent = rows[keep], cols[keep], counts[keep], recent[keep]
+            self._pending = []
+            self.pending_pairs = 0
+
+        self.recent = recent
+        self.recent_at = now
+        self.compactions += 1
+        self._stale = False
+        self._rebuild(n)
+
+    def _rebuild(self, n: int):
+        import numpy as np
+
+        self._df = np.asarray(self.tag_counts, dtype=np.int64)
+        src = np.concatenate([self.rows, self.cols])
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(src, minlength=n))
+        self._csr = (
+            indptr,
+            np.concatenate([self.cols, self.rows])[order],
+            np.concatenate([self.counts, self.counts])[order],
+            np.concatenate([self.recent, self.recent])[order]
+        )
+        self._labels = {}
+
+    def ensure_compacted(self):
+        if self._stale:
+            self.compact(time.time())
+
+    def _jaccard(self, rows, cols, counts):
+        """Pair count over the number of videos carrying either tag."""
+        return counts / (self._df[rows] + self._df[cols] - counts)
+
+    def related(self, tag: str, limit: int) -> List[Dict]:
+        import numpy as np
+
+        tag_id = self.vocab.get(normalize_tag(tag))
+        if tag_id is None:
+            return []
+        indptr, neighbors, counts, recent = self._csr
+        start, end = indptr[tag_id], indptr[tag_id + 1]
+        neighbors, counts, recent = neighbors[start:end], counts[start:end], recent[start:end]
+        jaccard = self._jaccard(np.full(len(neighbors), tag_id), neighbors, counts)
+        decay = self._decay(time.time() - self.recent_at)
+        top = np.lexsort((-jaccard, -counts))[:limit]
+        return [
+            {
+                "tag": self.tags[neighbors[i]],
+                "count": int(counts[i]),
+                "jaccard": round(float(jaccard[i]), 3),
+                "recent": round(float(recent[i] * decay), 2)
+            }
+            for i in top
+        ]
+
+    def community_labels(self, min_count: int, min_jaccard: float):
+        """
+        Community label per tag, by weighted label propagation over pairs
+        with at least min_count videos and min_jaccard overlap.
+
+        The overlap threshold keeps ubiquitous tags ("funny", "shorts") from
+        chaining unrelated topics together. Labels update synchronously; each
+        tag also votes for its own label with its strongest edge weight and
+        ties go to the smallest label, which stops two-node oscillation.
+        """
+        import numpy as np
+
+        key = (min_count, min_jaccard)
+        if key in self._labels:
+            return self._labels[key]
+
+        n = len(self.tags)
+        labels = np.arange(n)
+        mask = (self.counts >= min_count) & (self._jaccard(self.rows, self.cols, self.counts) >= min_jaccard)
+        if mask.any():
+            rows, cols, weights = self.rows[mask], self.cols[mask], self.counts[mask].astype(np.float64)
+            strongest = np.zeros(n)
+            np.maximum.at(strongest, rows, weights)
+            np.maximum.at(strongest, cols, weights)
+            nodes = np.flatnonzero(strongest)
+            src = np.concatenate([rows, cols, nodes])
+            dst = np.concatenate([cols, rows, nodes])
+            weights = np.concatenate([weights, weights, strongest[nodes]])
+
+            for _ in range(_COMMUNITY_ITERATIONS):
+                unique, inverse = np.unique(src.astype(np.int64) * n + labels[dst], return_inverse=True)
+                score = np.bincount(inverse, weights=weights)
+                node, label = unique // n, unique % n
+                order = np.lexsort((label, -score, node))
+                first = order[np.r_[True, node[order][1:] != node[order][:-1]]]
+                updated = labels.copy()
+                updated[node[first]] = label[first]
+                if np.array_equal(updated, labels):
+                    break
+                labels = updated
+
+        self._labels[key] = labels
+        return labels
+
+    def communities(self, limit: int, min_count: int, min_jaccard: float, max_tags: int) -> List[Dict]:
+        import numpy as np
+
+        labels = self.community_labels(min_count, min_jaccard)
+        same = labels[self.rows] == labels[self.cols]
+        internal = np.bincount(labels[self.rows[same]], weights=self.counts[same], minlength=len(self.tags))
+        sizes = np.bincount(labels, minlength=len(self.tags))
+
+        result = []
+        for label in np.argsort(-internal, kind="stable"):
+            if len(result) >= limit or internal[label] <= 0:
+                break
+            if sizes[label] < 2:
+                continue
+            members = np.flatnonzero(labels == label)
+            members = members[np.argsort(-self._df[members], kind="stable")]
+            result.append({
+                "tags": [self.tags[i] for i in members[:max_tags]],
+                "size": int(sizes[label]),
+                "weight": int(internal[label])
+            })
+        return result
+
+    def emerging(self, limit: int, min_recent: float, min_lift: float) -> List[Dict]:
+        """
+        Pairs whose recent weight most exceeds what their all-time count predicts.
+
+        The expectation scales each pair's count by the index-wide ratio of
+        recent weight to count, so long-standing pairs score near zero and
+        pairs that appeared (or accelerated) lately score high. Pairs need
+        min_recent weight and at least min_lift times their expected weight.
+        """
+        import numpy as np
+
+        if not len(self.counts):
+            return []
+        recent = self.recent * self._decay(time.time() - self.recent_at)
+        expected = self.counts * (recent.sum() / self.counts.sum())
+        eligible = np.flatnonzero((recent >= min_recent) & (recent >= min_lift * expected))
+        top = eligible[np.argsort(-(recent - expected)[eligible], kind="stable")[:limit]]
+        return [
+            {
+                "tags": [self.tags[self.rows[i]], self.tags[self.cols[i]]],
+                "recent": round(float(recent[i]), 2),
+                "count": int(self.counts[i]),
+                "lift": round(float(recent[i] / expected[i]), 2)
+            }
+            for i in top
+        ]
+
+    def themes(self, videos: List[Dict], weights: List[int], n_themes: int, min_jaccard: float) -> Optional[List[Dict]]:
+        labels = self.community_labels(1, min_jaccard)
+        members: Dict[int, List[int]] = {}
+        for position, video in enumerate(videos):
+            ids = self.tag_ids(video.get("tags") or [])
+            if ids:
+                # Most of the video's tags decide; ties go to its earlier tags
+                label = Counter(int(labels[i]) for i in ids).most_common(1)[0][0]
+                members.setdefault(label, []).append(position)
+
+        groups = sorted(members.items(), key=lambda item: sum(weights[p] for p in item[1]), reverse=True)[:n_themes]
+        covered = sum(weights[p] for _, positions in groups for p in positions)
+        if not groups or covered < config.TAG_THEMES_MIN_COVERAGE * sum(weights):
+            return None
+
+        themes = []
+        for theme_id, (label, positions) in enumerate(groups):
+            tag_counts = Counter()
+            for p in positions:
+                tag_counts.update(self.tags[i] for i in self.tag_ids(videos[p].get("tags") or []) if labels[i] == label)
+            keywords = [tag for tag, _ in tag_counts.most_common(5)]
+            themes.append({
+                "theme_id": theme_id,
+                "keywords": keywords,
+                "video_count": len(positions),
+                "weighted_count": sum(weights[p] for p in positions),
+                "representative_term": keywords[0],
+                "video_ids": [videos[p].get("videoId") for p in positions]
+            })
+        themes.sort(key=lambda x: x["video_count"], reverse=True)
+        return themes
+
+    def stats(self) -> Dict:
+        return {
+            "videos": len(self.seen_videos),
+            "tags": len(self.tags),
+            "pairs": int(len(self.counts)),
+            "pending_pairs": self.pending_pairs,
+            "compactions": self.compactions,
+            "nbytes": int(self.rows.nbytes + self.cols.nbytes + self.counts.nbytes + self.recent.nbytes)
+        }
+
+    def export_state(self) -> Dict:
+        self.ensure_compacted()
+        return {
+            "tags": self.tags,
+            "tag_counts": self.tag_counts,
+            "seen_videos": list(self.seen_videos.items()),
+            "rows": self.rows.tobytes(),
+            "cols": self.cols.tobytes(),
+            "counts": self.counts.tobytes(),
+            "recent": self.recent.tobytes(),
+            "recent_at": self.recent_at
+        }
+
+    @classmethod
+    def from_state(cls, region: str, state: Dict) -> "RegionTagIndex":
+        import numpy as np
+
+        index = cls(region)
+        index.tags = list(state["tags"])
+        index.vocab = {tag: i for i, tag in enumerate(index.tags)}
+        index.tag_counts = list(state["tag_counts"])
+        index.seen_videos = OrderedDict((video_id, last_seen) for video_id, last_seen in state["seen_videos"])
+        index.rows = np.frombuffer(state["rows"], dtype=np.int32).copy()
+        index.cols = np.frombuffer(state["cols"], dtype=np.int32).copy()
+        index.counts = np.frombuffer(state["counts"], dtype=np.int32).copy()
+        index.recent = np.frombuffer(state["recent"], dtype=np.float64).copy()
+        index.recent_at = state["recent_at"]
+        index._rebuild(len(index.tags))
+        index._stale = False
+        return index
+
+class TagIndex:
+    """
+    Tag co-occurrence indexes keyed by region.
+
+    YouTubeTool feeds every fetched chart in; queries compact the region's
+    pending pairs first, so they always see every ingested video. Indexes
+    are part of the warm state.
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = config.TAG_INDEX_ENABLED if enabled is None else enabled
+        self._regions: Dict[str, RegionTagIndex] = {}
+        self._lock = threading.Lock()
+        metrics.gauge(
+            "trendops_tag_index_pairs", "Distinct tag pairs in the co-occurrence index",
+            labels=("region",), callback=lambda: {(region,): len(index.counts) for region, index in self._regions.items()}
+        )
+
+    def _region(self, region: str, create: bool = False) -> Optional[RegionTagIndex]:
+        with self._lock:
+            index = self._regions.get(region)
+            if index is None and create:
+                index = self._regions[region] = RegionTagIndex(region)
+            return index
+
+    def ingest(self, region: str, videos: List[Dict]) -> int:
+        """
+        Add the tags of newly seen videos in a region's chart.
+
+        Returns:
+            Number of videos not seen before
+        """
+        if not self.enabled or not videos:
+            return 0
+        index = self._region(region, create=True)
+        with index.lock:
+            added = index.add_videos(videos, time.time())
+        if added:
+            warm_state.mark_dirty()
+        return added
+
+    def _query(self, region: str, method: str, *args):
+        index = self._region(region)
+        if index is None:
+            return None
+        with index.lock:
+            index.ensure_compacted()
+            return getattr(index, method)(*args)
+
+    def related(self, region: str, tag: str, limit: int = 10) -> List[Dict]:
+        """Tags most often on the same videos as `tag`, by video count, with Jaccard overlap and recent weight."""
+        return self._query(region, "related", tag, limit) or []
+
+    def communities(self, region: str, limit: int = 10, min_count: int = 1, min_jaccard: float = 0.2, max_tags: int = 10) -> List[Dict]:
+        """Groups of tags that travel together, strongest (by internal pair count) first."""
+        return self._query(region, "communities", limit, min_count, min_jaccard, max_tags) or []
+
+    def emerging(self, region: str, limit: int = 10, min_recent: float = 2.0, min_lift: float = 1.5) -> List[Dict]:
+        """Tag pairs trending up: recent weight well above their history."""
+        return self._query(region, "emerging", limit, min_recent, min_lift) or []
+
+    def themes(
+        self,
+        region: str,
+        videos: List[Dict],
+        weights: Optional[List[int]] = None,
+        n_themes: int = 5,
+        min_jaccard: float = 0.2
+    ) -> Optional[List[Dict]]:
+        """
+        Themes for a set of videos from the region's tag communities.
+
+        Each video joins the community holding most of its tags; the
+        n_themes largest communities become themes shaped like
+        ClusteringTool.cluster_themes output, plus their member `video_ids`.
+
+        Returns:
+            Themes, or None when the region has no index or the themes
+            cover less than TAG_THEMES_MIN_COVERAGE of the (weighted) videos,
+            so callers can fall back to text clustering
+        """
+        if weights is None:
+            weights = [1] * len(videos)
+        return self._query(region, "themes", videos, weights, n_themes, min_jaccard)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            regions = list(self._regions.items())
+        stats = {}
+        for region, index in regions:
+            with index.lock:
+                stats[region] = index.stats()
+        return {"enabled": self.enabled, "regions": stats}
+
+    def export_state(self) -> Dict:
+        """Compacted per-region arrays for warm-state persistence."""
+        with self._lock:
+            regions = list(self._regions.items())
+        state = {}
+        for region, index in regions:
+            with index.lock:
+                state[region] = index.export_state()
+        return state
+
+    def import_state(self, state: Dict) -> int:
+        """Restore persisted regions not already indexed in this process; returns pairs restored."""
+        restored = 0
+        for region, region_state in state.items():
+            index = RegionTagIndex.from_state(region, region_state)
+            with self._lock:
+                if region in self._regions:
+                    continue
+                self._regions[region] = index
+            restored += len(index.counts)
+        return restored
+
+# Global tag co-occurrence index
+tag_index = TagIndex()
+warm_state.register("tag_index", tag_index.export_state, tag_index.import_state)
@@ -0,0 +1,147 @@
+"""
+Token accounting for TrendOps.
+Estimates prompt/response token counts and compacts analytics context to an input budget.
+"""
+import math
+import re
+import threading
+from typing import Callable, Dict, Optional, Tuple
+from app.utils.config import config
+
+# Words, digit runs and individual punctuation marks tokenize differently
+_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+class TokenEstimator:
+    """
+    Heuristic token counter calibrated against provider usage reports.
+
+    Words cost one token per ~chars_per_token characters, digit runs one
+    token per three digits and punctuation one token per mark, which
+    tracks SentencePiece-style tokenizers far better than whitespace
+    splitting. When the provider reports real counts, calibrate() folds
+    the observed ratio into a running correction factor.
+    """
+
+    def __init__(self, chars_per_token: float = None, smoothing: float = 0.2):
+        self.chars_per_token = chars_per_token or config.TOKEN_CHARS_PER_TOKEN
+        self.smoothing = smoothing
+        self.correction = 1.0
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def _raw_count(self, text: str) -> float:
+        count = 0.0
+        for piece in _PIECE_PATTERN.findall(text):
+            if piece[0].isalpha():
+                count += math.ceil(len(piece) / self.chars_per_token)
+            elif piece[0].isdigit():
+                count += math.ceil(len(piece) / 3)
+            else:
+                count += 1
+        # Newlines are separate tokens in most vocabularies
+        return count + text.count("\n")
+
+    def count(self, text: str) -> int:
+        """Estimate the token count of text."""
+        if not text:
+            return 0
+        return max(1, round(self._raw_count(text) * self.correction))
+
+    def calibrate(self, text: str, actual_tokens: int):
+        """Adjust the correction factor from a provider-reported token count."""
+        raw = self._raw_count(text)
+        if not raw or not actual_tokens:
+            return
+        with self._lock:
+            ratio = actual_tokens / raw
+            if self.samples == 0:
+                self.correction = ratio
+            else:
+                self.correction += self.smoothing * (ratio - self.correction)
+            self.samples += 1
+
+    def stats(self) -> Dict:
+        """Calibration state for observability."""
+        return {
+            "chars_per_token": self.chars_per_token,
+            "correction": round(self.correction, 4),
+            "calibration_samples": self.samples
+        }
+
+# Compaction levels, most detailed first: themes shown, keywords per theme,
+# top keywords shown, anomalies listed individually
+COMPACTION_LEVELS = [
+    {"themes": 5, "theme_keywords": 5, "keywords": 10, "anomalies": 3},
+    {"themes": 5, "theme_keywords": 3, "keywords": 10, "anomalies": 3},
+    {"themes": 5, "theme_keywords": 0, "keywords": 10, "anomalies": 0},
+    {"themes": 3, "theme_keywords": 0, "keywords": 5, "anomalies": 0},
+    {"themes": 1, "theme_keywords": 0, "keywords": 3, "anomalies": 0},
+]
+
+def compact_analytics(analytics_data: Dict, level: Dict) -> Dict:
+    """
+    Trim analytics to a compaction level, summarizing what was dropped.
+
+    Returns:
+        Dict with "themes", "keywords", "anomalies" (the entries kept) and
+        "omitted" counts for themes, theme videos, keywords and anomalies
+    """
+    themes = analytics_data.get("topThemes", [])
+    keywords = analytics_data.get("topKeywords", [])
+    anomalies = analytics_data.get("anomalies", [])
+
+    kept_themes = [
+        {**theme, "keywords": (theme.get("keywords") or [])[:level["theme_keywords"]]}
+        for theme in themes[:level["themes"]]
+    ]
+    dropped_themes = themes[level["themes"]:]
+    kept_anomalies = sorted(anomalies, key=lambda a: a.get("z_score", 0), reverse=True)[:level["anomalies"]]
+
+    return {
+        "themes": kept_themes,
+        "keywords": keywords[:level["keywords"]],
+        "anomalies": kept_anomalies,
+        "anomaly_count": len(anomalies),
+        "omitted": {
+            "themes": len(dropped_themes),
+            "theme_videos": sum(theme.get("video_count", 0) for theme in dropped_themes),
+            "keywords": max(0, len(keywords) - level["keywords"]),
+            "anomalies": len(anomalies) - len(kept_anomalies)
+        }
+    }
+
+def fit_to_budget(
+    analytics_data: Dict,
+    render: Callable[[Dict], str],
+    budget: int,
+    estimator: Optional[TokenEstimator] = None
+) -> Tuple[str, int, int]:
+    """
+    Render analytics at the most detailed compaction level that fits a token budget.
+
+    Args:
+        analytics_data: Processed analytics from AnalyticsAgent
+        render: Renders a compact_analytics() result to prompt text
+        budget: Maximum tokens for the rendered text
+        estimator: Token estimator (defaults to the global one)
+
+    Returns:
+        (text, tokens, level_index); the smallest level is returned if none fit
+    """
+    estimator = estimator or token_estimator
+    for index, level in enumerate(COMPACTION_LEVELS):
+        text = render(compact_analytics(analytics_data, level))
+        tokens = estimator.count(text)
+        if tokens <= budget:
+            break
+    return text, tokens, index
+
+def estimate_cost(input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of an LLM call from configured per-1K token prices."""
+    return (
+        input_tokens / 1000 * config.LLM_INPUT_COST_PER_1K_TOKENS
+        + output_tokens / 1000 * config.LLM_OUTPUT_COST_PER_1K_TOKENS
+    )
+
+# Global estimator instance
+token_estimator = TokenEstimator()
@@ -0,0 +1,284 @@
+"""
+Span-based tracing for TrendOps.
+Nested, timed spans with attributes, exportable as OTLP JSON or Chrome trace format.
+"""
+import asyncio
+import functools
+import inspect
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from app.utils.config import config
+
+# Innermost open span and active trace ID for the current task
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+# Wall-clock anchor so monotonic span timestamps can be exported as Unix time
+_ANCHOR_WALL_NS = time.time_ns()
+_ANCHOR_MONO_NS = time.perf_counter_ns()
+
+@dataclass
+class Span:
+    """A timed unit of work within a trace."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+    lane: str = ""
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "startUnixNano": _to_unix_ns(self.start_ns),
+            "durationMs": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+def _to_unix_ns(mono_ns: int) -> int:
+    return _ANCHOR_WALL_NS + (mono_ns - _ANCHOR_MONO_NS)
+
+def _lane() -> str:
+    """Thread and asyncio task the span runs on; spans on one lane nest strictly."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    thread = threading.current_thread().name
+    return f"{thread}/{task.get_name()}" if task is not None else thread
+
+def current_span() -> Optional[Span]:
+    """Innermost open span in the current context, if any."""
+    return _current_span.get()
+
+class Tracer:
+    """
+    Collects finished spans per trace.
+
+    A trace corresponds to one request: CostTracker.begin_request starts it
+    with the request ID, so traces line up with the execution log. The most
+    recent TRACE_MAX_TRACES traces are retained.
+    """
+
+    def __init__(self, max_traces: int = None, max_spans_per_trace: int = None):
+        self.max_traces = max_traces or config.TRACE_MAX_TRACES
+        self.max_spans_per_trace = max_spans_per_trace or config.TRACE_MAX_SPANS_PER_TRACE
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def start_trace(self, trace_id: str = None) -> str:
+        """Make trace_id the active trace for this task, detaching any open span."""
+        trace_id = trace_id or uuid.uuid4().hex
+        _trace_id.set(trace_id)
+        _current_span.set(None)
+        return trace_id
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Open a span around a block of code.
+
+        The span's parent is whichever span is open in the current context;
+        tasks spawned inside the block inherit it. Exceptions mark the span
+        as errored and propagate; cancellation marks it cancelled.
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else (_trace_id.get() or uuid.uuid4().hex),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.perf_counter_ns(),
+            attributes=attributes,
+            lane=_lane()
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except (GeneratorExit, asyncio.CancelledError):
+            span.status = "cancelled"
+            raise
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Closed from another context (e.g. an async generator finalised elsewhere)
+                _current_span.set(parent)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            else:
+                self._traces.move_to_end(span.trace_id)
+            if len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+            else:
+                self._dropped += 1
+
+    def get_spans(self, trace_id: str = None) -> List[Span]:
+        """Finished spans of one trace, or of all retained traces, by start time."""
+        with self._lock:
+            if trace_id is not None:
+                spans = list(self._traces.get(trace_id, []))
+            else:
+                spans = [span for trace in self._traces.values() for span in trace]
+        return sorted(spans, key=lambda span: span.start_ns)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "traces": len(self._traces),
+                "spans": sum(len(spans) for spans in self._traces.values()),
+                "dropped_spans": self._dropped,
+                "max_traces": self.max_traces
+            }
+
+def traced(name: str = None, **attributes) -> Callable:
+    """
+    Decorator form of Tracer.span for plain and async functions.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+        attributes: Static attributes set on every span
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+# STATUS_CODE_OK / STATUS_CODE_UNSET; errors carry code 2 with a message
+_OTLP_STATUS = {"ok": {"code": 1}, "cancelled": {"code": 0, "message": "cancelled"}}
+
+def to_otlp(spans: List[Span], service_name: str = "trendops") -> Dict:
+    """Spans as an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]
+            },
+            "scopeSpans": [{
+                "scope": {"name": "app.utils.tracing"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 1,  # SPAN_KIND_INTERNAL
+                        "startTimeUnixNano": str(_to_unix_ns(span.start_ns)),
+                        "endTimeUnixNano": str(_to_unix_ns(span.end_ns)),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in span.attributes.items()
+                            if value is not None
+                        ],
+                        "status": _OTLP_STATUS[span.status] if span.status != "error" else {
+                            "code": 2, "message": span.error or ""
+                        }
+                    }
+                    for span in spans
+                ]
+            }]
+        }]
+    }
+
+def to_chrome_trace(spans: List[Span]) -> Dict:
+    """
+    Spans as Chrome trace events (chrome://tracing, Perfetto, speedscope).
+
+    Each trace becomes a process and each thread/task lane a thread, so
+    concurrent spans never overlap on one row.
+    """
+    pids: Dict[str, int] = {}
+    tids: Dict[str, int] = {}
+    named = set()
+    events = []
+    for span in spans:
+        if span.trace_id not in pids:
+            pids[span.trace_id] = len(pids) + 1
+            events.append({
+                "name": "process_name", "ph": "M", "pid": pids[span.trace_id],
+                "args": {"name": f"trace {span.trace_id}"}
+            })
+        if span.lane not in tids:
+            tids[span.lane] = len(tids) + 1
+        pid, tid = pids[span.trace_id], tids[span.lane]
+        if (pid, tid) not in named:
+            named.add((pid, tid))
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": span.lane}})
+        events.append({
+            "name": span.name,
+            "cat": span.status,
+            "ph": "X",
+            "ts": _to_unix_ns(span.start_ns) / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": pid,
+            "tid": tid,
+            "args": dict(span.attributes, spanId=span.span_id, parentId=span.parent_id, error=span.error)
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+# Global tracer instance
+tracer = Tracer()
@@ -0,0 +1,184 @@
+"""
+Warm-state persistence for TrendOps.
+Saves in-memory caches to a local directory so a cold process or container can rehydrate them instead of starting empty.
+"""
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict
+import msgspec
+from app.utils.config import config
+from app.utils.logging import get_logger
+from app.utils.startup import startup
+
+logger = get_logger(__name__)
+
+_FORMAT_VERSION = 1
+
+class WarmState:
+    """
+    Registry of components whose in-memory state survives restarts.
+
+    Each component registers an export callable (returning msgpack-able
+    data) and a restore callable. Rehydration runs once per process, on
+    startup or first use, and skips files older than max_age_seconds.
+    After a change, one background save is scheduled for when save_interval
+    has passed since the last save, and state is saved once more at shutdown. Files are written
+    atomically, so a container killed mid-save keeps the previous state.
+    """
+
+    def __init__(self, directory: str = None, save_interval: float = None, max_age_seconds: int = None, enabled: bool = None):
+        self.directory = directory or config.WARM_STATE_DIR
+        self.save_interval = save_interval if save_interval is not None else config.WARM_STATE_SAVE_INTERVAL_SECONDS
+        self.max_age_seconds = max_age_seconds or config.WARM_STATE_MAX_AGE_SECONDS
+        self.enabled = config.WARM_STATE_ENABLED if enabled is None else enabled
+        self._components: Dict[str, tuple] = {}
+        self._loaded = False
+        self._dirty = False
+        self._saving = False
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.last_load: Dict[str, Any] = {}
+
+    def register(self, name: str, export: Callable[[], Any], restore: Callable[[Any], int]):
+        """
+        Add a component.
+
+        Args:
+            name: File name stem for the component's state
+            export: Returns the state to persist
+            restore: Applies persisted state, returning the number of items restored
+        """
+        self._components[name] = (export, restore)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.msgpack")
+
+    def ensure_loaded(self) -> Dict[str, Any]:
+        """Rehydrate every registered component, once per process."""
+        if self._loaded or not self.enabled:
+            return self.last_load
+        with self._load_lock:
+            if self._loaded:
+                return self.last_load
+            with startup.phase("warm_state_rehydrate"):
+                results = {name: self._load(name, restore) for name, (_, restore) in self._components.items()}
+            self.last_load = results
+            self._loaded = True
+        logger.info("Warm state rehydrated", directory=self.directory, components=results)
+        return results
+
+    def _load(self, name: str, restore: Callable[[Any], int]) -> Dict:
+        path = self._path(name)
+        started = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                envelope = msgspec.msgpack.decode(f.read())
+        except FileNotFoundError:
+            return {"status": "missing"}
+        except (OSError, msgspec.DecodeError) as e:
+            logger.warning("Unreadable warm state ignored", component=name, error=str(e))
+            return {"status": "unreadable"}
+
+        if envelope.get("version") != _FORMAT_VERSION:
+            return {"status": "incompatible"}
+        age = time.time() - envelope.get("saved_at", 0)
+        if age > self.max_age_seconds:
+            return {"status": "stale", "age_seconds": round(age)}
+
+        try:
+            restored = restore(envelope["state"])
+        except Exception as e:
+            logger.warning("Warm state restore failed", component=name, error=str(e))
+            return {"status": "failed"}
+        return {
+            "status": "restored",
+            "items": restored,
+            "age_seconds": round(age),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    def mark_dirty(self):
+        """Note a change; saves in the background once save_interval has passed since the last save."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._dirty = True
+            if self._saving:
+                return
+            self._saving = True
+            delay = max(0.0, self.save_interval - (time.monotonic() - self._last_save))
+        self._schedule_save(delay)
+
+    def _schedule_save(self, delay: float):
+        # A change inside the interval is saved when it ends rather than left for the shutdown flush
+        timer = threading.Timer(delay, self._save_in_background)
+        timer.name = "trendops-warm-state"
+        timer.daemon = True
+        timer.start()
+
+    def _save_in_background(self):
+        try:
+            self.save()
+        finally:
+            with self._lock:
+                # Changes made while this save ran get one more deferred save
+                self._saving = self._dirty
+            if self._saving:
+                self._schedule_save(self.save_interval)
+
+    def save(self) -> Dict[str, int]:
+        """
+        Write every component's state now.
+
+        Returns:
+            Bytes written per component
+        """
+        if not self.enabled:
+            return {}
+        # Never overwrite state this process has not restored yet
+        self.ensure_loaded()
+        with self._lock:
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        written = {}
+        os.makedirs(self.directory, exist_ok=True)
+        for name, (export, _) in self._components.items():
+            try:
+                payload = msgspec.msgpack.encode({"version": _FORMAT_VERSION, "saved_at": time.time(), "state": export()})
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{name}.")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, self._path(name))
+                written[name] = len(payload)
+            except Exception as e:
+                logger.warning("Warm state save failed", component=name, error=str(e))
+        return written
+
+    def flush(self):
+        """Save if anything changed since the last save (called at shutdown)."""
+        if self._dirty:
+            self.save()
+
+    def stats(self) -> Dict:
+        files = {}
+        for name in self._components:
+            try:
+                stat = os.stat(self._path(name))
+                files[name] = {"bytes": stat.st_size, "age_seconds": round(time.time() - stat.st_mtime)}
+            except FileNotFoundError:
+                files[name] = None
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "loaded": self._loaded,
+            "dirty": self._dirty,
+            "last_load": self.last_load,
+            "files": files
+        }
+
+# Global warm-state registry
+warm_state = WarmState()
@@ -0,0 +1 @@
+"""Benchmarking and load-testing tools for TrendOps."""
@@ -0,0 +1,108 @@
+"""
+Cold-start benchmark for TrendOps.
+Imports app.main in fresh interpreters, reports import time and the slowest modules, and checks an import-time budget.
+
+Usage:
+    python -m bench.coldstart --repeats 5
+    python -m bench.coldstart --budget-ms 800   # exit code 1 if over budget
+    python -m bench.coldstart --output coldstart.json --top 30
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+# Runs in the child: time the import and report which heavy modules it pulled in
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed_ms = (time.perf_counter() - started) * 1000
+from app.utils.startup import HEAVY_MODULES
+print(json.dumps({"import_ms": elapsed_ms, "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules]}))
+"""
+
+def _child_env(overrides: Dict[str, str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    # Offline defaults so the import never needs real keys; overrides win
+    env.setdefault("YOUTUBE_API_KEY", "coldstart")
+    env.setdefault("LLM_BACKEND", "stub")
+    env.update(overrides)
+    return env
+
+def measure_once(env: Dict[str, str], importtime: bool) -> Tuple[Dict, List[Tuple[str, int, int]]]:
+    """
+    Import app.main in a fresh interpreter.
+
+    Returns:
+        (result, modules): the child's import timing, and (module, self_us, cumulative_us)
+        rows from -X importtime when requested
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _CHILD]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((name, int(self_us), int(cumulative_us)))
+    return result, modules
+
+def main():
+    parser = argparse.ArgumentParser(description="TrendOps cold-start (import time) benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when the median import exceeds this (default IMPORT_TIME_BUDGET_MS)")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE set in the child, e.g. MCP_HTTP_ENABLED=true")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules (by cumulative import time) to list")
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args()
+
+    overrides = dict(item.split("=", 1) for item in args.env)
+    env = _child_env(overrides)
+    budget_ms = args.budget_ms if args.budget_ms is not None else float(env.get("IMPORT_TIME_BUDGET_MS", "1500"))
+
+    # One throwaway run so .pyc compilation is not counted as cold start
+    measure_once(env, importtime=False)
+    runs = [measure_once(env, importtime=False)[0] for _ in range(args.repeats)]
+    _, modules = measure_once(env, importtime=True)
+
+    times = sorted(run["import_ms"] for run in runs)
+    median_ms = statistics.median(times)
+    slowest = sorted(modules, key=lambda row: row[2], reverse=True)[:args.top]
+
+    print(f"import app.main: median {median_ms:.1f} ms, min {times[0]:.1f} ms, max {times[-1]:.1f} ms over {len(times)} runs")
+    print(f"heavy modules loaded: {', '.join(runs[-1]['heavy_modules']) or 'none'}")
+    print(f"\n{'module':<48}{'self ms':>10}{'cumulative ms':>16}")
+    for name, self_us, cumulative_us in slowest:
+        print(f"{name[:47]:<48}{self_us / 1000:>10.1f}{cumulative_us / 1000:>16.1f}")
+
+    over_budget = bool(budget_ms) and median_ms > budget_ms
+    print(f"\nbudget {budget_ms:.0f} ms: {'OVER BUDGET' if over_budget else 'ok'}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_at": datetime.utcnow().isoformat(),
+                "environment": {"python": platform.python_version(), "platform": platform.platform(), "overrides": overrides},
+                "budget_ms": budget_ms,
+                "median_ms": round(median_ms, 1),
+                "runs_ms": [round(t, 1) for t in times],
+                "heavy_modules": runs[-1]["heavy_modules"],
+                "slowest_modules": [
+                    {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+                    for name, self_us, cumulative_us in slowest
+                ]
+            }, f, indent=2)
+
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+End-to-end load generator for TrendOps /analyze.
+Drives the FastAPI app in-process or over HTTP and reports throughput, per-stage latency percentiles and event-loop lag.
+
+Usage:
+    # Fully offline, in-process: stub LLM + local YouTube stand-in
+    python -m bench.loadtest --offline --concurrency 16 --requests 400 --mix "US=3,GB=1,IN/10=1"
+
+    # Against a running server
+    python -m bench.loadtest --url http://127.0.0.1:8000 --concurrency 8 --duration 60
+
+    # Save a baseline, then compare later runs against it (exit code 1 on regression)
+    python -m bench.loadtest --offline --save-baseline bench/baselines/analyze.json
+    python -m bench.loadtest --offline --baseline bench/baselines/analyze.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# Execution-log tool names -> stage labels in the report
+STAGES = {
+    "governance_validation": "governance",
+    "youtube_fetch_trending": "data",
+    "analytics_processing": "analytics",
+    "intelligence_generation": "intelligence",
+}
+
+def parse_mix(spec: str) -> List[Tuple[str, Optional[str], float]]:
+    """
+    Parse a request mix such as "US=3,GB/10=1,IN".
+
+    Each entry is REGION[/CATEGORY][=WEIGHT]; weight defaults to 1.
+    """
+    mix = []
+    for entry in (e.strip() for e in spec.split(",")):
+        if not entry:
+            continue
+        target, _, weight = entry.partition("=")
+        region, _, category = target.partition("/")
+        mix.append((region.upper(), category or None, float(weight or 1)))
+    if not mix:
+        raise ValueError("Request mix is empty")
+    return mix
+
+def percentiles(values: List[float]) -> Dict:
+    """p50/p95/p99/max (nearest-rank) of a list of milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "p50": round(rank(50), 2),
+        "p95": round(rank(95), 2),
+        "p99": round(rank(99), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how late a periodic sleep wakes up."""
+
+    def __init__(self, interval_ms: float = 10.0):
+        self.interval = interval_ms / 1000
+        self.samples: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (time.perf_counter() - start - self.interval) * 1000))
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_standin(port: int, latency_ms: float, jitter_ms: float, error_rate: float, seed: int):
+    """Run the YouTube stand-in on a background thread."""
+    import uvicorn
+    from bench.youtube_standin import ChartSource, FaultInjector, create_app
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(ChartSource(seed=seed), FaultInjector(latency_ms, jitter_ms, error_rate, seed=seed)),
+        host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+
+async def run_load(args, client: httpx.AsyncClient) -> Dict:
+    """Issue requests at the configured concurrency and collect measurements."""
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    targets = [(region, category) for region, category, _ in mix]
+    weights = [weight for _, _, weight in mix]
+
+    latencies: List[float] = []
+    stage_ms: Dict[str, List[float]] = {stage: [] for stage in STAGES.values()}
+    statuses: Dict[str, int] = {}
+    errors: List[str] = []
+    issued = 0
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def make_body() -> Dict:
+        region, category = rng.choices(targets, weights)[0]
+        return {
+            "region_code": region,
+            "category_id": category,
+            "max_results": args.max_results,
+            "include_intelligence": not args.no_intelligence,
+            "refresh_mode": args.refresh_mode,
+        }
+
+    def next_request() -> Optional[Dict]:
+        nonlocal issued
+        if deadline is not None:
+            if time.perf_counter() >= deadline:
+                return None
+        elif issued >= args.requests:
+            return None
+        issued += 1
+        return make_body()
+
+    async def one(body: Dict, record: bool):
+        start = time.perf_counter()
+        try:
+            response = await client.post("/analyze", json=body, params={"fields": args.fields} if args.fields else None)
+            elapsed = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            if record:
+                statuses["exception"] = statuses.get("exception", 0) + 1
+                errors.append(str(e))
+            return
+        if not record:
+            return
+
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        if response.status_code != 200:
+            errors.append(response.text[:200])
+            return
+        latencies.append(elapsed)
+        for entry in response.json().get("governance", {}).get("executionLog", []):
+            stage = STAGES.get(entry.get("tool_name"))
+            if stage:
+                stage_ms[stage].append(entry.get("duration_ms", 0.0))
+
+    async def worker():
+        while True:
+            body = next_request()
+            if body is None:
+                return
+            await one(body, record=True)
+
+    # Warm-up requests populate caches and pools but are not measured
+    for _ in range(args.warmup):
+        await one(make_body(), record=False)
+
+    monitor = LoopLagMonitor(args.lag_interval_ms)
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall_s = time.perf_counter() - started
+    await monitor.stop()
+
+    return {
+        "requests": sum(statuses.values()),
+        "succeeded": len(latencies),
+        "statuses": statuses,
+        "errors_sample": errors[:5],
+        "wall_seconds": round(wall_s, 3),
+        "throughput_rps": round(len(latencies) / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": percentiles(latencies),
+        "stages_ms": {stage: percentiles(values) for stage, values in stage_ms.items() if values},
+        "event_loop_lag_ms": percentiles(monitor.samples),
+    }
+
+# Metrics compared against a baseline: (path, higher_is_better)
+BASELINE_METRICS = [
+    (("throughput_rps",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("latency_ms", "p99"), False),
+    (("event_loop_lag_ms", "p99"), False),
+] + [
+    (("stages_ms", stage, p), False) for stage in STAGES.values() for p in ("p50", "p95", "p99")
+]
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float, min_delta_ms: float = 1.0) -> List[Dict]:
+    """
+    Relative change of each tracked metric versus the baseline.
+
+    A metric regresses when it is worse than the baseline by more than
+    tolerance (e.g. 0.1 = 10%). Latency changes smaller than min_delta_ms
+    are treated as noise.
+    """
+    def lookup(obj, path):
+        for key in path:
+            if not isinstance(obj, dict) or key not in obj:
+                return None
+            obj = obj[key]
+        return obj
+
+    comparison = []
+    for path, higher_is_better in BASELINE_METRICS:
+        current, previous = lookup(results, path), lookup(baseline, path)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        comparison.append({
+            "metric": ".".join(path),
+            "baseline": previous,
+            "current": current,
+            "change_pct": round(change * 100, 1),
+            "regressed": worse > tolerance and (higher_is_better or abs(current - previous) >= min_delta_ms),
+        })
+    return comparison
+
+def print_report(report: Dict):
+    results = report["results"]
+    print(f"\n{'=' * 72}")
+    print(f"TrendOps /analyze load test ({report['config']['mode']}, concurrency {report['config']['concurrency']})")
+    print(f"{'=' * 72}")
+    print(f"requests {results['requests']}  ok {results['succeeded']}  statuses {results['statuses']}")
+    print(f"wall {results['wall_seconds']}s  throughput {results['throughput_rps']} req/s")
+    print(f"\n{'':<16}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    rows = [("end-to-end", results["latency_ms"])] + list(results["stages_ms"].items()) + [("loop lag", results["event_loop_lag_ms"])]
+    for name, stats in rows:
+        if stats.get("count"):
+            print(f"{name:<16}{stats['count']:>8}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}{stats['max']:>10}")
+
+    if report.get("baseline_comparison"):
+        print(f"\n{'metric':<32}{'baseline':>12}{'current':>12}{'change':>10}")
+        for row in report["baseline_comparison"]:
+            flag = "  REGRESSED" if row["regressed"] else ""
+            print(f"{row['metric']:<32}{row['baseline']:>12}{row['current']:>12}{row['change_pct']:>9}%{flag}")
+
+async def main_async(args) -> Dict:
+    if args.url:
+        mode = "http"
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        mode = "in-process"
+        # All environment overrides must be in place before anything imports app.utils.config
+        standin_port = _free_port() if args.offline else None
+        if args.offline:
+            os.environ.setdefault("LLM_BACKEND", "stub")
+            os.environ.setdefault("YOUTUBE_API_KEY", "standin")
+            os.environ["YOUTUBE_API_BASE_URL"] = f"http://127.0.0.1:{standin_port}/youtube/v3"
+        # Load tests issue far more calls than an interactive session
+        os.environ.setdefault("MAX_REQUESTS_PER_SESSION", str(10 ** 9))
+        if args.no_llm_cache:
+            os.environ["LLM_CACHE_ENABLED"] = "false"
+
+        if args.offline:
+            start_standin(standin_port, args.standin_latency_ms, args.standin_jitter_ms, args.standin_error_rate, args.seed)
+        from app.main import app
+        if not args.app_logs:
+            logging.disable(logging.INFO)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://trendops", timeout=args.timeout)
+
+    async with client:
+        results = await run_load(args, client)
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "config": {
+            "mode": mode,
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "requests": args.requests if not args.duration else None,
+            "duration_s": args.duration,
+            "mix": args.mix,
+            "max_results": args.max_results,
+            "include_intelligence": not args.no_intelligence,
+            "refresh_mode": args.refresh_mode,
+            "fields": args.fields,
+            "llm_backend": os.environ.get("LLM_BACKEND", "gemini"),
+            "seed": args.seed,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the TrendOps /analyze endpoint")
+    parser.add_argument("--url", help="Base URL of a running server; omit to drive the app in-process")
+    parser.add_argument("--offline", action="store_true", help="In-process only: use the stub LLM and a local YouTube stand-in")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Total measured requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="Run for this many seconds instead of a fixed count")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--mix", default="US=3,GB=1,IN=1,JP/20=1", help="REGION[/CATEGORY][=WEIGHT],...")
+    parser.add_argument("--max-results", type=int, default=25)
+    parser.add_argument("--no-intelligence", action="store_true")
+    parser.add_argument("--no-llm-cache", action="store_true", help="In-process only: disable the intelligence report cache")
+    parser.add_argument("--refresh-mode", choices=["full", "delta"], default="full")
+    parser.add_argument("--fields", default="status,governance.executionLog", help="Response projection; empty string for the full payload")
+    parser.add_argument("--app-logs", action="store_true", help="In-process only: keep the app's INFO logs")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--standin-latency-ms", type=float, default=80.0)
+    parser.add_argument("--standin-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--standin-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--save-baseline", help="Write the JSON report here as the new baseline")
+    parser.add_argument("--baseline", help="Compare against this baseline report")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["baseline_comparison"] = compare_to_baseline(report["results"], baseline["results"], args.tolerance, args.min_delta_ms)
+        regressed = any(row["regressed"] for row in report["baseline_comparison"])
+
+    print_report(report)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Micro-benchmarks for TrendOps analytics tools.
+Times clustering, scoring and tokenization over seeded synthetic corpora (25 to 100k videos) and tracks peak memory.
+
+Usage:
+    python -m bench.microbench --sizes 25,1000,10000,100000 --output bench_results.json
+    python -m bench.microbench --benchmarks cluster_themes,extract_keywords --sizes 25,100,1000
+    python -m bench.microbench --baseline bench/baselines/micro.json --threshold 0.25 --thresholds cluster_themes=0.5
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from app.tools.clustering_tool import ClusteringTool
+from app.tools.scoring_tool import ScoringTool
+from app.utils.tokens import token_estimator
+
+DEFAULT_SIZES = [25, 100, 1000, 10000, 100000]
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+_SYLLABLES = ["ka", "ri", "to", "ne", "mo", "la", "vi", "su", "de", "po", "zen", "tar", "lo", "mi", "gra", "fin", "bo", "shi", "qua", "rex"]
+_COMMON = [
+    "official", "video", "trailer", "live", "new", "best", "highlights", "reaction", "review", "challenge",
+    "music", "game", "episode", "season", "full", "match", "news", "update", "shorts", "funny",
+    "the", "and", "for", "with", "this", "you", "how", "what", "why", "from",
+]
+
+def _vocabulary(rng: np.random.Generator, size: int) -> List[str]:
+    """Common title words first, then pronounceable synthetic words for the long tail."""
+    words = list(_COMMON)
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(_SYLLABLES, size=rng.integers(2, 5)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+def generate_videos(n: int, seed: int = 0, vocabulary_size: int = 20000) -> List[Dict]:
+    """
+    Seeded synthetic trending videos in the record shape YouTubeTool returns.
+
+    Words are Zipf-distributed over the vocabulary (a few very common
+    terms, a long tail), titles run 4-14 words, descriptions follow a
+    heavy-tailed lognormal length (median ~40 words, some over 1000), tags
+    0-15, and view counts are lognormal with like/comment ratios in the
+    ranges seen on real charts.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array(_vocabulary(rng, vocabulary_size), dtype=object)
+
+    def words(count: int) -> np.ndarray:
+        ranks = rng.zipf(1.3, size=count)
+        return vocab[np.minimum(ranks, len(vocab)) - 1]
+
+    title_lengths = rng.integers(4, 15, size=n)
+    description_lengths = np.minimum(rng.lognormal(3.7, 1.0, size=n).astype(int), 1500)
+    tag_counts = rng.integers(0, 16, size=n)
+    views = np.maximum(rng.lognormal(12.0, 1.6, size=n).astype(np.int64), 1)
+    likes = (views * rng.uniform(0.005, 0.08, size=n)).astype(np.int64)
+    comments = (likes * rng.uniform(0.02, 0.12, size=n)).astype(np.int64)
+
+    title_words = words(int(title_lengths.sum()))
+    description_words = words(int(description_lengths.sum()))
+    tag_words = words(int(tag_counts.sum()))
+
+    videos = []
+    t = d = g = 0
+    for i in range(n):
+        title = " ".join(title_words[t:t + title_lengths[i]]).title()
+        description = " ".join(description_words[d:d + description_lengths[i]])
+        tags = list(tag_words[g:g + tag_counts[i]])
+        t += title_lengths[i]
+        d += description_lengths[i]
+        g += tag_counts[i]
+        videos.append({
+            "videoId": f"v{seed:04d}{i:08d}",
+            "title": title,
+            "description": description,
+            "tags": tags,
+            "viewCount": int(views[i]),
+            "likeCount": int(likes[i]),
+            "commentCount": int(comments[i]),
+            "publishedAt": "2026-01-01T00:00:00Z",
+            "channelTitle": f"Channel {i % 997}",
+            "duplicate_count": 1,
+        })
+    return videos
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+clustering = ClusteringTool()
+scoring = ScoringTool()
+
+def _texts(videos: List[Dict]) -> List[str]:
+    # Same corpus AnalyticsAgent builds
+    return [f"{v.get('title', '')} {v.get('description', '')}" for v in videos]
+
+def _themes(videos: List[Dict]) -> List[Dict]:
+    """Five themes from the corpus' top keywords, standing in for cluster output."""
+    keywords = [kw["keyword"] for kw in clustering.extract_keywords(_texts(videos[:2000]), top_n=25)]
+    return [
+        {"theme_id": i, "keywords": keywords[i::5][:5], "representative_term": keywords[i] if i < len(keywords) else "general"}
+        for i in range(5)
+    ]
+
+# name -> (setup(videos) -> args, function(*args)); setup is not timed
+BENCHMARKS: Dict[str, Tuple[Callable[[List[Dict]], tuple], Callable]] = {
+    "extract_keywords": (
+        lambda videos: (_texts(videos),),
+        lambda texts: clustering.extract_keywords(texts, top_n=15),
+    ),
+    "cluster_themes": (
+        lambda videos: (_texts(videos), [v["duplicate_count"] for v in videos]),
+        lambda texts, weights: clustering.cluster_themes(texts, n_clusters=5, weights=weights),
+    ),
+    "rank_by_engagement": (
+        lambda videos: (videos,),
+        lambda videos: scoring.rank_by_engagement(videos),
+    ),
+    "calculate_theme_engagement": (
+        lambda videos: (scoring.rank_by_engagement(videos), _themes(videos)),
+        lambda scored, themes: scoring.calculate_theme_engagement(scored, themes),
+    ),
+    "detect_anomalies": (
+        lambda videos: (scoring.rank_by_engagement(videos),),
+        lambda scored: scoring.detect_anomalies(scored),
+    ),
+    "tokenize": (
+        lambda videos: (_texts(videos),),
+        lambda texts: [clustering._tokenize(text) for text in texts],
+    ),
+    "estimate_tokens": (
+        lambda videos: (_texts(videos),),
+        lambda texts: [token_estimator.count(text) for text in texts],
+    ),
+}
+
+def measure(fn: Callable, args: tuple, repeats: int, track_memory: bool) -> Dict:
+    """Time fn(*args) `repeats` times; optionally one extra run under tracemalloc for peak memory."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    result = {
+        "repeats": repeats,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+    if track_memory:
+        tracemalloc.start()
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_kib"] = round(peak / 1024, 1)
+    return result
+
+def run(names: List[str], sizes: List[int], repeats: int, seed: int, budget_s: float, track_memory: bool) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Run each benchmark over increasing corpus sizes.
+
+    Once a single run of a benchmark exceeds budget_s, larger sizes are
+    skipped for it (quadratic code paths would otherwise run for hours).
+    """
+    results, skipped = [], []
+    over_budget: Dict[str, int] = {}
+
+    for n in sorted(sizes):
+        videos = generate_videos(n, seed)
+        for name in names:
+            if name in over_budget:
+                skipped.append({"benchmark": name, "n": n, "reason": f"exceeded {budget_s}s budget at n={over_budget[name]}"})
+                continue
+
+            setup, fn = BENCHMARKS[name]
+            args = setup(videos)
+
+            # Single probe run decides how many repeats fit the budget
+            start = time.perf_counter()
+            fn(*args)
+            probe_s = time.perf_counter() - start
+            if probe_s > budget_s:
+                # Too slow to repeat: the probe is the measurement
+                over_budget[name] = n
+                probe_ms = round(probe_s * 1000, 3)
+                measured = {"repeats": 1, "min_ms": probe_ms, "median_ms": probe_ms, "mean_ms": probe_ms}
+            else:
+                runs = max(1, min(repeats, int(budget_s / max(probe_s, 1e-9))))
+                measured = measure(fn, args, runs, track_memory)
+            row = {"benchmark": name, "n": n, **measured, "us_per_item": round(measured["median_ms"] * 1000 / n, 3)}
+            results.append(row)
+            print(
+                f"{name:<28}{n:>8}{measured['median_ms']:>12.3f} ms"
+                f"{row['us_per_item']:>12.3f} us/item"
+                + (f"{measured['peak_kib']:>12.1f} KiB" if "peak_kib" in measured else ""),
+                flush=True
+            )
+    return results, skipped
+
+def compare(results: List[Dict], baseline: List[Dict], default_threshold: float, thresholds: Dict[str, float], min_delta_ms: float, memory_threshold: float) -> List[Dict]:
+    """
+    Compare median time (and peak memory) per (benchmark, n) against a baseline.
+
+    A row regresses when median time grows by more than its threshold and
+    by at least min_delta_ms, or peak memory grows by more than memory_threshold.
+    """
+    previous = {(row["benchmark"], row["n"]): row for row in baseline}
+    comparison = []
+    for row in results:
+        base = previous.get((row["benchmark"], row["n"]))
+        if base is None:
+            continue
+        threshold = thresholds.get(row["benchmark"], default_threshold)
+        time_change = (row["median_ms"] - base["median_ms"]) / base["median_ms"] if base["median_ms"] else 0.0
+        time_regressed = time_change > threshold and row["median_ms"] - base["median_ms"] >= min_delta_ms
+
+        memory_change = None
+        memory_regressed = False
+        if row.get("peak_kib") and base.get("peak_kib"):
+            memory_change = (row["peak_kib"] - base["peak_kib"]) / base["peak_kib"]
+            memory_regressed = memory_change > memory_threshold
+
+        comparison.append({
+            "benchmark": row["benchmark"],
+            "n": row["n"],
+            "baseline_ms": base["median_ms"],
+            "current_ms": row["median_ms"],
+            "time_change_pct": round(time_change * 100, 1),
+            "memory_change_pct": round(memory_change * 100, 1) if memory_change is not None else None,
+            "threshold_pct": round(threshold * 100, 1),
+            "regressed": time_regressed or memory_regressed,
+        })
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description="TrendOps analytics micro-benchmarks")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Comma-separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget-seconds", type=float, default=20.0, help="Skip larger sizes once one run takes longer than this")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("--output", help="Write JSON results here")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median-time growth (0.25 = 25%%)")
+    parser.add_argument("--thresholds", default="", help="Per-benchmark overrides, e.g. cluster_themes=0.5,tokenize=0.1")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed peak-memory growth")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore time changes smaller than this")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    thresholds = {
+        name: float(value)
+        for name, _, value in (item.partition("=") for item in args.thresholds.split(",") if item)
+    }
+
+    print(f"{'benchmark':<28}{'n':>8}{'median':>15}{'per item':>20}{'peak':>16}")
+    results, skipped = run(names, sizes, args.repeats, args.seed, args.budget_seconds, not args.no_memory)
+    for row in skipped:
+        print(f"{row['benchmark']:<28}{row['n']:>8}  skipped: {row['reason']}")
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "environment": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform()},
+        "config": {"sizes": sizes, "repeats": args.repeats, "seed": args.seed, "budget_seconds": args.budget_seconds},
+        "results": results,
+        "skipped": skipped,
+    }
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(
+            results, baseline["results"], args.threshold, thresholds, args.min_delta_ms, args.memory_threshold
+        )
+        print(f"\n{'benchmark':<28}{'n':>8}{'baseline':>12}{'current':>12}{'time':>9}{'memory':>9}")
+        for row in report["comparison"]:
+            memory = f"{row['memory_change_pct']}%" if row["memory_change_pct"] is not None else "-"
+            flag = "  REGRESSED" if row["regressed"] else ""
+            print(f"{row['benchmark']:<28}{row['n']:>8}{row['baseline_ms']:>12}{row['current_ms']:>12}{row['time_change_pct']:>8}%{memory:>9}{flag}")
+        regressed = any(row["regressed"] for row in report["comparison"])
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
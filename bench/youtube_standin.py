@@ -0,0 +1,439 @@
+"""
+Local YouTube Data API stand-in for TrendOps benchmarks.
+Serves recorded or synthetic `videos` responses with pagination, ETags and injected latency/errors.
+
+Usage:
+    # Serve (fixtures when recorded, synthetic charts otherwise)
+    python -m bench.youtube_standin serve --port 8081 --latency-ms 120 --jitter-ms 40 --error-rate 0.02
+    YOUTUBE_API_BASE_URL=http://127.0.0.1:8081/youtube/v3 python -m app.main
+
+    # Record live charts into fixtures (uses YOUTUBE_API_KEY)
+    python -m bench.youtube_standin record --regions US,GB,IN --categories all,10,20
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Request, Response
+
+from app.utils.config import config
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+UPSTREAM_BASE_URL = "https://www.googleapis.com/youtube/v3"
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "youtube")
+
+# ---------------------------------------------------------------------------
+# Synthetic charts
+# ---------------------------------------------------------------------------
+
+_TOPICS = {
+    "1": ["trailer", "film", "director", "scene", "animation", "studio", "review", "premiere"],
+    "2": ["car", "engine", "review", "electric", "supercar", "drive", "garage", "restoration"],
+    "10": ["official", "music", "video", "live", "remix", "album", "single", "tour"],
+    "15": ["puppy", "cat", "rescue", "wildlife", "funny", "animals", "zoo", "training"],
+    "17": ["highlights", "match", "goals", "final", "league", "championship", "transfer", "interview"],
+    "19": ["travel", "vlog", "city", "guide", "island", "budget", "food", "tour"],
+    "20": ["gameplay", "speedrun", "update", "boss", "ranked", "patch", "walkthrough", "esports"],
+    "22": ["vlog", "day", "life", "challenge", "family", "morning", "routine", "story"],
+    "23": ["sketch", "comedy", "prank", "standup", "parody", "funny", "reaction", "skit"],
+    "24": ["reaction", "celebrity", "show", "episode", "behind", "scenes", "interview", "podcast"],
+    "25": ["breaking", "news", "election", "report", "analysis", "update", "debate", "live"],
+    "26": ["tutorial", "makeup", "diy", "recipe", "hack", "tips", "tutorial", "cleaning"],
+    "27": ["explained", "history", "science", "lesson", "math", "documentary", "facts", "learn"],
+    "28": ["ai", "iphone", "review", "unboxing", "tech", "robot", "startup", "chip"],
+    "29": ["charity", "volunteer", "climate", "campaign", "community", "fundraiser", "awareness", "ocean"],
+}
+_FILLER = [
+    "subscribe", "for", "more", "new", "episode", "every", "week", "follow", "us", "on", "social",
+    "thanks", "watching", "this", "video", "was", "made", "with", "our", "amazing", "team", "best",
+    "ever", "today", "we", "try", "the", "most", "insane", "ultimate", "guide", "part", "full",
+]
+_ID_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+_EPOCH = datetime(2026, 1, 1)
+
+def _rng(*parts) -> random.Random:
+    """Deterministic RNG seeded from arbitrary parts."""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode("utf-8"), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+def _video_id(rng: random.Random) -> str:
+    return "".join(rng.choice(_ID_ALPHABET) for _ in range(11))
+
+def _synthetic_item(rng: random.Random, category_id: str) -> Dict:
+    """One full videos resource (snippet + statistics) in the API's wire format."""
+    topic = _TOPICS.get(category_id, _FILLER)
+    title_words = rng.sample(topic, k=min(len(topic), rng.randint(2, 4))) + rng.sample(_FILLER, k=rng.randint(1, 4))
+    rng.shuffle(title_words)
+    description = " ".join(
+        " ".join(rng.choice(topic + _FILLER) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(rng.choice([1, 2, 4, 8, 16, 40]))
+    )
+    views = int(rng.lognormvariate(12.0, 1.6))
+    likes = int(views * rng.uniform(0.005, 0.08))
+    statistics = {"viewCount": str(views), "commentCount": str(int(likes * rng.uniform(0.02, 0.12)))}
+    if rng.random() > 0.05:  # some creators hide like counts
+        statistics["likeCount"] = str(likes)
+
+    return {
+        "kind": "youtube#video",
+        "id": _video_id(rng),
+        "snippet": {
+            "publishedAt": (_EPOCH - timedelta(minutes=rng.randint(60, 60 * 24 * 7))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "channelId": "UC" + _video_id(rng) + _video_id(rng),
+            "title": " ".join(title_words).title(),
+            "description": description,
+            "channelTitle": f"{rng.choice(topic).title()} {rng.choice(['Channel', 'TV', 'Official', 'Studio', 'Daily'])}",
+            "tags": rng.sample(topic, k=rng.randint(2, min(6, len(topic)))),
+            "categoryId": category_id,
+        },
+        "statistics": statistics,
+    }
+
+def synthetic_chart(region_code: str, category_id: Optional[str], size: int = 200, seed: int = 0) -> List[Dict]:
+    """
+    Deterministic chart for a region/category.
+
+    Videos come from a per-category pool shared by all regions, so popular
+    videos recur across region charts (as real trending charts do); ~5% of
+    entries are lightly edited re-uploads of another entry.
+    """
+    categories = [category_id] if category_id else sorted(_TOPICS)
+    pool: List[Dict] = []
+    for category in categories:
+        rng = _rng("pool", seed, category)
+        pool.extend(_synthetic_item(rng, category) for _ in range(size))
+
+    rng = _rng("chart", seed, region_code, category_id or "all")
+    chart = rng.sample(pool, k=min(size, len(pool)))
+    for i in range(len(chart)):
+        if i and rng.random() < 0.05:
+            original = chart[rng.randrange(i)]
+            chart[i] = {
+                **original,
+                "id": _video_id(rng),
+                "snippet": {**original["snippet"], "title": original["snippet"]["title"] + " (Reupload)"},
+            }
+    chart.sort(key=lambda item: int(item["statistics"]["viewCount"]), reverse=True)
+    return chart
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def fixture_path(fixtures_dir: str, region_code: str, category_id: Optional[str]) -> str:
+    return os.path.join(fixtures_dir, f"{region_code}_{category_id or 'all'}.json")
+
+class ChartSource:
+    """
+    Resolves charts from recorded fixtures, falling back to synthetic data.
+
+    Charts are loaded once and indexed by video ID so `id=` lookups see every
+    video from every chart served so far.
+    """
+
+    def __init__(self, fixtures_dir: str = DEFAULT_FIXTURES_DIR, source: str = "auto", chart_size: int = 200, seed: int = 0):
+        self.fixtures_dir = fixtures_dir
+        self.source = source
+        self.chart_size = chart_size
+        self.seed = seed
+        self._charts: Dict[Tuple[str, Optional[str]], List[Dict]] = {}
+        self._by_id: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def chart(self, region_code: str, category_id: Optional[str]) -> List[Dict]:
+        key = (region_code, category_id)
+        with self._lock:
+            if key not in self._charts:
+                items = None
+                path = fixture_path(self.fixtures_dir, region_code, category_id)
+                if self.source in ("auto", "fixtures") and os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        items = json.load(f)["items"]
+                elif self.source == "fixtures":
+                    items = []
+                if items is None:
+                    items = synthetic_chart(region_code, category_id, self.chart_size, self.seed)
+                for item in items:
+                    item.setdefault("etag", _etag(item))
+                self._charts[key] = items
+                self._by_id.update((item["id"], item) for item in items)
+            return self._charts[key]
+
+    def lookup(self, video_ids: List[str]) -> List[Dict]:
+        """Resolve `id=` requests against every chart served so far; unknown IDs are omitted, as upstream."""
+        with self._lock:
+            return [self._by_id[vid] for vid in video_ids if vid in self._by_id]
+
+# ---------------------------------------------------------------------------
+# Response shaping: parts, fields, pagination, ETags
+# ---------------------------------------------------------------------------
+
+def _parse_fields(expr: str) -> Dict:
+    """Parse the API's `fields` syntax, e.g. items(id,snippet(title)),pageInfo."""
+    tree: Dict = {}
+    stack = [tree]
+    name = ""
+    for char in expr:
+        if char == "(":
+            node = stack[-1].setdefault(name.strip(), {})
+            stack.append(node)
+            name = ""
+        elif char in ",)":
+            if name.strip():
+                stack[-1].setdefault(name.strip(), {})
+            name = ""
+            if char == ")":
+                stack.pop()
+        else:
+            name += char
+    if name.strip():
+        stack[-1].setdefault(name.strip(), {})
+    return tree
+
+def _apply_fields(obj, tree: Dict):
+    if not tree:
+        return obj
+    if isinstance(obj, list):
+        return [_apply_fields(item, tree) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    return {key: _apply_fields(obj[key], sub) for key, sub in tree.items() if key in obj}
+
+def _project_parts(item: Dict, parts: List[str]) -> Dict:
+    shaped = {"kind": item.get("kind", "youtube#video"), "etag": item["etag"], "id": item["id"]}
+    for part in parts:
+        if part != "id" and part in item:
+            shaped[part] = item[part]
+    return shaped
+
+def _etag(obj) -> str:
+    return hashlib.blake2b(json.dumps(obj, sort_keys=True).encode("utf-8"), digest_size=12).hexdigest()
+
+def _page_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode().rstrip("=")
+
+def _page_offset(token: Optional[str]) -> int:
+    if not token:
+        return 0
+    padded = token + "=" * (-len(token) % 4)
+    return int(base64.urlsafe_b64decode(padded).decode().split(":", 1)[1])
+
+def _error(status: int, reason: str, message: str) -> Response:
+    body = {"error": {"code": status, "message": message, "errors": [{"message": message, "domain": "youtube.standin", "reason": reason}]}}
+    return Response(json.dumps(body), status_code=status, media_type="application/json")
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class FaultInjector:
+    """Seeded latency and error injection, adjustable at runtime."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, quota_error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self._rng = random.Random(seed)
+
+    def delay_seconds(self) -> float:
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        return max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+
+    def fault(self) -> Optional[Response]:
+        roll = self._rng.random()
+        if roll < self.quota_error_rate:
+            return _error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+        if roll < self.quota_error_rate + self.error_rate:
+            return _error(503, "backendError", "Injected backend error.")
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "quota_error_rate": self.quota_error_rate,
+        }
+
+def create_app(source: ChartSource = None, faults: FaultInjector = None) -> FastAPI:
+    """Build the stand-in ASGI app. Serves GET /youtube/v3/videos."""
+    source = source or ChartSource()
+    faults = faults or FaultInjector()
+    stats = {"requests": 0, "not_modified": 0, "errors_injected": 0, "items_served": 0}
+
+    app = FastAPI(title="YouTube Data API stand-in")
+    app.state.source = source
+    app.state.faults = faults
+    app.state.stats = stats
+
+    @app.get("/youtube/v3/videos")
+    async def videos(request: Request):
+        stats["requests"] += 1
+        params = request.query_params
+
+        await asyncio.sleep(faults.delay_seconds())
+        fault = faults.fault()
+        if fault is not None:
+            stats["errors_injected"] += 1
+            return fault
+
+        parts = [p.strip() for p in params.get("part", "").split(",") if p.strip()]
+        if not parts:
+            return _error(400, "required", "Required parameter: part")
+
+        try:
+            max_results = int(params.get("maxResults", 5))
+            offset = _page_offset(params.get("pageToken"))
+        except ValueError:
+            return _error(400, "invalidParameter", "Invalid maxResults or pageToken")
+        if not 1 <= max_results <= 50:
+            return _error(400, "invalidParameter", "maxResults must be between 1 and 50")
+
+        if params.get("id"):
+            items = source.lookup([vid for vid in params["id"].split(",") if vid])
+            page, next_offset, total = items, None, len(items)
+        elif params.get("chart") == "mostPopular":
+            category_id = params.get("videoCategoryId")
+            if category_id and category_id not in config.VALID_CATEGORIES:
+                return _error(400, "videoChartNotFound", f"Chart not found for category {category_id}")
+            chart = source.chart(params.get("regionCode", "US"), category_id)
+            page = chart[offset:offset + max_results]
+            total = len(chart)
+            next_offset = offset + max_results if offset + max_results < total else None
+        else:
+            return _error(400, "missingRequiredParameter", "No filter selected. Expected one of: chart, id")
+
+        body = {
+            "kind": "youtube#videoListResponse",
+            "items": [_project_parts(item, parts) for item in page],
+            "pageInfo": {"totalResults": total, "resultsPerPage": max_results},
+        }
+        if next_offset is not None:
+            body["nextPageToken"] = _page_token(next_offset)
+        if offset:
+            body["prevPageToken"] = _page_token(max(0, offset - max_results))
+        body["etag"] = _etag(body)
+
+        if params.get("fields"):
+            body = _apply_fields(body, _parse_fields(params["fields"]))
+
+        etag = f'"{_etag(body)}"'
+        if request.headers.get("if-none-match") == etag:
+            stats["not_modified"] += 1
+            return Response(status_code=304, headers={"ETag": etag})
+
+        stats["items_served"] += len(page)
+        return Response(json.dumps(body), media_type="application/json", headers={"ETag": etag})
+
+    @app.get("/_standin/stats")
+    async def get_stats():
+        return {**stats, "faults": faults.to_dict()}
+
+    @app.post("/_standin/faults")
+    async def set_faults(request: Request):
+        """Adjust latency/error injection mid-run, e.g. {"error_rate": 0.1}."""
+        for key, value in (await request.json()).items():
+            if key in faults.to_dict():
+                setattr(faults, key, float(value))
+        return faults.to_dict()
+
+    return app
+
+# ---------------------------------------------------------------------------
+# Record mode
+# ---------------------------------------------------------------------------
+
+async def record_fixtures(
+    regions: List[str],
+    categories: List[Optional[str]],
+    fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+    limit: int = 200,
+    api_key: str = None,
+    base_url: str = UPSTREAM_BASE_URL
+) -> List[str]:
+    """
+    Capture live mostPopular charts (all pages, full snippet + statistics) into fixture files.
+
+    Returns:
+        Paths of the fixtures written
+    """
+    api_key = api_key or config.YOUTUBE_API_KEY
+    if not api_key:
+        raise ValueError("YOUTUBE_API_KEY is required to record fixtures")
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    written = []
+    async with httpx.AsyncClient(timeout=15.0) as client:
+        for region_code in regions:
+            for category_id in categories:
+                params = {"part": "snippet,statistics", "chart": "mostPopular", "regionCode": region_code, "maxResults": 50, "key": api_key}
+                if category_id:
+                    params["videoCategoryId"] = category_id
+
+                items, page_token = [], None
+                while len(items) < limit:
+                    response = await client.get(f"{base_url}/videos", params={**params, **({"pageToken": page_token} if page_token else {})})
+                    response.raise_for_status()
+                    payload = response.json()
+                    items.extend(payload.get("items", []))
+                    page_token = payload.get("nextPageToken")
+                    if not page_token:
+                        break
+
+                path = fixture_path(fixtures_dir, region_code, category_id)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump({"recorded_at": datetime.utcnow().isoformat(), "items": items[:limit]}, f)
+                written.append(path)
+                logger.info("Recorded chart fixture", region=region_code, category=category_id, items=len(items[:limit]), path=path)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Local YouTube Data API stand-in")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve recorded or synthetic videos responses")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8081)
+    serve.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    serve.add_argument("--source", choices=["auto", "fixtures", "synthetic"], default="auto")
+    serve.add_argument("--chart-size", type=int, default=200)
+    serve.add_argument("--seed", type=int, default=0)
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--jitter-ms", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503 backendError")
+    serve.add_argument("--quota-error-rate", type=float, default=0.0, help="Fraction of requests answered with 403 quotaExceeded")
+
+    record = commands.add_parser("record", help="Capture live charts into fixtures")
+    record.add_argument("--regions", default="US")
+    record.add_argument("--categories", default="all", help="Comma-separated category IDs; 'all' for no category filter")
+    record.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    record.add_argument("--limit", type=int, default=200)
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        categories = [None if c == "all" else c for c in args.categories.split(",")]
+        asyncio.run(record_fixtures(args.regions.split(","), categories, args.fixtures, args.limit))
+        return
+
+    import uvicorn
+    app = create_app(
+        ChartSource(args.fixtures, args.source, args.chart_size, args.seed),
+        FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, args.quota_error_rate, args.seed)
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()